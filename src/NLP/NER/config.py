@@ -4,6 +4,15 @@ Module to keep NER config
 # Path to the trained model directory
 PATH_TRAINED_MODEL = "./src/nlp/ner/model_training/trainedModel"
 
+# Path to the serialized pipelines snapshot, see VhNer.to_bytes
+PATH_NER_SNAPSHOT = "./src/nlp/ner/model_training/trainedModel.snapshot"
+
+# Path to the Home Assistant entity registry snapshot, see HasRegistrySnapshot
+PATH_HAS_SNAPSHOT = "./src/nlp/has_skills/entities.snapshot"
+
+# Entity scorer of the Home Assistant entity registry, "fuzz" or "vector", see HasEntityRegistry
+HAS_ENTITY_SCORER = "fuzz"
+
 # Path to the test sentences file
 PATH_TEST_SENTENCES = "./src/nlp/ner/model_training/rawDataSet/sentances.txt"
 
@@ -13,6 +22,9 @@ PATH_TRAIN_DATA = "./src/nlp/ner/model_training/rawDataSet/spacy_training_data_g
 # Path to the vocabulary directory
 PATH_VOCAB = './src/nlp/ner/vocab/en-us'
 
+# Path to the compiled vocabulary artifact, rebuilt when the vocabulary changes, see vh_vocab
+PATH_VOCAB_ARTIFACT = './src/nlp/ner/vocab/en-us.compiled.json'
+
 # The size of the training dataset
 SIZE_OF_TRAIN_DATA = 1000
 
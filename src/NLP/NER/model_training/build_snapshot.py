@@ -0,0 +1,32 @@
+'''
+Module to build the VhNer pipelines snapshot used for fast orchestrator startup
+'''
+import time
+from vh_ner import VhNer
+import nlp.ner.config as cfg
+
+
+def main():
+    '''
+    Main function to load the pipelines from disk and write them to the snapshot file
+    '''
+    ner = VhNer(cfg.PATH_TRAINED_MODEL)
+    data = ner.to_bytes()
+    with open(cfg.PATH_NER_SNAPSHOT, "wb") as file:
+        file.write(data)
+    print(f"Snapshot written to {cfg.PATH_NER_SNAPSHOT} ({len(data) / 1e6:.1f} MB)")
+    print(f"Load from disk: {ner.startup_report().format()}")
+
+    start = time.perf_counter()
+    snapshot_ner = VhNer(cfg.PATH_TRAINED_MODEL, lazy=True)
+    with open(cfg.PATH_NER_SNAPSHOT, "rb") as file:
+        if not snapshot_ner.from_bytes(file.read()):
+            print("Snapshot was rejected")
+            return
+    snapshot_ner.warm_up(background=False)
+    print(f"Load from snapshot: {snapshot_ner.startup_report().format()}, "
+          f"total {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+'''
+Module to build the compiled vocabulary artifact loaded by the enums, the gazetteer and the training data generator
+'''
+import time
+from ner.ner_cache import path_fingerprint
+from ner.vh_vocab import compile_vocab, load_vocab, save_vocab
+import nlp.ner.config as cfg
+
+
+def main():
+    '''
+    Main function to compile the vocabulary files and write them to the artifact file
+    '''
+    start = time.perf_counter()
+    fingerprint = [list(entry) for entry in path_fingerprint(cfg.PATH_VOCAB)]
+    vocab = compile_vocab(cfg.PATH_VOCAB)
+    size = save_vocab(vocab, cfg.PATH_VOCAB_ARTIFACT, fingerprint)
+    compile_time = time.perf_counter() - start
+    print(f"Artifact written to {cfg.PATH_VOCAB_ARTIFACT} ({size / 1e3:.1f} kB)")
+    print(f"Files: {len(vocab.hashes)}, entries: {len(vocab.synonyms)}, "
+          f"phrases: {len(vocab.reverse)}, digest: {vocab.digest()[:16]}")
+
+    start = time.perf_counter()
+    loaded = load_vocab(cfg.PATH_VOCAB, cfg.PATH_VOCAB_ARTIFACT)
+    print(f"Compile from .voc files: {compile_time * 1000:.2f} ms, "
+          f"load from artifact: {(time.perf_counter() - start) * 1000:.2f} ms, "
+          f"same: {loaded == vocab}")
+
+
+if __name__ == "__main__":
+    main()
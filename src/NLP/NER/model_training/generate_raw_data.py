@@ -44,6 +44,7 @@ class TrainingDataGenerator:
         synonyms: dict[str, str | list[str]],
         help_descriptor: dict[str, str],
         help_switchable_thing: dict[str, str],
+        synonym_index: dict[str, list[str]] | None = None,
     ) -> None:
         """
         Initialize the TrainingDataGenerator with predefined entities, synonyms, and helper dictionaries.
@@ -53,11 +54,20 @@ class TrainingDataGenerator:
             synonyms (dict): A dictionary containing synonyms for the entities.
             helpDescriptor (dict): A dictionary containing descriptor helpers.
             helpswitchableThing (dict): A dictionary containing switchable thing helpers.
+            synonym_index (dict, optional): The entities of every synonym, the first one is
+                used to label the synonym. Built from synonyms if not given.
         """
         self.helper = {}
 
         self.predefined_entities = predefined_entities
         self.synonyms = synonyms
+        if synonym_index is None:
+            synonym_index = {}
+            for entity, entity_synonyms in synonyms.items():
+                for synonym in (entity_synonyms if isinstance(entity_synonyms, list)
+                                else [entity_synonyms]):
+                    synonym_index.setdefault(synonym, []).append(entity)
+        self.synonym_index = synonym_index
         self.helper["descriptor"] = help_descriptor
         self.helper["switchableThing"] = help_switchable_thing
 
@@ -459,9 +469,7 @@ class TrainingDataGenerator:
             entity_label = [
                 key for key, value in entities_list.items() if entity_text == value
             ][0]
-            entity_name = [
-                key for key, value in self.synonyms.items() if entity_text in value
-            ][0]
+            entity_name = self.synonym_index[entity_text][0]
             entity_data.append((start, end, f"{entity_label}_#{entity_name}"))
 
         return sentence, {"entities": entity_data}
@@ -504,6 +512,7 @@ def main() -> None:
             dict(sorted(vocab.synonyms_dict.items())),
             vocab.synonyms_dict["descriptor"],
             vocab.synonyms_dict["switchable_thing"],
+            vocab.synonym_index,
         )
 
         sentences_data, generated_data = generator.generate_training_data()
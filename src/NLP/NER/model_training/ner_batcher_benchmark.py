@@ -0,0 +1,66 @@
+'''
+Module to benchmark the micro-batching asyncio front end of VhNer under concurrent load
+'''
+import asyncio
+import time
+from vh_ner import VhNer
+from ner.vh_ner_async import VhNerBatcher
+import nlp.ner.config as cfg
+
+# Number of requests in flight at the same time
+CONCURRENCY = 32
+
+
+async def run_batched(ner: VhNer, sentences: list[str]) -> float:
+    '''
+    Send the sentences through a VhNerBatcher, CONCURRENCY requests at a time.
+
+    Args:
+        ner (VhNer): The NER instance to use.
+        sentences (list[str]): Sentences to process.
+
+    Returns:
+        float: Elapsed time in seconds.
+    '''
+    batcher = VhNerBatcher(ner, max_batch_size=CONCURRENCY)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def request(sentence: str) -> None:
+        async with semaphore:
+            await batcher.process_text(sentence)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(sentence) for sentence in sentences))
+    elapsed = time.perf_counter() - start
+    await batcher.close()
+
+    stats = batcher.stats()
+    print(f"Batches: {stats.batches}, mean batch size: {stats.mean_batch_size:.1f}, "
+          f"largest: {stats.largest_batch}")
+    print(f"Queue wait: mean {stats.mean_queue_wait * 1000:.2f} ms, "
+          f"max {stats.max_queue_wait * 1000:.2f} ms")
+    return elapsed
+
+
+def main():
+    '''
+    Main function to compare one-by-one processing with micro-batched processing
+    '''
+    with open(cfg.PATH_TEST_SENTENCES, "r", encoding='UTF-8') as file:
+        sentences = [line.strip() for line in file if line.strip()]
+
+    ner = VhNer(cfg.PATH_TRAINED_MODEL)
+
+    start = time.perf_counter()
+    for sentence in sentences:
+        ner.process_text(sentence)
+    sequential_time = time.perf_counter() - start
+
+    batched_time = asyncio.run(run_batched(ner, sentences))
+
+    print(f"One by one: {len(sentences) / sequential_time:.1f} utterances/s")
+    print(f"Micro-batched ({CONCURRENCY} concurrent): {len(sentences) / batched_time:.1f} utterances/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+'''
+Module to report how often the VhNer gazetteer fast path is taken and how much latency it saves
+'''
+from vh_ner import VhNer
+from ner_parity_test import run_timed
+import nlp.ner.config as cfg
+
+
+def main():
+    '''
+    Main function to compare the gazetteer fast path with the statistical NER on the test sentences
+    '''
+    with open(cfg.PATH_TEST_SENTENCES, "r", encoding='UTF-8') as file:
+        sentences = [line.strip() for line in file if line.strip()]
+
+    model_ner = VhNer(cfg.PATH_TRAINED_MODEL)
+    gazetteer_ner = VhNer(cfg.PATH_TRAINED_MODEL, use_gazetteer=True)
+
+    model_results, model_time = run_timed(model_ner, sentences)
+    gazetteer_results, gazetteer_time = run_timed(gazetteer_ner, sentences)
+
+    disagreements = sum(
+        1 for expected, actual in zip(model_results, gazetteer_results) if expected != actual)
+    stats = gazetteer_ner.gazetteer_stats()
+
+    print(f"Sentences: {len(sentences)}")
+    print(f"Fast path taken: {stats.fast_path_hits} ({stats.fast_path_rate:.1%}), "
+          f"fallbacks: {stats.fallbacks}")
+    print(f"Disagreements with the statistical NER: {disagreements}")
+    if stats.fast_path_hits:
+        print(f"Mean fast path latency: {stats.fast_path_time * 1e6 / stats.fast_path_hits:.1f} us")
+    if stats.fallbacks:
+        print(f"Mean fallback latency: {stats.fallback_time * 1e3 / stats.fallbacks:.3f} ms")
+    print(f"Estimated time saved: {stats.saved_time:.3f} s")
+    print(f"Total: model only {model_time:.3f} s, with gazetteer {gazetteer_time:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
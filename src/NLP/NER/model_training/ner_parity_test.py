@@ -0,0 +1,94 @@
+'''
+Module to test that the fused VhNer mode and the rule based numeric backend give the same
+results as the two-pipeline mode, and that the rule based backend parses the numbers of
+NUMERIC_CASES
+'''
+import sys
+import time
+from vh_ner import VhNer, VhProcessedText
+from ner.vh_numeric import VhNumericBackend, VhNumericExtractor
+import nlp.ner.config as cfg
+
+
+# Numbers the test sentences do not cover, with the values the rule based backend must find
+NUMERIC_CASES: dict[str, list[tuple[float, str]]] = {
+    "set the temperature to -5 degrees": [(-5.0, "")],
+    "set the freezer to -18 degrees celsius": [(-18.0, "C")],
+    "dim the light to .5": [(0.5, "")],
+    "twenty twenty": [(20.0, ""), (20.0, "")],
+    "a thousand and one": [(1001.0, "")],
+    "twenty-five percent": [(0.25, "")],
+    "one hundred and five": [(105.0, "")],
+    "between 20-25 degrees": [(20.0, ""), (25.0, "")],
+}
+
+
+def run_timed(ner: VhNer, sentences: list[str]) -> tuple[list[VhProcessedText], float]:
+    '''
+    Process all sentences and measure the total processing time.
+
+    Args:
+        ner (VhNer): The NER instance to use.
+        sentences (list[str]): Sentences to process.
+
+    Returns:
+        tuple: Processing results and elapsed time in seconds.
+    '''
+    start = time.perf_counter()
+    results = [ner.process_text(sentence) for sentence in sentences]
+    return results, time.perf_counter() - start
+
+
+def check_numeric_cases() -> int:
+    '''
+    Check the rule based numeric backend on NUMERIC_CASES.
+
+    Returns:
+        int: The number of mismatches.
+    '''
+    extractor = VhNumericExtractor(VhNer.FRACTION_MAPPING, VhNer.PRESET_MAPPING)
+    mismatches = 0
+    for text, expected in NUMERIC_CASES.items():
+        actual = extractor.extract(text)
+        if actual != expected:
+            mismatches += 1
+            print(f"Numeric mismatch for: {text}")
+            print(f"  expected: {expected}")
+            print(f"  rules: {actual}")
+    return mismatches
+
+
+def main():
+    '''
+    Main function to compare fused and rule based NER processing with the two-pipeline
+    processing on the test sentences
+    '''
+    with open(cfg.PATH_TEST_SENTENCES, "r", encoding='UTF-8') as file:
+        sentences = [line.strip() for line in file if line.strip()]
+
+    reference_ner = VhNer(cfg.PATH_TRAINED_MODEL)
+    reference_results, reference_time = run_timed(reference_ner, sentences)
+    print(f"Two-pipeline: {reference_time * 1000 / len(sentences):.3f} ms per utterance")
+
+    variants = {
+        "fused": VhNer(cfg.PATH_TRAINED_MODEL, fused=True),
+        "rules": VhNer(cfg.PATH_TRAINED_MODEL, numeric_backend=VhNumericBackend.RULES),
+    }
+
+    mismatches = check_numeric_cases()
+    for name, ner in variants.items():
+        results, elapsed = run_timed(ner, sentences)
+        for sentence, expected, actual in zip(sentences, reference_results, results):
+            if expected != actual:
+                mismatches += 1
+                print(f"Mismatch for: {sentence}")
+                print(f"  two-pipeline: {expected}")
+                print(f"  {name}: {actual}")
+        print(f"{name}: {elapsed * 1000 / len(sentences):.3f} ms per utterance")
+
+    print(f"Sentences: {len(sentences)}, mismatches: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+'''
+Module to benchmark resident memory and throughput of the pre-forked VhNer worker pool
+'''
+import os
+import time
+from vh_ner import VhNer
+from ner.vh_ner_pool import VhNerPool
+import nlp.ner.config as cfg
+
+
+def read_memory_kb(pid: int) -> tuple[int, int]:
+    '''
+    Read the resident and proportional set size of a process (Linux only).
+
+    Args:
+        pid (int): The process id.
+
+    Returns:
+        tuple[int, int]: RSS and PSS in kB. PSS splits shared pages between the processes
+        sharing them, so the sum over processes is the real memory use.
+    '''
+    rss = pss = 0
+    with open(f"/proc/{pid}/smaps_rollup", "r", encoding='UTF-8') as file:
+        for line in file:
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def main():
+    '''
+    Main function to measure RSS, PSS and throughput against the number of workers
+    '''
+    with open(cfg.PATH_TEST_SENTENCES, "r", encoding='UTF-8') as file:
+        sentences = [line.strip() for line in file if line.strip()]
+
+    ner = VhNer(cfg.PATH_TRAINED_MODEL)
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+
+    print(f"{'workers':>8} {'utt/s':>10} {'RSS sum MB':>12} {'PSS sum MB':>12}")
+    for workers in worker_counts:
+        pool = VhNerPool(ner, workers=workers)
+        start = time.perf_counter()
+        for _ in pool.process_texts(sentences):
+            pass
+        elapsed = time.perf_counter() - start
+
+        memory = [read_memory_kb(pid) for pid in [os.getpid(), *pool.worker_pids]]
+        rss_sum = sum(rss for rss, _ in memory) / 1024
+        pss_sum = sum(pss for _, pss in memory) / 1024
+        pool.close()
+
+        print(f"{workers:>8} {len(sentences) / elapsed:>10.1f} {rss_sum:>12.1f} {pss_sum:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
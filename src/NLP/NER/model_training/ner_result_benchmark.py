@@ -0,0 +1,54 @@
+'''
+Module to measure the memory used by NER results with tracemalloc
+'''
+import tracemalloc
+from vh_ner import VhNer
+from ner.ner_result import NerResult
+import nlp.ner.config as cfg
+
+
+def measure(label: str, build, count: int) -> None:
+    '''
+    Measure the memory retained by a list of results and the peak memory of building them.
+
+    Args:
+        label (str): Name of the measured step.
+        build (Callable[[], list]): Function building the results.
+        count (int): Number of requests the results belong to.
+    '''
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    results = build()
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+
+    print(f"{label:<28} retained {(current - start) / count:>8.1f} B/request, "
+          f"peak {(peak - start) / count:>8.1f} B/request, {blocks / count:>6.1f} blocks/request")
+    del results
+
+
+def main():
+    '''
+    Main function to measure VhNer.process_text results and the NerResult objects built from them
+    '''
+    with open(cfg.PATH_TEST_SENTENCES, "r", encoding='UTF-8') as file:
+        sentences = [line.strip() for line in file if line.strip()]
+
+    ner = VhNer(cfg.PATH_TRAINED_MODEL)
+    ner.warm_up(background=False)
+    raw_results = [ner.process_text(sentence) for sentence in sentences]
+
+    measure("VhNer.process_text", lambda: [ner.process_text(sentence) for sentence in sentences],
+            len(sentences))
+    measure("NerResult", lambda: [
+        NerResult(sentence, raw_result) for sentence, raw_result in zip(sentences, raw_results)
+    ], len(sentences))
+    measure("NerResult + first single", lambda: [
+        NerResult(sentence, raw_result).to_single_first_occurrences()
+        for sentence, raw_result in zip(sentences, raw_results)
+    ], len(sentences))
+
+
+if __name__ == "__main__":
+    main()
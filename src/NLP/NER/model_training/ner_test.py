@@ -2,9 +2,28 @@
 Module to test NER model
 '''
 import random
+import time
 from vh_ner import VhNer, VhProcessedText
 import nlp.ner.config as cfg
 
+def process_all_sentences(ner: VhNer, n_process: int = 1):
+    '''
+    Process the whole test sentences file in batches and print the throughput
+
+    Args:
+        ner (VhNer): The NER instance to use.
+        n_process (int): Number of worker processes per pipeline.
+    '''
+    with open(cfg.PATH_TEST_SENTENCES, "r", encoding='UTF-8') as file:
+        sentences = [line.strip() for line in file]
+
+    start = time.perf_counter()
+    processed = sum(1 for _ in ner.process_texts(sentences, n_process=n_process))
+    elapsed = time.perf_counter() - start
+    print(f"Processed {processed} sentences in {elapsed:.2f} s "
+          f"({processed / elapsed:.1f} utterances/s, n_process={n_process})")
+
+
 def main():
     '''
     Main function to perform NER model test
@@ -12,10 +31,14 @@ def main():
     ner = VhNer(cfg.PATH_TRAINED_MODEL)
 
     while True:
-        user_input = input("Enter an utterance or type 'random' for random test sentence, or 'exit' to stop: ")
+        user_input = input("Enter an utterance or type 'random' for random test sentence, "
+                           "'all' to batch process all test sentences, or 'exit' to stop: ")
 
         if user_input.lower() == 'exit':
             break
+        elif user_input.lower() == 'all':
+            process_all_sentences(ner, n_process=-1)
+            continue
         elif user_input.lower() == 'r':
             with open(cfg.PATH_TEST_SENTENCES, "r", encoding='UTF-8') as file:
                 lines = file.readlines()
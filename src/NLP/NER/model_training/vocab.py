@@ -1,45 +1,34 @@
 # pylint: disable=C0114
-import os
-import glob
 import json
-from nlp.ner.config import PATH_VOCAB
+from ner.vh_vocab import load_vocab
 
 
 class Vocab:
     """
     A class representing the vocabulary and synonyms for labels and entities.
-    It reads data from the vocabulary files and populates dictionaries for label-entity
-    relationships and synonyms.
+    It reads data from the compiled vocabulary artifact and populates dictionaries for
+    label-entity relationships and synonyms.
     """
 
     def __init__(self):
         """Initialize the Vocab class with empty dictionaries for label-entity and synonyms."""
         self.label_entity_dict = {}
         self.synonyms_dict = {}
+        self.synonym_index = {}
 
     def read_data(self):
         """
-        Read data from the vocabulary files and populate the label_entity_dict and
-        synonyms_dict with the appropriate information.
+        Read data from the compiled vocabulary, see vh_vocab.load_vocab, and populate the
+        label_entity_dict, synonyms_dict and synonym_index with the appropriate information.
+        The artifact is rebuilt from the vocabulary files if any of them changed.
         """
-        for label_dir in glob.glob(os.path.join(PATH_VOCAB, '*')):
-            label = os.path.basename(label_dir)
-            label = label.lower()
-            self.label_entity_dict[label] = []
-
-            # Iterate through each entity file in the current label directory
-            for entity_file in glob.glob(os.path.join(label_dir, '*.voc')):
-                entity = os.path.splitext(os.path.basename(entity_file))[0]
-                entity = entity.lower()
-                self.label_entity_dict[label].append(entity)
-
-                # Read synonyms from the entity file
-                with open(entity_file, 'r', encoding='UTF-8') as file:
-                    synonyms = [line.strip() for line in file.readlines()]
-                    self.synonyms_dict[entity] = [string.lower()
-                                                  for string in synonyms]
-
-        del self.label_entity_dict['helpers']
+        vocab = load_vocab()
+        self.label_entity_dict = {
+            label.lower(): [entity.lower() for entity in entities]
+            for label, entities in vocab.labels.items() if label.lower() != 'helpers'}
+        self.synonyms_dict = {entity: list(synonyms) for entity, synonyms in vocab.synonyms.items()}
+        # Entities of every synonym, the first one is the canonical entity
+        self.synonym_index = vocab.reverse
 
     def __str__(self) -> str:
         """
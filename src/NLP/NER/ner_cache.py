@@ -0,0 +1,193 @@
+# pylint: disable=C0114
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+# Punctuation that does not change the meaning of a command. Dots and commas followed
+# by a digit are kept, so "21.5" or "1,000" stay intact.
+_PUNCTUATION_PATTERN = re.compile(r"[!?;:\"()\[\]{}]|[.,](?!\d)")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_utterance(text: str) -> str:
+    """
+    Normalize an utterance so that equivalent commands share one cache key.
+
+    The text is lowercased, punctuation is removed and whitespace is collapsed.
+
+    Args:
+        text (str): The utterance to normalize.
+
+    Returns:
+        str: The normalized utterance.
+
+    Example:
+        "  Turn off the Kitchen light! " -> "turn off the kitchen light"
+    """
+    text = _PUNCTUATION_PATTERN.sub(" ", text.lower())
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def path_fingerprint(path: str) -> tuple:
+    """
+    Compute a cheap fingerprint of a file or directory tree based on file metadata.
+
+    Args:
+        path (str): Path to a file or directory.
+
+    Returns:
+        tuple: Sorted (relative path, modification time, size) entries of all files.
+               Empty if the path does not exist.
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return ((os.path.basename(path), stat.st_mtime_ns, stat.st_size),)
+
+    entries = []
+    for root, _, files in os.walk(path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            stat = os.stat(file_path)
+            entries.append(
+                (os.path.relpath(file_path, path), stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(entries))
+
+
+class VhCacheStats(NamedTuple):
+    """
+    A NamedTuple with the counters of a VhLruCache.
+
+    Attributes:
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups not found in the cache (including expired entries).
+        evictions (int): Number of entries removed because the cache was full.
+        expirations (int): Number of entries removed because their TTL passed.
+        invalidations (int): Number of times the whole cache was cleared.
+        size (int): Current number of entries.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class VhLruCache:
+    """
+    A thread-safe, bounded cache with least recently used eviction and time to live.
+
+    Attributes:
+        max_size (int): Maximum number of entries kept in the cache.
+        ttl (float | None): Entry lifetime in seconds. None means entries never expire.
+
+    Methods:
+        get(key: Hashable) -> Any | None:
+            Returns the cached value or None if it is missing or expired.
+
+        put(key: Hashable, value: Any) -> None:
+            Stores a value, evicting the least recently used entry if the cache is full.
+
+        clear() -> None:
+            Removes all entries and counts an invalidation.
+
+        stats() -> VhCacheStats:
+            Returns the current counters.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None) -> None:
+        """
+        Initializes a new instance of the VhLruCache class.
+
+        Args:
+            max_size (int): Maximum number of entries. Must be positive.
+            ttl (float | None): Entry lifetime in seconds. Defaults to None (no expiry).
+        """
+        if max_size <= 0:
+            raise ValueError("Cache size must be positive.")
+        self.max_size: int = max_size
+        self.ttl: Optional[float] = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Get a value from the cache and mark it as recently used.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Any: The cached value, or None if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value in the cache.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store. Should be immutable.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def stats(self) -> VhCacheStats:
+        """
+        Get the cache counters.
+
+        Returns:
+            VhCacheStats: The current counters.
+        """
+        with self._lock:
+            return VhCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                invalidations=self._invalidations,
+                size=len(self._entries),
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,5 +1,5 @@
 # pylint: disable=C0114
-import itertools
+from typing import Optional, Tuple
 from ner.vh_ner import VhProcessedText, VhNamedEntity, VhNumericalValue
 
 
@@ -7,30 +7,46 @@ class NerResult:
     '''
     Class to hold the NER results of text processing.
 
+    Instances are immutable and use __slots__, so they have no per-instance dictionary.
+    Entity names are the interned labels of VhNer and entity texts are not copied: the
+    named entities keep character spans into the original text input.
+
     Attributes:
-        text (str): The text input.
-        ner_raw (VhProcessedText): Raw NER processing results containing named entities
-                                   and numerical values extracted from the text.
+        thing, attribute, location, state, action (tuple[str, ...] | None): Default names
+            of the recognized entities of each type, in utterance order. None if the result
+            was not created from NER results.
+        values (tuple[VhNumericalValue, ...]): Numerical values extracted from the text.
+        entities (tuple[VhNamedEntity, ...]): Named entities with their spans into input.
         description (str): A description extracted from the text excluding recognized entities.
         input (str): The original text input.
 
     Methods:
-        _generate_description(text: str, ner_entities: list[VhNamedEntity]) -> str:
+        _generate_description(text: str, ner_raw: VhProcessedText) -> str:
             Generate a description by excluding recognized entities and prepositions from the input text.
-        
-        _extract_recognized_literals(ner_entities: list[VhNamedEntity]) -> list[str]:
-            Extract and return the literals/entities recognized from the input text.
 
-        to_single_by_indexes(description: str, indexes: dict[str, int]) -> 'NerResultSingle':
+        to_single_by_indexes(description: str, indexes: dict[str, int],
+                             values: tuple[VhNumericalValue, ...]) -> 'NerResultSingle':
             Construct and return a NerResultSingle instance using specified indexes.
 
         split_by(description: str, entity_type: str) -> list['NerResultSingle']:
             Split the NER results by a specific entity type and return a list of NerResultSingle instances.
+
+        split_targets() -> list['NerResultSingle']:
+            Split a compound request into one NerResultSingle per target.
     '''
 
+    __slots__ = (
+        "thing", "attribute", "location", "state", "action",
+        "values", "entities", "description", "input",
+    )
+
     PREPOSITIONS = ["in", "on", "at"]
     NER_KEYS = ["thing", "attribute", "location", "state", "action"]
 
+    # One-name tuples shared by all results, keyed by the interned default name. The
+    # cache is bounded by the size of the vocabulary.
+    _SINGLE_NAMES: dict[str, Tuple[str]] = {}
+
     def __init__(self, text: str, ner_raw: VhProcessedText | None = None, desc : str | None = None) -> None:
         """
         Initialize a NER_Request instance with attributes based on the ner_raw.
@@ -41,112 +57,192 @@ class NerResult:
                                        and numerical values extracted from the text.
 
         """
-        # Initialize all keys with None
+        if not ner_raw:  # If None, we are spliting multirequest to single one
+            self._set_fields(text, desc, dict.fromkeys(self.NER_KEYS), (), ())
+            return
+
+        # Group default names by entity type in one pass over the entities
+        grouped: dict[str, list[str]] = {}
+        for named_entity in ner_raw.named_entities:
+            grouped.setdefault(named_entity.entity_type, []).append(named_entity.entity_default_name)
+
+        # Generate description based on the input text and NER_Dict
+        description = desc or self._generate_description(text, ner_raw)
+        self._set_fields(
+            text, description,
+            {key: self._names_tuple(grouped.get(key, ())) for key in self.NER_KEYS},
+            tuple(ner_raw.named_entities), tuple(ner_raw.numerical_values))
+
+    @classmethod
+    def _names_tuple(cls, names) -> Tuple[str, ...]:
+        """Returns the names as a tuple, sharing one-name tuples between results."""
+        if len(names) != 1:
+            return tuple(names)
+        shared = cls._SINGLE_NAMES.get(names[0])
+        if shared is None:
+            shared = cls._SINGLE_NAMES.setdefault(names[0], (names[0],))
+        return shared
+
+    def _set_fields(
+        self,
+        text: str,
+        description: Optional[str],
+        fields: dict,
+        entities: Tuple[VhNamedEntity, ...],
+        values: Tuple[VhNumericalValue, ...],
+    ) -> None:
+        """Sets all slots once, bypassing the immutability check."""
         for key in self.NER_KEYS:
-            setattr(self, key, None)
-        
-        if ner_raw: # If None, we are spliting multirequest to single one
-            # Set default attributes
-            for key in self.NER_KEYS:
-                matching_entities = [
-                    named_entity.entity_default_name
-                    for named_entity in ner_raw.named_entities
-                    if named_entity.entity_type == key
-                ]
-                setattr(self, key, matching_entities)
-
-            # Handle value attributes
-            self.values: list[VhNumericalValue] = ner_raw.numerical_values
-
-        if ner_raw and not desc:
-            # Generate description based on the input text and NER_Dict
-            self.description: str = self._generate_description(
-                text, ner_raw.named_entities)
-        else:
-            self.description: str = desc
-
-        # Store the original input
-        self.input: str = text
-
-    def _generate_description(self, text: str, ner_entities: list[VhNamedEntity]) -> str:
-        """
-        Generate a description from the input text by excluding recognized entities and prepositions.
+            object.__setattr__(self, key, fields.get(key))
+        object.__setattr__(self, "values", values)
+        object.__setattr__(self, "entities", entities)
+        object.__setattr__(self, "description", description)
+        object.__setattr__(self, "input", text)
 
-        Args:
-            text (str): The input text.
-            ner_entities (List[VhNamedEntity]): A list of named entities extracted from the text.
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
-        Returns:
-            str: A description extracted from the text.
-        """
-        tokens = text.split()
-        recognized_literals = self._extract_recognized_literals(ner_entities)
-        return " ".join(token for token in tokens if token not in recognized_literals and token not in self.PREPOSITIONS).strip()
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
-    def _extract_recognized_literals(self, ner_entities: list[VhNamedEntity]) -> list[str]:
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{key}={getattr(self, key)!r}" for key in self.NER_KEYS if getattr(self, key))
+        return f"{type(self).__name__}({fields}, description={self.description!r})"
+
+    def _generate_description(self, text: str, ner_raw: VhProcessedText) -> str:
         """
-        Extract recognized literals/entities from the list of named entities.
+        Generate a description from the input text by excluding recognized entities and prepositions.
+
+        The tokens of the Doc are walked once together with the entity spans, sorted by
+        position, and tokens overlapping an entity span are left out. Only the recognized
+        occurrence of a word is removed, other occurrences do not affect the result. Kept
+        tokens are joined as they are separated in the text, so "lamp," stays one word.
 
         Args:
-            ner_entities (List[VhNamedEntity]): A list of named entities extracted from the text.
+            text (str): The input text. Ignored if the result refers to another text, e.g.
+                the normalized utterance of a cached result.
+            ner_raw (VhProcessedText): The NER result with the token spans of the text.
 
         Returns:
-            List[str]: A list of recognized literals/entities.
+            str: A description extracted from the text.
         """
-        literals = [entity.entity_text.split() for entity in ner_entities]
-        return list(itertools.chain(*literals))
-
-    def to_single_by_indexes(self, description, indexes: dict[str, int]) -> 'NerResultSingle':
-        """Construct a NerResultSingle instance using the specified indexes."""
+        source = ner_raw.source or text
+        spans = sorted((entity.start, entity.end) for entity in ner_raw.named_entities)
+        span_index = 0
+        parts: list[str] = []
+        for start, end in ner_raw.token_spans:
+            # Skip the entities that end before this token
+            while span_index < len(spans) and spans[span_index][1] <= start:
+                span_index += 1
+            if span_index < len(spans) and spans[span_index][0] < end:
+                continue
+            token = source[start:end]
+            if token.isspace() or token in self.PREPOSITIONS:
+                continue
+            if parts and source[start - 1:start].isspace():
+                parts.append(" ")
+            parts.append(token)
+        return "".join(parts)
+
+    def to_single_by_indexes(
+        self, description, indexes: dict[str, int], values: Tuple[VhNumericalValue, ...] = ()
+    ) -> 'NerResultSingle':
+        """Construct a NerResultSingle instance using the specified indexes and values."""
         extracted_entities = {}
 
         for key, index in indexes.items():
-            entities = getattr(self, key, [])
+            entities = getattr(self, key, None) or ()
             if 0 <= index < len(entities):
                 extracted_entities[key] = entities[index]
 
-        return NerResultSingle(self.input,description, extracted_entities)
-    
+        return NerResultSingle(self.input, description, extracted_entities, values)
+
     def to_single_first_occurrences(self) -> 'NerResultSingle':
         """
         Construct a NerResultSingle instance using the first occurrence of each entity.
-            
+
         Returns:
             NerResultSingle: A single instance containing the first occurrence of each recognized entity.
         """
         extracted_entities = {}
 
         for key in self.NER_KEYS:
-            entities = getattr(self, key, [])
+            entities = getattr(self, key, None)
             if entities:  # Checks if the entity list is not empty
                 extracted_entities[key] = entities[0]
 
-        return NerResultSingle(self.input, self.description, extracted_entities)
+        return NerResultSingle(self.input, self.description, extracted_entities, self.values)
 
     def split_by(self, description: str,  entity_type: str) -> list['NerResultSingle']:
-        """Split the NerResult by a specific entity type."""
-        entities = getattr(self, entity_type, [])
+        """
+        Split the NerResult by a specific entity type.
+
+        The i-th single holds the i-th entity of entity_type. The other entity types and the
+        numerical values are paired by position and their last entity is shared by the
+        remaining singles, so in "turn on lights in kitchen and bathroom" both locations get
+        the action and the thing.
+
+        Args:
+            description (str): The description of the singles.
+            entity_type (str): The entity type to split by, one of NER_KEYS.
+
+        Returns:
+            list[NerResultSingle]: One single per entity of entity_type.
+        """
+        entities = getattr(self, entity_type, None) or ()
         split_results = []
 
         for index, _ in enumerate(entities):
-            split_results.append(
-                self.to_single_by_indexes(description, {entity_type: index},))
+            indexes = {
+                key: min(index, len(getattr(self, key)) - 1)
+                for key in self.NER_KEYS if getattr(self, key)}
+            values = (self.values[min(index, len(self.values) - 1)],) if self.values else ()
+            split_results.append(self.to_single_by_indexes(description, indexes, values))
 
         return split_results
 
+    def split_targets(self) -> list['NerResultSingle']:
+        """
+        Split a compound request into one single request per target.
+
+        The request is split by the entity type with the most entities, so "turn on lights
+        in kitchen and bathroom" gives one single per location and "turn on kitchen light
+        and office lamp" one per thing. Requests with one target give one single, equal to
+        to_single_first_occurrences().
+
+        Returns:
+            list[NerResultSingle]: The single requests in utterance order.
+        """
+        entity_type = max(self.NER_KEYS, key=lambda key: len(getattr(self, key) or ()))
+        if len(getattr(self, entity_type) or ()) <= 1:
+            return [self.to_single_first_occurrences()]
+        return self.split_by(self.description, entity_type)
+
 
 class NerResultSingle(NerResult):
     '''
     A derived class from NerResult to represent NER results for single-entity requests.
 
     Attributes:
-        Inherits attributes from NerResult.
+        Inherits attributes from NerResult. The entity type attributes hold a single
+        default name (str) or None instead of a tuple, values holds the numerical values of
+        the request and entities is empty.
 
     Methods:
         to_single() -> 'NerResultSingle':
             Return a single instance of itself.
     '''
-    def __init__(self, text: str, description : str,  entities: dict[str, str | list[str]]) -> None:
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        text: str,
+        description : str,
+        entities: dict[str, str | list[str]],
+        values: Tuple[VhNumericalValue, ...] = (),
+    ) -> None:
         """
         Initialize a NerResultSingle instance.
 
@@ -154,14 +250,14 @@ class NerResultSingle(NerResult):
             text (str): The original text input.
             description (str): A description extracted from the text.
             entities (dict[str, str | list[str]]): A dictionary of named entities extracted from the text.
+            values (tuple[VhNumericalValue, ...]): The numerical values of the request.
 
         Attributes:
             Inherits attributes and methods from NerResult.
         """
-        super().__init__(text, desc = description)  # Passing None as we will copy from parent
-        for key, value in entities.items():
-            setattr(self, key, value)  # Ensure the value is in a list format
+        # pylint: disable=W0231
+        self._set_fields(text, description, entities, (), tuple(values))
 
     def to_single(self) -> 'NerResultSingle':
         """Returns a single instance of itself."""
-        return self
\ No newline at end of file
+        return self
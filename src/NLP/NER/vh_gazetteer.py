@@ -0,0 +1,356 @@
+# pylint: disable=C0114
+import re
+import threading
+from typing import Iterable, NamedTuple, Optional, Tuple
+from ner.model_training.vocab import Vocab
+
+
+class VhGazetteerMatch(NamedTuple):
+    """
+    A NamedTuple for representing the result of matching an utterance against the gazetteer.
+
+    Attributes:
+        named_entities (dict[str, list[Tuple[str, int, int]]]): Named entities grouped by entity type,
+            in the same format as VhNer._get_named_entities.
+        has_numbers (bool): True if the utterance contains tokens that carry numerical values,
+            also inside entities.
+        token_spans (tuple[Tuple[int, int], ...]): Character spans of the tokens of the
+            utterance, see VhProcessedText.token_spans.
+    """
+    named_entities: dict[str, list[Tuple[str, int, int]]]
+    has_numbers: bool
+    token_spans: Tuple[Tuple[int, int], ...]
+
+
+class VhGazetteerStep(NamedTuple):
+    """
+    A NamedTuple for representing a classified token range of an utterance.
+
+    Attributes:
+        kind (str): One of VhGazetteer.STEP_ENTITY, STEP_NUMERIC, STEP_FILLER or STEP_UNKNOWN.
+            Ambiguous phrases are STEP_UNKNOWN.
+        start (int): Index of the first token.
+        end (int): Index after the last token.
+        payload (Tuple[str, str] | None): Entity type and canonical entity name for entities.
+        is_open (bool): True if the range reaches the last token and a longer phrase could
+            still match once more tokens arrive.
+    """
+    kind: str
+    start: int
+    end: int
+    payload: Optional[Tuple[str, str]]
+    is_open: bool
+
+
+class VhGazetteerStats(NamedTuple):
+    """
+    A NamedTuple with the fast path counters of a VhGazetteer.
+
+    Attributes:
+        fast_path_hits (int): Number of utterances answered by the gazetteer.
+        fallbacks (int): Number of utterances passed to the statistical NER.
+        fast_path_time (float): Total time spent on utterances answered by the gazetteer, in seconds.
+        fallback_time (float): Total time spent on utterances that fell back, in seconds.
+    """
+    fast_path_hits: int
+    fallbacks: int
+    fast_path_time: float
+    fallback_time: float
+
+    @property
+    def fast_path_rate(self) -> float:
+        """Fraction of utterances answered by the gazetteer."""
+        total = self.fast_path_hits + self.fallbacks
+        return self.fast_path_hits / total if total else 0.0
+
+    @property
+    def saved_time(self) -> float:
+        """
+        Estimated time saved by the fast path, in seconds. Fast path utterances are
+        assumed to cost the mean fallback latency if they were run through the model.
+        """
+        if not self.fallbacks:
+            return 0.0
+        mean_fallback = self.fallback_time / self.fallbacks
+        return mean_fallback * self.fast_path_hits - self.fast_path_time
+
+
+class VhGazetteer:
+    """
+    A token trie compiled from the .voc vocabulary that recognizes named entities without
+    running the statistical NER model.
+
+    The gazetteer reproduces the labels used to generate the training data: a phrase is
+    labelled with the alphabetically first vocabulary entry that lists it, and its entity
+    type is the vocabulary directory of that entry. Phrases listed under different entity
+    types (e.g. "open" as action and state) are ambiguous and are never answered here.
+
+    An utterance is covered if every token is part of an entity, a filler word, a
+    descriptor or a numerical value. Utterances that are not covered must be handled by
+    the statistical model.
+
+    Methods:
+        from_vocab(numeric_words: Iterable[str]) -> VhGazetteer:
+            Builds the gazetteer from the vocabulary directory.
+
+        match(text: str) -> Optional[VhGazetteerMatch]:
+            Returns the recognized entities, or None if the utterance is not fully covered.
+
+        tokenize(text: str), scan(tokens, start), build_match(tokens, steps):
+            The steps of match, for callers that resume scanning from a known token.
+
+        record_fast_path(elapsed: float), record_fallback(elapsed: float):
+            Update the fast path counters.
+
+        stats() -> VhGazetteerStats:
+            Returns the fast path counters.
+    """
+
+    # Words that may appear in a command without being part of an entity
+    FILLER_WORDS = frozenset(["the", "a", "an", "of", "in", "to", "and", "at", "my", "please"])
+
+    # Words that carry or qualify numerical values
+    NUMERIC_WORDS = frozenset(["%", "percent", "celsius", "degree", "degrees"])
+
+    # Vocabulary entry whose phrases are descriptors, not entities
+    DESCRIPTOR_ENTRY = "descriptor"
+
+    _TOKEN_PATTERN = re.compile(r"\d+(?:[.,]\d+)*|[\w']+|[^\w\s]")
+    _NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+    STEP_ENTITY = "entity"
+    STEP_NUMERIC = "numeric"
+    STEP_FILLER = "filler"
+    STEP_UNKNOWN = "unknown"
+
+    # Trie key holding the payload of the phrase that ends at a node
+    _END = ""
+    _AMBIGUOUS = ("", "")
+
+    def __init__(
+        self,
+        label_entity_dict: dict[str, list[str]],
+        synonyms_dict: dict[str, list[str]],
+        numeric_words: Iterable[str] = (),
+    ) -> None:
+        """
+        Initializes a new instance of the VhGazetteer class.
+
+        Args:
+            label_entity_dict (dict[str, list[str]]): Vocabulary directories and their entries,
+                as in Vocab.label_entity_dict.
+            synonyms_dict (dict[str, list[str]]): Vocabulary entries and their phrases,
+                as in Vocab.synonyms_dict.
+            numeric_words (Iterable[str]): Additional words that carry numerical values,
+                e.g. fraction and preset names.
+        """
+        self.numeric_words: frozenset[str] = self.NUMERIC_WORDS | frozenset(numeric_words)
+        self.descriptors: frozenset[str] = frozenset(
+            phrase for phrase in synonyms_dict.get(self.DESCRIPTOR_ENTRY, []) if phrase)
+        self._trie: dict = {}
+        # The counters are updated by every thread that processes text
+        self._lock = threading.Lock()
+        self._fast_path_hits = 0
+        self._fallbacks = 0
+        self._fast_path_time = 0.0
+        self._fallback_time = 0.0
+
+        entity_types: dict[str, set[str]] = {}
+        for label, entities in label_entity_dict.items():
+            for entity in entities:
+                entity_types.setdefault(entity, set()).add(label.rstrip("s"))
+
+        phrase_entries: dict[str, list[str]] = {}
+        for entry, phrases in sorted(synonyms_dict.items()):
+            for phrase in phrases:
+                if phrase:
+                    phrase_entries.setdefault(phrase, []).append(entry)
+
+        for phrase, entries in phrase_entries.items():
+            types = set().union(*(entity_types.get(entry, set()) for entry in entries))
+            if not types:
+                continue  # Helper entries only
+            if len(types) > 1:
+                self._insert(phrase, self._AMBIGUOUS)
+            else:
+                # Training data labels a phrase with the first entry that lists it
+                self._insert(phrase, (types.pop(), entries[0]))
+
+    @classmethod
+    def from_vocab(cls, numeric_words: Iterable[str] = ()) -> 'VhGazetteer':
+        """
+        Builds a gazetteer from the vocabulary files used to generate the training data.
+
+        Args:
+            numeric_words (Iterable[str]): Additional words that carry numerical values.
+
+        Returns:
+            VhGazetteer: The compiled gazetteer.
+        """
+        vocab = Vocab()
+        vocab.read_data()
+        return cls(vocab.label_entity_dict, vocab.synonyms_dict, numeric_words)
+
+    def _insert(self, phrase: str, payload: Tuple[str, str]) -> None:
+        """
+        Inserts a phrase into the token trie.
+
+        Args:
+            phrase (str): The phrase to insert.
+            payload (Tuple[str, str]): Entity type and canonical entity name.
+        """
+        node = self._trie
+        for token in self._TOKEN_PATTERN.findall(phrase.lower()):
+            node = node.setdefault(token, {})
+        node[self._END] = payload
+
+    def tokenize(self, text: str) -> list[Tuple[str, int, int]]:
+        """
+        Splits the text into lowercased tokens with their character offsets.
+
+        Args:
+            text (str): The text to tokenize.
+
+        Returns:
+            list[Tuple[str, int, int]]: Token text, start and end offset.
+        """
+        return [(match.group().lower(), match.start(), match.end())
+                for match in self._TOKEN_PATTERN.finditer(text)]
+
+    def step(self, tokens: list[Tuple[str, int, int]], start: int) -> 'VhGazetteerStep':
+        """
+        Classifies the longest phrase, or the single token, starting at the given token.
+
+        Args:
+            tokens (list): Tokens returned by tokenize.
+            start (int): Index of the first token.
+
+        Returns:
+            VhGazetteerStep: The classified token range.
+        """
+        node = self._trie
+        match_end, payload = start, None
+        is_open = False
+        for index in range(start, len(tokens)):
+            node = node.get(tokens[index][0])
+            if node is None:
+                break
+            if self._END in node:
+                match_end, payload = index + 1, node[self._END]
+        else:
+            # All tokens were consumed, more tokens could extend the phrase
+            is_open = any(key != self._END for key in node)
+
+        if payload is self._AMBIGUOUS:
+            return VhGazetteerStep(self.STEP_UNKNOWN, start, match_end, None, is_open)
+        if payload is not None:
+            return VhGazetteerStep(self.STEP_ENTITY, start, match_end, payload, is_open)
+
+        token = tokens[start][0]
+        if self._is_numeric(token):
+            kind = self.STEP_NUMERIC
+        elif token in self.FILLER_WORDS or token in self.descriptors:
+            kind = self.STEP_FILLER
+        else:
+            kind = self.STEP_UNKNOWN
+        return VhGazetteerStep(kind, start, start + 1, None, is_open)
+
+    def scan(
+        self, tokens: list[Tuple[str, int, int]], start: int = 0
+    ) -> list['VhGazetteerStep']:
+        """
+        Classifies all tokens from the given token to the end of the utterance. Stops
+        after the first token range that is not covered.
+
+        Args:
+            tokens (list): Tokens returned by tokenize.
+            start (int): Index of the first token. Defaults to 0.
+
+        Returns:
+            list[VhGazetteerStep]: Consecutive classified token ranges.
+        """
+        steps = []
+        index = start
+        while index < len(tokens):
+            step = self.step(tokens, index)
+            steps.append(step)
+            if step.kind == self.STEP_UNKNOWN:
+                break
+            index = step.end
+        return steps
+
+    def build_match(
+        self, tokens: list[Tuple[str, int, int]], steps: list['VhGazetteerStep']
+    ) -> Optional[VhGazetteerMatch]:
+        """
+        Builds the match result from classified token ranges. Numerical tokens inside an
+        entity (e.g. the preset "warm" in "warm water") count as numbers too, as the
+        numeric pipeline sees every token.
+
+        Args:
+            tokens (list): Tokens returned by tokenize.
+            steps (list[VhGazetteerStep]): Classified token ranges returned by scan.
+
+        Returns:
+            Optional[VhGazetteerMatch]: The recognized entities, or None if some part of the
+            utterance is not covered or no entity was found.
+        """
+        named_entities: dict[str, list[Tuple[str, int, int]]] = {}
+        has_numbers = False
+        for step in steps:
+            if step.kind == self.STEP_UNKNOWN:
+                return None
+            if step.kind == self.STEP_NUMERIC:
+                has_numbers = True
+            elif step.kind == self.STEP_ENTITY:
+                entity_type, entity_name = step.payload  # type: ignore
+                named_entities.setdefault(entity_type, []).append(
+                    (entity_name, tokens[step.start][1], tokens[step.end - 1][2]))
+                has_numbers = has_numbers or any(
+                    self._is_numeric(token) for token, _, _ in tokens[step.start:step.end])
+
+        if not named_entities:
+            return None
+        return VhGazetteerMatch(
+            named_entities, has_numbers, tuple((start, end) for _, start, end in tokens))
+
+    def _is_numeric(self, token: str) -> bool:
+        """Checks if a token carries or qualifies a numerical value."""
+        return token in self.numeric_words or self._NUMBER_PATTERN.fullmatch(token) is not None
+
+    def match(self, text: str) -> Optional[VhGazetteerMatch]:
+        """
+        Recognizes named entities in a fully covered utterance.
+
+        Args:
+            text (str): The text to process.
+
+        Returns:
+            Optional[VhGazetteerMatch]: The recognized entities, or None if some part of the
+            utterance is not covered, a phrase is ambiguous or no entity was found.
+        """
+        tokens = self.tokenize(text)
+        return self.build_match(tokens, self.scan(tokens))
+
+    def record_fast_path(self, elapsed: float) -> None:
+        """Counts an utterance answered by the gazetteer and its processing time in seconds."""
+        with self._lock:
+            self._fast_path_hits += 1
+            self._fast_path_time += elapsed
+
+    def record_fallback(self, elapsed: float) -> None:
+        """Counts an utterance passed to the statistical NER and its processing time in seconds."""
+        with self._lock:
+            self._fallbacks += 1
+            self._fallback_time += elapsed
+
+    def stats(self) -> VhGazetteerStats:
+        """
+        Returns the fast path counters.
+
+        Returns:
+            VhGazetteerStats: Fast path hits, fallbacks and the time spent on each.
+        """
+        with self._lock:
+            return VhGazetteerStats(
+                self._fast_path_hits, self._fallbacks, self._fast_path_time, self._fallback_time)
@@ -1,8 +1,21 @@
-# pylint: disable=C0114
-from typing import Optional, Tuple, NamedTuple
+# pylint: disable=C0114, C0413
+import itertools
+import sys
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional, Tuple, NamedTuple
+
+_IMPORT_STARTED = time.perf_counter()
 import spacy
+import srsly
 from spacy.language import Language
 from spacy.tokens.doc import Doc  # pylint: disable=E0611
+from thinc.api import Config
+_IMPORT_TIME = time.perf_counter() - _IMPORT_STARTED
+
+from ner.ner_cache import VhCacheStats, VhLruCache, normalize_utterance, path_fingerprint
+from ner.vh_gazetteer import VhGazetteer, VhGazetteerStats
+from ner.vh_numeric import VhNumericBackend, VhNumericExtractor
 
 
 class VhNumericalValue(NamedTuple):
@@ -21,14 +34,33 @@ class VhNamedEntity(NamedTuple):
     """
     A NamedTuple for representing named entities extracted from text.
 
+    The entity text is not copied, it is stored as a character span into the processed
+    text, which is shared by all entities of one result.
+
     Attributes:
         entity_type (str): The type of the named entity (e.g., thing, location, atttribute, etc.).
-        entity_default_name (str): The default name of the entity.
+            Interned.
+        entity_default_name (str): The default name of the entity. Interned.
+        start (int): Index of the first character of the entity in source.
+        end (int): Index after the last character of the entity in source.
+        source (str): The processed text.
         entity_text (str): The actual text of the entity extracted from the text.
     """
     entity_type: str
     entity_default_name: str
-    entity_text: str
+    start: int
+    end: int
+    source: str
+
+    @property
+    def entity_text(self) -> str:
+        """The actual text of the entity extracted from the text."""
+        return self.source[self.start:self.end]
+
+    def __repr__(self) -> str:
+        return (f"VhNamedEntity(entity_type={self.entity_type!r}, "
+                f"entity_default_name={self.entity_default_name!r}, "
+                f"entity_text={self.entity_text!r})")
 
 
 class VhProcessedText(NamedTuple):
@@ -36,11 +68,56 @@ class VhProcessedText(NamedTuple):
     A NamedTuple for representing the results of processing text for named entities and numerical values.
 
     Attributes:
-        named_entities (list[VhNamedEntity]): A list of named entities extracted from the text.
-        numerical_values (list[VhNumericalValue]): A list of numerical values extracted from the text.
+        named_entities (tuple[VhNamedEntity, ...]): Named entities extracted from the text.
+        numerical_values (tuple[VhNumericalValue, ...]): Numerical values extracted from the text.
+        source (str): The processed text, the token spans refer to it.
+        token_spans (tuple[Tuple[int, int], ...]): Character spans (start, end) of the tokens
+            of the spaCy Doc, or of the gazetteer tokens on the fast path. Empty if unknown.
+    """
+    named_entities: Tuple['VhNamedEntity', ...]
+    numerical_values: Tuple['VhNumericalValue', ...]
+    source: str = ""
+    token_spans: Tuple[Tuple[int, int], ...] = ()
+
+    def frozen(self) -> 'VhProcessedText':
+        """
+        Returns an immutable version of the result, with tuples instead of lists.
+        Results built by VhNer are immutable already and are returned without a copy.
+
+        Returns:
+            VhProcessedText: A result that can be shared safely between callers.
+        """
+        if isinstance(self.named_entities, tuple) and isinstance(self.numerical_values, tuple):
+            return self
+        return VhProcessedText(
+            tuple(self.named_entities), tuple(self.numerical_values),
+            self.source, tuple(self.token_spans))
+
+
+class VhStartupReport(NamedTuple):
+    """
+    A NamedTuple with the startup time breakdown of a VhNer instance.
+
+    Attributes:
+        import_time (float): Time spent importing spaCy, in seconds.
+        model_load_time (float | None): Time spent loading the pipelines, in seconds.
+            None if the models were not loaded yet.
+        warm_up_time (float | None): Time spent on warm-up utterances, in seconds.
+            None if no warm-up has finished.
+        from_snapshot (bool): True if the pipelines were loaded from a snapshot.
     """
-    named_entities: list['VhNamedEntity']
-    numerical_values: list['VhNumericalValue']
+    import_time: float
+    model_load_time: Optional[float]
+    warm_up_time: Optional[float]
+    from_snapshot: bool
+
+    def format(self) -> str:
+        """Returns a one-line, human readable summary of the report."""
+        def seconds(value: Optional[float]) -> str:
+            return f"{value:.3f} s" if value is not None else "n/a"
+        source = "snapshot" if self.from_snapshot else "disk"
+        return (f"import {seconds(self.import_time)}, model load "
+                f"{seconds(self.model_load_time)} ({source}), warm-up {seconds(self.warm_up_time)}")
 
 
 class VhNer:
@@ -51,8 +128,10 @@ class VhNer:
 
     Attributes:
         nlp (spacy.language.Language): A Spacy NLP pipeline for performing NER.
-        pretrained_nlp (spacy.language.Language): A Spacy NLP pipeline for extracting
-            numerical values and fractions from text.
+        pretrained_nlp (spacy.language.Language | None): A Spacy NLP pipeline for extracting
+            numerical values and fractions from text. None with the RULES numeric backend.
+        numeric_extractor (VhNumericExtractor | None): A table driven numerical value
+            extractor, used instead of pretrained_nlp with the RULES numeric backend.
 
     Methods:
         get_named_entities(text: str) -> dict:
@@ -67,6 +146,54 @@ class VhNer:
             Processes the given text and returns a tuple containing the extracted named
             entities and numerical values as dictionaries. Returns (None, None) if no
             named entities or numerical values are found.
+
+        process_batch(texts: list[str]) -> list[VhProcessedText]:
+            Processes a batch of texts with the result cache and the gazetteer, and the
+            spaCy pipelines for the remaining texts in one batch.
+
+        process_texts(texts: Iterable[str], batch_size: int, n_process: int) -> Iterator:
+            Processes a stream of texts in batches and yields a VhProcessedText for each
+            of them, in input order. Does not use the result cache or the gazetteer.
+
+        to_bytes() -> bytes, from_bytes(data: bytes) -> bool:
+            Serialize the loaded pipelines to a snapshot, and load them back.
+
+        warm_up(background: bool) -> Optional[threading.Thread]:
+            Runs a few synthetic utterances through the pipelines.
+
+        startup_report() -> VhStartupReport:
+            Returns the time spent on import, model loading and warm-up.
+
+    Fused mode:
+        When created with fused=True, the pretrained pipeline is loaded without the
+        components that numerical value extraction does not need (parser, lemmatizer,
+        NER). The utterance is tokenized once and the resulting tokens are shared with
+        the custom NER model instead of running two full pipelines.
+
+    Result cache:
+        When created with cache_size > 0, process_text results are cached by normalized
+        utterance (see ner_cache.normalize_utterance) with LRU eviction and a TTL.
+        Cached results are frozen VhProcessedText objects. The cache is cleared and the
+        custom model reloaded when the files at model_path change.
+
+    Gazetteer fast path:
+        When created with use_gazetteer=True, utterances fully covered by the vocabulary
+        (see vh_gazetteer.VhGazetteer) are answered without running the custom NER model,
+        and without the pretrained pipeline if they contain no numerical values.
+        Other utterances fall back to the spaCy pipelines.
+
+    Stage timing:
+        When created with a stage_observer, it is called with the stage name and the time
+        spent in seconds after every custom NER run ("ner_custom"), numerical value
+        extraction ("ner_numeric") and gazetteer match ("ner_gazetteer"). In fused mode
+        the pretrained pipeline run counts as numerical value extraction. process_batch
+        runs both pipelines as one batch and reports every text with its share of the
+        batch time ("ner_batch"). Cache hits run no stage.
+
+    Fast cold start:
+        When created with lazy=True, the pipelines are loaded on first use, or from a
+        snapshot written by to_bytes. A snapshot only contains the components in use and
+        is rejected if the model files or the VhNer settings changed since it was written.
     """
     FRACTION_MAPPING = {
         "half": 0.5,
@@ -84,17 +211,228 @@ class VhNer:
         "dark": 0.2,
     }
 
-    def __init__(self, model_path: str) -> None:
+    PRETRAINED_MODEL = "en_core_web_sm"
+
+    # Pretrained components not needed to read token.pos_ (tok2vec, tagger and
+    # attribute_ruler are kept)
+    FUSED_EXCLUDED_PIPES = ["parser", "lemmatizer", "ner", "senter"]
+
+    # Minimal time between two checks of the model files for changes, in seconds
+    MODEL_CHECK_INTERVAL = 1.0
+
+    SNAPSHOT_VERSION = 1
+
+    # Synthetic utterances used to warm up the pipelines
+    WARM_UP_UTTERANCES = (
+        "turn on the light in kitchen",
+        "set brightness of ceiling light in office to 50 percent",
+        "is heating in living room on",
+    )
+
+    def __init__(
+        self,
+        model_path: str,
+        fused: bool = False,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = 3600.0,
+        use_gazetteer: bool = False,
+        numeric_backend: VhNumericBackend = VhNumericBackend.SPACY,
+        lazy: bool = False,
+        stage_observer: Optional[Callable[[str, float], None]] = None,
+    ) -> None:
         """
         Initializes a new instance of the VH_NER class.
 
         Args:
             model_path (str): The path to the Spacy NER model to use for entity extraction.
+            fused (bool): If True, tokenize once and run only the pretrained components
+                needed for numerical value extraction. Defaults to False.
+            cache_size (int): Maximum number of cached process_text results. 0 disables
+                the cache. Defaults to 0.
+            cache_ttl (float | None): Lifetime of cached results in seconds. None means no
+                expiry. Defaults to one hour.
+            use_gazetteer (bool): If True, answer utterances fully covered by the vocabulary
+                without the statistical NER model. Defaults to False.
+            numeric_backend (VhNumericBackend): How numerical values are extracted. RULES
+                does not load the pretrained pipeline at all. Defaults to SPACY.
+            lazy (bool): If True, the pipelines are loaded on first use or by from_bytes
+                instead of here. Defaults to False.
+            stage_observer (Callable[[str, float], None] | None): Called with the name and
+                the duration of every processing stage, e.g. NlpMetrics.observe.
+                Defaults to None.
         """
-        self.nlp: Language = spacy.load(name=model_path)
-        self.pretrained_nlp: Language = spacy.load(name="en_core_web_sm")
+        self.model_path: str = model_path
+        self.stage_observer: Optional[Callable[[str, float], None]] = stage_observer
+        self.numeric_backend: VhNumericBackend = numeric_backend
+        # Fused mode only applies to the pretrained pipeline
+        self.fused: bool = fused and numeric_backend == VhNumericBackend.SPACY
+        self._nlp: Optional[Language] = None
+        self._pretrained_nlp: Optional[Language] = None
+        self._load_lock = threading.Lock()
+        self._model_load_time: Optional[float] = None
+        self._warm_up_time: Optional[float] = None
+        self._from_snapshot = False
+        self.numeric_extractor: Optional[VhNumericExtractor] = None
+        if numeric_backend == VhNumericBackend.RULES:
+            self.numeric_extractor = VhNumericExtractor(
+                self.FRACTION_MAPPING, self.PRESET_MAPPING)
+        if not lazy:
+            self._load_models()
+
+        self.cache: Optional[VhLruCache] = None
+        if cache_size > 0:
+            self.cache = VhLruCache(cache_size, cache_ttl)
+            self._model_fingerprint: tuple = path_fingerprint(model_path)
+            self._model_checked_at: float = time.monotonic()
+            self._model_lock = threading.Lock()
+            # Set while a changed model is loaded in the background
+            self._model_reloading = False
+            # Fingerprint of model files that failed to load, not retried until they change
+            self._model_failed_fingerprint: Optional[tuple] = None
+            # Increased by every clear, a result computed before it is not stored
+            self._cache_generation: int = 0
+
+        self.gazetteer: Optional[VhGazetteer] = None
+        if use_gazetteer:
+            self.gazetteer = VhGazetteer.from_vocab(
+                itertools.chain(self.FRACTION_MAPPING, self.PRESET_MAPPING))
+
+    @property
+    def nlp(self) -> Language:
+        """The custom NER pipeline, loaded on first access."""
+        if self._nlp is None:
+            self._load_models()
+        return self._nlp  # type: ignore
+
+    @property
+    def pretrained_nlp(self) -> Optional[Language]:
+        """The pretrained pipeline for numerical values, loaded on first access."""
+        if self._nlp is None:
+            self._load_models()
+        return self._pretrained_nlp
+
+    def _load_models(self) -> None:
+        """
+        Loads the pipelines from disk, unless another thread already did.
+        """
+        with self._load_lock:
+            if self._nlp is not None:
+                return
+            start = time.perf_counter()
+            if self.numeric_backend == VhNumericBackend.SPACY:
+                exclude = self.FUSED_EXCLUDED_PIPES if self.fused else []
+                self._pretrained_nlp = spacy.load(name=self.PRETRAINED_MODEL, exclude=exclude)
+            self._nlp = spacy.load(name=self.model_path)
+            self._model_load_time = time.perf_counter() - start
+
+    def _settings(self) -> dict:
+        """Returns the settings that determine which components a snapshot must contain."""
+        return {"fused": self.fused, "numeric_backend": self.numeric_backend.value}
+
+    @staticmethod
+    def _language_to_dict(nlp: Language) -> dict:
+        """Serializes a pipeline together with the config needed to rebuild it."""
+        return {"config": nlp.config.to_str(), "bytes": nlp.to_bytes()}
+
+    @staticmethod
+    def _language_from_dict(data: dict) -> Language:
+        """Rebuilds a pipeline serialized by _language_to_dict."""
+        config = Config().from_str(data["config"])
+        lang_cls = spacy.util.get_lang_class(config["nlp"]["lang"])
+        nlp = lang_cls.from_config(config)
+        return nlp.from_bytes(data["bytes"])
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the loaded pipelines into a snapshot. Only the components in use are
+        included, e.g. the parser is not stored in fused mode.
 
-    def _get_named_entities(self, text: str) -> dict[str, list[Tuple[str, str]]]:
+        Returns:
+            bytes: The snapshot.
+        """
+        return srsly.msgpack_dumps({
+            "version": self.SNAPSHOT_VERSION,
+            "model_fingerprint": list(path_fingerprint(self.model_path)),
+            "settings": self._settings(),
+            "nlp": self._language_to_dict(self.nlp),
+            "pretrained_nlp": (self._language_to_dict(self._pretrained_nlp)
+                               if self._pretrained_nlp is not None else None),
+        })
+
+    def from_bytes(self, data: bytes) -> bool:
+        """
+        Loads the pipelines from a snapshot written by to_bytes.
+
+        The snapshot is rejected if it has another version, was written with other settings
+        or the model files at model_path changed since it was written. A snapshot that can
+        not be read, e.g. truncated or written by another spaCy version, is rejected as well.
+        The pipelines are then loaded from model_path with spacy.load as usual.
+
+        Args:
+            data (bytes): The snapshot.
+
+        Returns:
+            bool: True if the pipelines were loaded from the snapshot.
+        """
+        start = time.perf_counter()
+        try:
+            snapshot = srsly.msgpack_loads(data)
+            fingerprint = [list(entry) for entry in path_fingerprint(self.model_path)]
+            if (snapshot.get("version") != self.SNAPSHOT_VERSION
+                    or snapshot.get("settings") != self._settings()
+                    or [list(entry) for entry in snapshot.get("model_fingerprint", [])]
+                    != fingerprint):
+                return False
+            pretrained_nlp = (self._language_from_dict(snapshot["pretrained_nlp"])
+                              if snapshot["pretrained_nlp"] is not None else None)
+            nlp = self._language_from_dict(snapshot["nlp"])
+        except Exception as error:  # pylint: disable=W0718
+            print(f"NER snapshot rejected: {error!r}")
+            return False
+
+        with self._load_lock:
+            self._pretrained_nlp = pretrained_nlp
+            self._nlp = nlp
+            self._model_load_time = time.perf_counter() - start
+            self._from_snapshot = True
+        return True
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Runs the warm-up utterances through the pipelines, loading them if needed, so the
+        first real request does not pay for lazy initialization.
+
+        Args:
+            background (bool): If True, warm up in a daemon thread. Defaults to True.
+
+        Returns:
+            threading.Thread | None: The warm-up thread, or None if run in the foreground.
+        """
+        def run() -> None:
+            self._load_models()
+            start = time.perf_counter()
+            for utterance in self.WARM_UP_UTTERANCES:
+                self._run_pipelines(utterance)
+            self._warm_up_time = time.perf_counter() - start
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="VhNerWarmUp", daemon=True)
+        thread.start()
+        return thread
+
+    def startup_report(self) -> VhStartupReport:
+        """
+        Returns the startup time breakdown.
+
+        Returns:
+            VhStartupReport: Import, model load and warm-up times.
+        """
+        return VhStartupReport(
+            _IMPORT_TIME, self._model_load_time, self._warm_up_time, self._from_snapshot)
+
+    def _get_named_entities(self, text: str) -> dict[str, list[Tuple[str, int, int]]]:
         """
         Extracts named entities and their attributes from the given text using the Spacy
         NER model.
@@ -104,16 +442,27 @@ class VhNer:
 
         Returns:
             dict: A dictionary containing the extracted named entities as keys and their
-            attribute
+            attribute with the character span of the entity text
             Example:
             {
-                'action': ('on', 'on'),
-                'thing': ('plug', 'socket'),
-                'location': ('backyard', 'backyard')
+                'action': [('on', 5, 7)],
+                'thing': [('plug', 12, 18)],
+                'location': [('backyard', 22, 30)]
             }
         """
-        doc: Doc = self.nlp(text)
-        entities: dict[str, list[Tuple[str, str]]] = {}
+        return self._named_entities_from_doc(self.nlp(text))
+
+    def _named_entities_from_doc(self, doc: Doc) -> dict[str, list[Tuple[str, int, int]]]:
+        """
+        Collects named entities from a Doc already processed by the custom NER model.
+
+        Args:
+            doc (Doc): The processed document.
+
+        Returns:
+            dict: Named entities grouped by entity type, see _get_named_entities.
+        """
+        entities: dict[str, list[Tuple[str, int, int]]] = {}
         for ent in doc.ents:
             split_label = ent.label_.split("_", maxsplit=1)
             if len(split_label) == 2:
@@ -124,12 +473,17 @@ class VhNer:
                 if entity_type not in entities:
                     entities[entity_type] = []
 
-                # Append the tuple (attribute, ent.text) to the list
+                # Append the tuple (attribute, start, end) to the list
                 entities[entity_type].append(
-                    (attribute.replace("#", ""), ent.text)
+                    (attribute.replace("#", ""), ent.start_char, ent.end_char)
                 )
         return entities
 
+    @staticmethod
+    def _token_spans(doc: Doc) -> Tuple[Tuple[int, int], ...]:
+        """Returns the character spans of the tokens of a Doc."""
+        return tuple((token.idx, token.idx + len(token)) for token in doc)
+
     def _extract_numerical_values(self, text: str) -> list[tuple[float, str]]:  # pylint: disable=C0301
         """
         Extracts numerical values and fractions from the given text using a pretrained
@@ -147,7 +501,20 @@ class VhNer:
             the method would return:
                 [(0.5, ""), (20.0, "C"), (0.5, ""), (0.2, "")]
         """
-        doc: Doc = self.pretrained_nlp(text)
+        if self.numeric_extractor is not None:
+            return self.numeric_extractor.extract(text)
+        return self._numerical_values_from_doc(self.pretrained_nlp(text))  # type: ignore
+
+    def _numerical_values_from_doc(self, doc: Doc) -> list[tuple[float, str]]:
+        """
+        Collects numerical values from a Doc already processed by the pretrained pipeline.
+
+        Args:
+            doc (Doc): The processed document.
+
+        Returns:
+            list: A list of tuples, see _extract_numerical_values.
+        """
         numerical_values: list[tuple[float, str]] = []
 
         for i, token in enumerate(doc):
@@ -183,6 +550,10 @@ class VhNer:
         entities and numerical values as dictionaries. Returns (None, None) if no named
         entities or numerical values are found.
 
+        If the result cache is enabled, results are cached by the normalized text, and the
+        frozen result of the first utterance is shared by all utterances with the same
+        normalized form.
+
         Args:
             text (str): The text to process.
 
@@ -192,16 +563,358 @@ class VhNer:
             The second dictionary contains the extracted numerical values as keys and
             their units (if any) as values.
         """
-        named_entities = self._get_named_entities(text)
-        numerical_values = self._extract_numerical_values(text)
+        if self.cache is None:
+            return self._process_text(text)
+
+        self._invalidate_on_model_change()
+        key = normalize_utterance(text)
+        result: Optional[VhProcessedText] = self.cache.get(key)
+        if result is None:
+            generation = self._cache_generation
+            result = self._process_text(text).frozen()
+            with self._model_lock:
+                # A result of the old model must not be stored after a reload cleared the cache
+                if generation == self._cache_generation:
+                    self.cache.put(key, result)
+        return result
+
+    def cache_stats(self) -> Optional[VhCacheStats]:
+        """
+        Returns the result cache counters.
+
+        Returns:
+            VhCacheStats | None: Hits, misses, evictions etc., or None if the cache is disabled.
+        """
+        return self.cache.stats() if self.cache else None
+
+    def _invalidate_on_model_change(self) -> None:
+        """
+        Reloads the custom model in the background if the model files changed, the result
+        cache is cleared once the new model is in use. The model directory is checked at
+        most once per MODEL_CHECK_INTERVAL.
+        """
+        now = time.monotonic()
+        if now - self._model_checked_at < self.MODEL_CHECK_INTERVAL:
+            return
+
+        with self._model_lock:
+            if self._model_reloading or now - self._model_checked_at < self.MODEL_CHECK_INTERVAL:
+                return
+            self._model_checked_at = now
+            fingerprint = path_fingerprint(self.model_path)
+            if fingerprint in (self._model_fingerprint, self._model_failed_fingerprint):
+                return
+            self._model_reloading = True
+        # Loading takes seconds, requests keep using the loaded model meanwhile
+        threading.Thread(target=self._reload_model, args=(fingerprint,),
+                         name="VhNerReload", daemon=True).start()
+
+    def _reload_model(self, fingerprint: tuple) -> None:
+        """
+        Loads the changed custom model and swaps it in. If the model can not be loaded, e.g.
+        because its files are still being written, the loaded model is kept and the same
+        files are not tried again until they change.
+
+        Args:
+            fingerprint (tuple): The path_fingerprint of the model files to load.
+        """
+        try:
+            nlp = spacy.load(name=self.model_path)
+        except Exception as error:  # pylint: disable=W0718
+            print(f"NER model not reloaded, keeping the loaded model: {error!r}")
+            with self._model_lock:
+                self._model_failed_fingerprint = fingerprint
+                self._model_reloading = False
+            return
+
+        with self._model_lock:
+            self._nlp = nlp
+            self._model_fingerprint = fingerprint
+            self._model_failed_fingerprint = None
+            self._cache_generation += 1
+            self.cache.clear()  # type: ignore
+            self._model_reloading = False
+
+    def gazetteer_stats(self) -> Optional[VhGazetteerStats]:
+        """
+        Returns the gazetteer fast path counters.
+
+        Returns:
+            VhGazetteerStats | None: Fast path hits, fallbacks and the time spent on each,
+            or None if the gazetteer is disabled.
+        """
+        return self.gazetteer.stats() if self.gazetteer else None
+
+    def _process_text(self, text: str) -> VhProcessedText:
+        """
+        Processes the text with the gazetteer fast path if enabled, falling back to the
+        spaCy pipelines. Does not use the result cache.
+
+        Args:
+            text (str): The text to process.
+
+        Returns:
+            VhProcessedText: The processed text result.
+        """
+        if self.gazetteer is None:
+            return self._run_pipelines(text)
+
+        start = time.perf_counter()
+        result = self._match_gazetteer(text)
+        if result is None:
+            result = self._run_pipelines(text)
+            self.gazetteer.record_fallback(time.perf_counter() - start)
+        return result
+
+    def _match_gazetteer(self, text: str) -> Optional[VhProcessedText]:
+        """
+        Answers the text with the gazetteer fast path. The caller records the fallback if
+        the gazetteer does not cover the text.
+
+        Args:
+            text (str): The text to process.
+
+        Returns:
+            VhProcessedText | None: The processed text result, None if the spaCy pipelines
+            must process the text.
+        """
+        start = time.perf_counter()
+        match = self.gazetteer.match(text)  # type: ignore
+        self._observe_stage("ner_gazetteer", start)
+        if match is None:
+            return None
+        numerical_values = []
+        if match.has_numbers:
+            numeric_start = time.perf_counter()
+            numerical_values = self._extract_numerical_values(text)
+            self._observe_stage("ner_numeric", numeric_start)
+        result = self._build_processed_text(
+            text, match.named_entities, numerical_values, match.token_spans)
+        self.gazetteer.record_fast_path(time.perf_counter() - start)  # type: ignore
+        return result
+
+    def _run_pipelines(self, text: str) -> VhProcessedText:
+        """
+        Runs the spaCy pipelines on the text.
+
+        Args:
+            text (str): The text to process.
+
+        Returns:
+            VhProcessedText: The processed text result.
+        """
+        if self.fused:
+            named_entities, numerical_values, token_spans = self._process_fused(text)
+        else:
+            start = time.perf_counter()
+            ner_doc: Doc = self.nlp(text)
+            named_entities = self._named_entities_from_doc(ner_doc)
+            token_spans = self._token_spans(ner_doc)
+            self._observe_stage("ner_custom", start)
+            start = time.perf_counter()
+            numerical_values = self._extract_numerical_values(text)
+            self._observe_stage("ner_numeric", start)
+        return self._build_processed_text(text, named_entities, numerical_values, token_spans)
+
+    def _observe_stage(self, stage: str, start: float) -> None:
+        """
+        Reports the time since start to the stage observer, if there is one.
+
+        Args:
+            stage (str): The stage name.
+            start (float): The time.perf_counter() value at the start of the stage.
+        """
+        if self.stage_observer is not None:
+            self.stage_observer(stage, time.perf_counter() - start)
+
+    def process_batch(self, texts: list[str]) -> list[VhProcessedText]:
+        """
+        Processes a batch of texts like process_text: every text is looked up in the result
+        cache and tried on the gazetteer fast path first, and only the remaining texts run
+        through the spaCy pipelines, as one process_texts batch. The stage observer gets
+        the gazetteer match of every text and the share of the batch of every text that
+        ran through the pipelines.
+
+        Args:
+            texts (list[str]): The texts to process.
+
+        Returns:
+            list[VhProcessedText]: The result for each input text, in input order.
+        """
+        results: list[Optional[VhProcessedText]] = [None] * len(texts)
+        keys: list[Optional[str]] = [None] * len(texts)
+        generation = 0
+        if self.cache is not None:
+            self._invalidate_on_model_change()
+            generation = self._cache_generation
+            for index, text in enumerate(texts):
+                keys[index] = normalize_utterance(text)
+                results[index] = self.cache.get(keys[index])
+
+        misses = [index for index, result in enumerate(results) if result is None]
+        computed = list(misses)
+        if self.gazetteer is not None:
+            gazetteer_start = time.perf_counter()
+            remaining = []
+            for index in misses:
+                results[index] = self._match_gazetteer(texts[index])
+                if results[index] is None:
+                    remaining.append(index)
+            match_time = (time.perf_counter() - gazetteer_start) / max(len(misses), 1)
+            misses = remaining
+
+        if misses:
+            start = time.perf_counter()
+            for index, result in zip(
+                    misses, self.process_texts([texts[index] for index in misses],
+                                               batch_size=len(misses))):
+                results[index] = result
+            batch_time = (time.perf_counter() - start) / len(misses)
+            for _ in misses:
+                if self.stage_observer is not None:
+                    self.stage_observer("ner_batch", batch_time)
+                if self.gazetteer is not None:
+                    # Every fallback pays for its match attempt and its share of the batch
+                    self.gazetteer.record_fallback(match_time + batch_time)
+
+        if self.cache is not None:
+            with self._model_lock:
+                # Results of the old model must not be stored after a reload cleared the cache
+                store = generation == self._cache_generation
+                for index in computed:
+                    results[index] = results[index].frozen()  # type: ignore
+                    if store:
+                        self.cache.put(keys[index], results[index])
+        return results  # type: ignore
+
+    def process_texts(
+        self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1
+    ) -> Iterator[VhProcessedText]:
+        """
+        Processes a stream of texts with Language.pipe and yields the results one by one.
+
+        Both pipelines are driven through Language.pipe with the same batch size and
+        number of processes, so their outputs stay aligned with the input order. With the
+        RULES numeric backend only the custom pipeline is piped.
+
+        Args:
+            texts (Iterable[str]): The texts to process. May be a generator.
+            batch_size (int): Number of texts buffered per batch. Defaults to 64.
+            n_process (int): Number of worker processes per pipeline. Use -1 for
+                all available CPU cores. Defaults to 1.
+
+        Yields:
+            VhProcessedText: The result for each input text, in input order.
+        """
+        if self.numeric_extractor is not None:
+            for ner_doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+                yield self._build_processed_text(
+                    ner_doc.text,
+                    self._named_entities_from_doc(ner_doc),
+                    self.numeric_extractor.extract(ner_doc.text),
+                    self._token_spans(ner_doc),
+                )
+            return
+
+        if self.fused:
+            pretrained_docs, shared_docs = itertools.tee(
+                self.pretrained_nlp.pipe(  # type: ignore
+                    texts, batch_size=batch_size, n_process=n_process))
+            ner_docs = self.nlp.pipe(
+                (self._share_tokens(doc) for doc in shared_docs),
+                batch_size=batch_size, n_process=n_process)
+        else:
+            ner_texts, numeric_texts = itertools.tee(texts)
+            ner_docs = self.nlp.pipe(
+                ner_texts, batch_size=batch_size, n_process=n_process)
+            pretrained_docs = self.pretrained_nlp.pipe(  # type: ignore
+                numeric_texts, batch_size=batch_size, n_process=n_process)
+
+        for ner_doc, pretrained_doc in zip(ner_docs, pretrained_docs):
+            yield self._build_processed_text(
+                ner_doc.text,
+                self._named_entities_from_doc(ner_doc),
+                self._numerical_values_from_doc(pretrained_doc),
+                self._token_spans(ner_doc),
+            )
+
+    def _process_fused(
+        self, text: str
+    ) -> Tuple[dict[str, list[Tuple[str, int, int]]], list[tuple[float, str]],
+               Tuple[Tuple[int, int], ...]]:
+        """
+        Tokenizes the text once with the pretrained pipeline and reuses its tokens
+        for the custom NER model.
+
+        Args:
+            text (str): The text to process.
+
+        Returns:
+            tuple: Named entities and numerical values, as returned by
+            _get_named_entities and _extract_numerical_values, and the token spans.
+        """
+        start = time.perf_counter()
+        pretrained_doc: Doc = self.pretrained_nlp(text)  # type: ignore
+        self._observe_stage("ner_numeric", start)
+        start = time.perf_counter()
+        ner_doc: Doc = self.nlp(self._share_tokens(pretrained_doc))
+        self._observe_stage("ner_custom", start)
+        return (
+            self._named_entities_from_doc(ner_doc),
+            self._numerical_values_from_doc(pretrained_doc),
+            self._token_spans(ner_doc),
+        )
+
+    def _share_tokens(self, doc: Doc) -> Doc:
+        """
+        Builds a Doc in the custom model vocabulary from already tokenized text.
+
+        Args:
+            doc (Doc): A Doc tokenized by the pretrained pipeline.
+
+        Returns:
+            Doc: An unprocessed Doc with the same tokens, bound to self.nlp.vocab.
+        """
+        return Doc(
+            self.nlp.vocab,
+            words=[token.text for token in doc],
+            spaces=[bool(token.whitespace_) for token in doc],
+        )
+
+    @staticmethod
+    def _build_processed_text(
+        text: str,
+        named_entities: dict[str, list[Tuple[str, int, int]]],
+        numerical_values: list[tuple[float, str]],
+        token_spans: Iterable[Tuple[int, int]] = (),
+    ) -> VhProcessedText:
+        """
+        Converts raw extraction results into an immutable VhProcessedText.
+
+        Entity types and default names are interned, so all results share one copy of
+        each label, and entity texts are kept as spans into text.
+
+        Args:
+            text (str): The processed text the entity spans refer to.
+            named_entities (dict): Named entities grouped by entity type, as
+                (default name, start, end) tuples.
+            numerical_values (list): Tuples of numerical value and unit.
+            token_spans (Iterable[Tuple[int, int]]): Character spans of the tokens of text.
+
+        Returns:
+            VhProcessedText: The processed text result.
+        """
         return VhProcessedText(
-            named_entities=[
-                VhNamedEntity(entity_type, entity_default_name, entity_text)
+            named_entities=tuple(
+                VhNamedEntity(sys.intern(entity_type), sys.intern(entity_default_name),
+                              start, end, text)
                 for entity_type, entity_list in named_entities.items()
-                for (entity_default_name, entity_text) in entity_list
-            ],
-            numerical_values=[
+                for (entity_default_name, start, end) in entity_list
+            ),
+            numerical_values=tuple(
                 VhNumericalValue(value, unit)
                 for value, unit in numerical_values
-            ],
+            ),
+            source=text,
+            token_spans=tuple(token_spans),
         )
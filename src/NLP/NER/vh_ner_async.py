@@ -0,0 +1,187 @@
+# pylint: disable=C0114
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+from ner.vh_ner import VhNer, VhProcessedText
+
+
+class VhBatcherStats(NamedTuple):
+    """
+    A NamedTuple with the counters of a VhNerBatcher.
+
+    Attributes:
+        requests (int): Number of processed requests.
+        batches (int): Number of batches sent to the pipelines.
+        largest_batch (int): Size of the largest batch.
+        total_queue_wait (float): Sum of the time requests waited before their batch started, in seconds.
+        max_queue_wait (float): Longest time a request waited before its batch started, in seconds.
+        total_batch_time (float): Sum of the batch processing times, in seconds.
+    """
+    requests: int
+    batches: int
+    largest_batch: int
+    total_queue_wait: float
+    max_queue_wait: float
+    total_batch_time: float
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Mean number of requests per batch."""
+        return self.requests / self.batches if self.batches else 0.0
+
+    @property
+    def mean_queue_wait(self) -> float:
+        """Mean time a request waited before its batch started, in seconds."""
+        return self.total_queue_wait / self.requests if self.requests else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Processed requests per second of batch processing time."""
+        return self.requests / self.total_batch_time if self.total_batch_time else 0.0
+
+
+class _PendingRequest(NamedTuple):
+    text: str
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class VhNerBatcher:
+    """
+    An asyncio front end for VhNer that groups concurrent requests into micro-batches.
+
+    Requests are queued and flushed as one VhNer.process_batch batch when either
+    max_batch_size requests are waiting or the oldest request waited max_delay seconds.
+    Cached and gazetteer results are resolved per request, only the other texts of a batch
+    run through the spaCy pipelines.
+    The batch runs in a single worker thread, so the event loop is never blocked and the
+    pipelines are never used from two threads at once.
+
+    Methods:
+        process_text(text: str) -> VhProcessedText:
+            Coroutine, queues the text and returns its result when its batch is done.
+
+        stats() -> VhBatcherStats:
+            Returns batch size and queue wait counters.
+
+        close() -> None:
+            Coroutine, flushes pending requests and stops the worker thread.
+    """
+
+    def __init__(self, ner: VhNer, max_batch_size: int = 32, max_delay: float = 0.005) -> None:
+        """
+        Initializes a new instance of the VhNerBatcher class.
+
+        Args:
+            ner (VhNer): The NER instance to use.
+            max_batch_size (int): Number of queued requests that triggers a flush. Defaults to 32.
+            max_delay (float): Maximum time a request waits for its batch to fill, in seconds.
+                Defaults to 5 ms.
+        """
+        self.ner: VhNer = ner
+        self.max_batch_size: int = max_batch_size
+        self.max_delay: float = max_delay
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="VhNerBatcher")
+        self._pending: list[_PendingRequest] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: set[asyncio.Task] = set()
+        self._requests = 0
+        self._batches = 0
+        self._largest_batch = 0
+        self._total_queue_wait = 0.0
+        self._max_queue_wait = 0.0
+        self._total_batch_time = 0.0
+
+    async def process_text(self, text: str) -> VhProcessedText:
+        """
+        Queues the text for processing in the next batch.
+
+        Args:
+            text (str): The text to process.
+
+        Returns:
+            VhProcessedText: The processed text result.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append(_PendingRequest(text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Sends all pending requests to the worker thread as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    def _process_batch(self, texts: list[str]) -> tuple[list[VhProcessedText], float, float]:
+        """
+        Processes a batch in the worker thread.
+
+        Args:
+            texts (list[str]): The texts to process.
+
+        Returns:
+            tuple: The results, the batch start time and the batch processing time.
+        """
+        started_at = time.perf_counter()
+        results = self.ner.process_batch(texts)
+        return results, started_at, time.perf_counter() - started_at
+
+    async def _run_batch(self, batch: list[_PendingRequest]) -> None:
+        """
+        Runs a batch in the worker thread and resolves the futures of its requests.
+
+        Args:
+            batch (list[_PendingRequest]): The requests to process.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            results, started_at, batch_time = await loop.run_in_executor(
+                self._executor, self._process_batch, [request.text for request in batch])
+        except Exception as exception:  # pylint: disable=W0718
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(exception)
+            return
+
+        self._batches += 1
+        self._requests += len(batch)
+        self._largest_batch = max(self._largest_batch, len(batch))
+        self._total_batch_time += batch_time
+        for request, result in zip(batch, results):
+            queue_wait = started_at - request.enqueued_at
+            self._total_queue_wait += queue_wait
+            self._max_queue_wait = max(self._max_queue_wait, queue_wait)
+            if not request.future.done():
+                request.future.set_result(result)
+
+    def stats(self) -> VhBatcherStats:
+        """
+        Returns the batch size and queue wait counters.
+
+        Returns:
+            VhBatcherStats: The current counters.
+        """
+        return VhBatcherStats(
+            self._requests, self._batches, self._largest_batch,
+            self._total_queue_wait, self._max_queue_wait, self._total_batch_time)
+
+    async def close(self) -> None:
+        """Processes the pending requests and stops the worker thread."""
+        self._flush()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        self._executor.shutdown(wait=True)
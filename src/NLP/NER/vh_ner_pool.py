@@ -0,0 +1,346 @@
+# pylint: disable=C0114
+import gc
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
+from multiprocessing import connection
+from typing import Iterable, Iterator, Optional
+from ner.vh_ner import VhNer, VhProcessedText
+
+
+_FREEZE_LOCK = threading.Lock()
+_FREEZE_COUNT = 0  # Number of open pools, the garbage collector is frozen while any is open
+
+
+def _freeze_gc() -> None:
+    """Freezes the garbage collector for a new pool, see VhNerPool."""
+    global _FREEZE_COUNT  # pylint: disable=W0603
+    with _FREEZE_LOCK:
+        gc.collect()
+        gc.freeze()
+        _FREEZE_COUNT += 1
+
+
+def _unfreeze_gc() -> None:
+    """Unfreezes the garbage collector when the last open pool is closed."""
+    global _FREEZE_COUNT  # pylint: disable=W0603
+    with _FREEZE_LOCK:
+        _FREEZE_COUNT -= 1
+        if _FREEZE_COUNT == 0:
+            gc.unfreeze()
+
+
+def _worker_main(ner: VhNer, requests, results) -> None:
+    """
+    Serves process_text requests in a forked worker until a None request arrives.
+
+    Args:
+        ner (VhNer): The NER instance inherited from the parent process.
+        requests (multiprocessing.Queue): Queue of (request id, text) tuples.
+        results (multiprocessing.connection.Connection): Pipe for (request id, result, error)
+            tuples.
+    """
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, text = request
+        try:
+            results.send((request_id, ner.process_text(text), None))
+        except Exception as exception:  # pylint: disable=W0718
+            results.send((request_id, None, f"{type(exception).__name__}: {exception}"))
+
+
+class _Worker:
+    """A worker process with its own request queue, result pipe and pending requests."""
+
+    def __init__(self, context, ner: VhNer, index: int) -> None:
+        self.requests = context.Queue()
+        self.results, sender = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_worker_main, args=(ner, self.requests, sender),
+            name=f"VhNerWorker-{index}", daemon=True)
+        self.process.start()
+        # Only the worker writes, so the pipe reports EOF when it exits
+        sender.close()
+        self.pending: set = set()
+
+    def discard(self) -> None:
+        """Releases the queue and the pipe of an exited worker."""
+        self.requests.cancel_join_thread()
+        self.requests.close()
+        self.results.close()
+
+
+class VhNerPool:
+    """
+    A pool of forked worker processes that share the VhNer pipelines copy-on-write.
+
+    The pipelines are loaded once in the parent process, the garbage collector is frozen
+    so that collections in the workers do not touch (and copy) the shared pages, and then
+    the workers are forked. The collector stays frozen until the last pool is closed.
+    Requires the "fork" start method, i.e. Linux or macOS.
+
+    Every worker has its own request queue and result pipe, and a request goes to the
+    worker with the fewest pending requests. A worker that exits, e.g. killed by the out of
+    memory killer, fails its pending requests with a RuntimeError and is replaced by a new
+    fork on the next submit. The replacement is forked by the thread that submits, not by
+    the result collector, so the fork never copies the collector in the middle of
+    resolving a future. A worker that exits can not block the others, as no queue is shared.
+
+    Attributes:
+        worker_pids (list[int]): Process ids of the workers.
+        restarts (int): Number of workers replaced after they exited.
+
+    Methods:
+        submit(text: str) -> Future:
+            Queues a text and returns a future of its VhProcessedText.
+
+        process_text(text: str, timeout: float | None) -> VhProcessedText:
+            Processes a text in a worker and waits for the result.
+
+        process_texts(texts: Iterable[str], timeout: float | None) -> Iterator[VhProcessedText]:
+            Spreads texts over the workers and yields the results in input order.
+
+        close() -> None:
+            Stops the workers.
+    """
+
+    TIMEOUT = 30.0  # Default time to wait for a result, in seconds
+
+    CLOSE_TIMEOUT = 5.0  # Time for the workers to exit on close, before they are terminated
+
+    def __init__(self, ner: VhNer, workers: Optional[int] = None) -> None:
+        """
+        Initializes a new instance of the VhNerPool class and forks the workers.
+
+        Args:
+            ner (VhNer): The NER instance to share. Its pipelines are loaded if it is lazy.
+            workers (int | None): Number of worker processes. Defaults to the number of CPU cores.
+
+        Raises:
+            RuntimeError: If the platform does not support the fork start method.
+        """
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("VhNerPool requires the 'fork' start method.")
+
+        self._ner = ner
+        self._context = multiprocessing.get_context("fork")
+        self._futures: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._worker_ids = itertools.count()
+        self._closing = False
+        self._exited = 0  # Number of exited workers not replaced yet
+        self.restarts = 0
+        # Wakes up the result collector when workers are added
+        self._wakeup_reader, self._wakeup_writer = os.pipe()
+
+        # Load everything that workers will need before forking
+        ner.warm_up(background=False)
+        _freeze_gc()
+
+        self._workers = [
+            _Worker(self._context, ner, next(self._worker_ids))
+            for _ in range(workers or os.cpu_count() or 1)
+        ]
+
+        self._collector = threading.Thread(
+            target=self._collect_results, name="VhNerPoolResults", daemon=True)
+        self._collector.start()
+
+    @property
+    def worker_pids(self) -> list[int]:
+        """Process ids of the workers."""
+        with self._lock:
+            return [worker.process.pid for worker in self._workers if worker.process.pid]
+
+    def _collect_results(self) -> None:
+        """
+        Resolves request futures with the results sent back by the workers, and replaces
+        workers that exited.
+        """
+        while True:
+            with self._lock:
+                workers = list(self._workers)
+                if not workers and self._closing:
+                    break
+            sources: dict = {self._wakeup_reader: None}
+            for worker in workers:
+                sources[worker.results] = worker
+                sources[worker.process.sentinel] = worker
+            # Wakes up for a result, for the exit of a worker or for new workers
+            for ready in connection.wait(list(sources), timeout=1.0):
+                worker = sources[ready]
+                if worker is None:
+                    os.read(self._wakeup_reader, 4096)
+                elif ready is worker.results:
+                    self._receive(worker)
+                elif worker.process.exitcode is not None:
+                    self._replace(worker)
+
+    def _receive(self, worker: _Worker) -> bool:
+        """Resolves the future of one result of a worker, False if the worker exited."""
+        try:
+            request_id, result, error = worker.results.recv()
+        except (EOFError, OSError):
+            return False
+        with self._lock:
+            worker.pending.discard(request_id)
+            future = self._futures.pop(request_id, None)
+        if future is None:
+            return True
+        try:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(error))
+        except InvalidStateError:
+            pass  # Cancelled after a timeout
+        return True
+
+    def _replace(self, worker: _Worker) -> None:
+        """
+        Fails the pending requests of an exited worker. Its replacement is forked by the
+        next submit, see _restart_workers.
+        """
+        # Results sent before the exit are still valid
+        while not worker.results.closed and worker.results.poll() and self._receive(worker):
+            pass
+        worker.process.join()
+        with self._lock:
+            self._workers.remove(worker)
+            failed = [self._futures.pop(request_id, None) for request_id in worker.pending]
+            restart = not self._closing
+            if restart:
+                self._exited += 1
+        worker.discard()
+        error = RuntimeError(
+            f"NER worker {worker.process.name} exited with code {worker.process.exitcode}")
+        for future in failed:
+            if future is not None and not future.done():
+                try:
+                    future.set_exception(error)
+                except InvalidStateError:
+                    pass
+        if restart:
+            print(f"{error}, restarting it")
+
+    def _restart_workers(self) -> None:
+        """Forks the replacements of exited workers in the calling thread."""
+        with self._lock:
+            if self._closing or not self._exited:
+                return
+            count, self._exited = self._exited, 0
+        # Objects created since the pool started are shared as well
+        gc.freeze()
+        new_workers = [_Worker(self._context, self._ner, next(self._worker_ids))
+                       for _ in range(count)]
+        with self._lock:
+            self._workers.extend(new_workers)
+            self.restarts += count
+            if self._closing:
+                for worker in new_workers:
+                    worker.requests.put(None)
+        os.write(self._wakeup_writer, b"\0")
+
+    def submit(self, text: str) -> Future:
+        """
+        Queues a text for processing by the worker with the fewest pending requests.
+
+        Args:
+            text (str): The text to process.
+
+        Returns:
+            Future: A future of the VhProcessedText. It fails with a RuntimeError if the
+                worker exits before the result is sent.
+
+        Raises:
+            RuntimeError: If the pool is closed.
+        """
+        self._restart_workers()
+        future: Future = Future()
+        request_id = next(self._request_ids)
+        with self._lock:
+            if self._closing or not self._workers:
+                raise RuntimeError("The NER pool is closed.")
+            worker = min(self._workers, key=lambda worker: len(worker.pending))
+            worker.pending.add(request_id)
+            self._futures[request_id] = future
+            worker.requests.put((request_id, text))
+        return future
+
+    def _result(self, future: Future, timeout: Optional[float]) -> VhProcessedText:
+        """Waits for the result of a future, cancels it on a timeout."""
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def process_text(self, text: str, timeout: Optional[float] = TIMEOUT) -> VhProcessedText:
+        """
+        Processes a text in a worker process.
+
+        Args:
+            text (str): The text to process.
+            timeout (float | None): Maximum time to wait, in seconds, None waits forever.
+                Defaults to TIMEOUT.
+
+        Returns:
+            VhProcessedText: The processed text result.
+
+        Raises:
+            TimeoutError: If no result arrived in time.
+            RuntimeError: If processing failed or the worker exited.
+        """
+        return self._result(self.submit(text), timeout)
+
+    def process_texts(
+        self, texts: Iterable[str], timeout: Optional[float] = TIMEOUT
+    ) -> Iterator[VhProcessedText]:
+        """
+        Spreads the texts over all workers.
+
+        Args:
+            texts (Iterable[str]): The texts to process.
+            timeout (float | None): Maximum time to wait for each result, in seconds, None
+                waits forever. Defaults to TIMEOUT.
+
+        Yields:
+            VhProcessedText: The result for each input text, in input order.
+
+        Raises:
+            TimeoutError: If a result did not arrive in time.
+            RuntimeError: If processing failed or a worker exited.
+        """
+        futures = [self.submit(text) for text in texts]
+        for future in futures:
+            yield self._result(future, timeout)
+
+    def close(self) -> None:
+        """
+        Stops the workers and the result collector. Workers that do not exit within
+        CLOSE_TIMEOUT, e.g. stuck in a request, are terminated. Does nothing if already closed.
+        """
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            for worker in self._workers:
+                worker.requests.put(None)
+        # The collector removes every worker once it exited
+        self._collector.join(self.CLOSE_TIMEOUT)
+        if self._collector.is_alive():
+            with self._lock:
+                workers = list(self._workers)
+            for worker in workers:
+                print(f"NER worker {worker.process.name} did not stop, terminating it")
+                worker.process.terminate()
+            self._collector.join(self.CLOSE_TIMEOUT)
+        if not self._collector.is_alive():
+            os.close(self._wakeup_reader)
+            os.close(self._wakeup_writer)
+        _unfreeze_gc()
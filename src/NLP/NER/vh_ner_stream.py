@@ -0,0 +1,142 @@
+# pylint: disable=C0114
+import itertools
+from typing import NamedTuple, Optional, Tuple
+from ner.vh_ner import VhNer, VhProcessedText
+from ner.vh_gazetteer import VhGazetteer, VhGazetteerStep
+
+
+class VhStreamUpdate(NamedTuple):
+    """
+    A NamedTuple for representing the result of one streaming hypothesis.
+
+    Attributes:
+        result (VhProcessedText): Named entities and numerical values of the hypothesis.
+        provisional (bool): True for partial hypotheses, False for the final transcript.
+        reused_tokens (int): Number of leading tokens whose analysis was reused from the
+            previous hypothesis.
+    """
+    result: VhProcessedText
+    provisional: bool
+    reused_tokens: int
+
+
+class VhNerStream:
+    """
+    A streaming NER session over growing partial transcripts of one utterance.
+
+    Each partial hypothesis is tokenized and compared with the previous one. Gazetteer
+    results for the shared token prefix are reused, and only the tail is scanned again,
+    so an extension costs time proportional to the new words. A trailing word that may
+    still grow into a phrase ("turn" before "turn on") is left pending. Hypotheses that
+    are not fully covered by the vocabulary are run through the VhNer pipelines. The final
+    transcript is always processed with VhNer.process_text.
+
+    Methods:
+        update(partial: str) -> VhStreamUpdate:
+            Processes the next partial hypothesis and returns a provisional result.
+
+        finish(text: str | None) -> VhStreamUpdate:
+            Processes the final transcript and resets the session.
+    """
+
+    def __init__(self, ner: VhNer) -> None:
+        """
+        Initializes a new instance of the VhNerStream class.
+
+        Args:
+            ner (VhNer): The NER instance to use. Its gazetteer is reused if enabled.
+        """
+        self.ner: VhNer = ner
+        self.gazetteer: VhGazetteer = ner.gazetteer or VhGazetteer.from_vocab(
+            itertools.chain(ner.FRACTION_MAPPING, ner.PRESET_MAPPING))
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forgets the previous hypothesis."""
+        self._text: str = ""
+        self._tokens: list[Tuple[str, int, int]] = []
+        self._steps: list[VhGazetteerStep] = []
+        self._last: Optional[VhStreamUpdate] = None
+
+    @staticmethod
+    def _common_prefix(
+        previous: list[Tuple[str, int, int]], current: list[Tuple[str, int, int]]
+    ) -> int:
+        """Returns the number of leading tokens with the same text in both token lists."""
+        length = 0
+        for (previous_token, _, _), (current_token, _, _) in zip(previous, current):
+            if previous_token != current_token:
+                break
+            length += 1
+        return length
+
+    def _reusable_steps(self, prefix_length: int) -> list[VhGazetteerStep]:
+        """
+        Returns the leading steps of the previous hypothesis that stay valid.
+
+        A step stays valid if it lies within the shared token prefix and could not be
+        extended by more tokens.
+
+        Args:
+            prefix_length (int): Number of shared leading tokens.
+
+        Returns:
+            list[VhGazetteerStep]: The valid steps.
+        """
+        reusable = []
+        for step in self._steps:
+            if step.end > prefix_length or step.is_open or step.kind == VhGazetteer.STEP_UNKNOWN:
+                break
+            reusable.append(step)
+        return reusable
+
+    def update(self, partial: str) -> VhStreamUpdate:
+        """
+        Processes the next partial hypothesis of the utterance.
+
+        Args:
+            partial (str): The partial transcript, usually an extension of the previous one.
+
+        Returns:
+            VhStreamUpdate: The provisional result.
+        """
+        if self._last is not None and partial == self._text:
+            return self._last._replace(reused_tokens=len(self._tokens))
+
+        tokens = self.gazetteer.tokenize(partial)
+        steps = self._reusable_steps(self._common_prefix(self._tokens, tokens))
+        reused_tokens = steps[-1].end if steps else 0
+        steps += self.gazetteer.scan(tokens, reused_tokens)
+
+        # An unknown last word may be the start of a phrase that is not finished yet
+        pending = bool(steps) and steps[-1].kind == VhGazetteer.STEP_UNKNOWN and steps[-1].is_open
+        match = self.gazetteer.build_match(tokens, steps[:-1] if pending else steps)
+        if match is not None:
+            numerical_values = (
+                self.ner._extract_numerical_values(partial)  # pylint: disable=W0212
+                if match.has_numbers else [])
+            result = self.ner._build_processed_text(  # pylint: disable=W0212
+                partial, match.named_entities, numerical_values, match.token_spans)
+        elif pending:
+            result = self.ner._build_processed_text(  # pylint: disable=W0212
+                partial, {}, [], ((start, end) for _, start, end in tokens))
+        else:
+            result = self.ner.process_text(partial)
+
+        self._text, self._tokens, self._steps = partial, tokens, steps
+        self._last = VhStreamUpdate(result, True, reused_tokens)
+        return self._last
+
+    def finish(self, text: Optional[str] = None) -> VhStreamUpdate:
+        """
+        Processes the final transcript with the full VhNer pipeline and resets the session.
+
+        Args:
+            text (str | None): The final transcript. Defaults to the last partial hypothesis.
+
+        Returns:
+            VhStreamUpdate: The final, non-provisional result.
+        """
+        final_text = self._text if text is None else text
+        self._reset()
+        return VhStreamUpdate(self.ner.process_text(final_text), False, 0)
@@ -0,0 +1,210 @@
+# pylint: disable=C0114
+import re
+from enum import Enum
+from typing import Optional, Tuple
+
+
+class VhNumericBackend(Enum):
+    """
+    Enum representing the available numerical value extraction backends.
+
+    Attributes:
+    - SPACY: Part-of-speech based extraction with the pretrained en_core_web_sm pipeline.
+    - RULES: Table driven extraction with VhNumericExtractor, no pretrained pipeline needed.
+    """
+
+    SPACY = "spacy"
+    RULES = "rules"
+
+
+class VhNumericExtractor:
+    """
+    A pure Python extractor of numerical values, compiled from unit, fraction and preset tables.
+
+    Recognizes digits ("20", "-5", "21.5", ".5", "1,000"), spelled-out numbers ("twenty five",
+    "a thousand and one"), percentages ("50%", "50 percent"), temperatures ("20 celsius",
+    "68°F", "300 kelvin"), fractions ("half", "three quarters") and presets ("eco", "comfort").
+
+    Methods:
+        extract(text: str) -> list[tuple[float, str]]:
+            Extracts numerical values and their units from the text, in the same format as
+            VhNer._extract_numerical_values.
+    """
+
+    # Unit words following a number: (multiplier, unit)
+    UNIT_MAPPING: dict[str, Tuple[float, str]] = {
+        "%": (0.01, ""),
+        "percent": (0.01, ""),
+        "pct": (0.01, ""),
+        "celsius": (1.0, "C"),
+        "centigrade": (1.0, "C"),
+        "°c": (1.0, "C"),
+        "fahrenheit": (1.0, "F"),
+        "°f": (1.0, "F"),
+        "kelvin": (1.0, "K"),
+        "°k": (1.0, "K"),
+    }
+
+    # Words that may stand between a number and its unit, e.g. "20 degrees celsius"
+    UNIT_PREFIXES = frozenset(["degree", "degrees", "°", "per"])
+
+    # Prefixes after which "c", "f" and "k" abbreviate a temperature unit, e.g. "20 degrees c"
+    DEGREE_WORDS = frozenset(["degree", "degrees", "°"])
+
+    UNITS = {
+        "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+        "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+        "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16,
+        "seventeen": 17, "eighteen": 18, "nineteen": 19,
+    }
+
+    TENS = {
+        "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+        "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+    }
+
+    SCALES = {"hundred": 100, "thousand": 1000}
+
+    # A number written with digits, with an optional sign and leading decimal point ("-5",
+    # ".5"). The sign must not follow a word or number, so "20-25" is not 20 and -25
+    _DIGITS = r"(?:(?<![\w.])[-+])?(?:\d+(?:[.,]\d+)*|\.\d+)"
+    _TOKEN_PATTERN = re.compile(_DIGITS + r"|°[cfk]?|[a-z]+|\S")
+    _DIGITS_PATTERN = re.compile(_DIGITS)
+
+    def __init__(
+        self, fraction_mapping: dict[str, float], preset_mapping: dict[str, float]
+    ) -> None:
+        """
+        Initializes a new instance of the VhNumericExtractor class.
+
+        Args:
+            fraction_mapping (dict[str, float]): Fraction words and their values, e.g. "half": 0.5.
+            preset_mapping (dict[str, float]): Preset words and their values, e.g. "eco": 0.3.
+        """
+        self.fraction_mapping: dict[str, float] = dict(fraction_mapping)
+        # Plural forms are used after a count, e.g. "three quarters"
+        self.fraction_mapping.update(
+            {f"{word}s": value for word, value in fraction_mapping.items()})
+        self.fraction_mapping["halves"] = self.fraction_mapping.get("half", 0.5)
+        self.preset_mapping: dict[str, float] = dict(preset_mapping)
+
+    def _parse_number(self, tokens: list[str], start: int) -> Tuple[Optional[float], int]:
+        """
+        Parses a number written with digits or words, starting at the given token.
+
+        Args:
+            tokens (list[str]): Lowercased tokens of the text.
+            start (int): Index of the first token.
+
+        Returns:
+            Tuple[Optional[float], int]: The number and the index after its last token,
+            or (None, start) if no number starts here.
+        """
+        token = tokens[start]
+        if self._DIGITS_PATTERN.fullmatch(token):
+            return float(token.replace(",", "")), start + 1
+
+        # Kind of the last number word: None, "unit", "tens" or "scale". A word is only
+        # part of the number if its magnitude composes with the previous one, so "twenty
+        # twenty" is two numbers and "five twenty" does not add up to 25
+        total, current, index, last = 0, 0, start, None
+        while index < len(tokens):
+            word = tokens[index]
+            following = tokens[index + 1] if index + 1 < len(tokens) else ""
+            if word in self.UNITS and (
+                    last is None
+                    or last == "tens" and 0 < self.UNITS[word] < 10
+                    or last == "scale" and self.UNITS[word] > 0):
+                current += self.UNITS[word]
+                last = "unit"
+            elif word in self.TENS and last in (None, "scale"):
+                current += self.TENS[word]
+                last = "tens"
+            elif (word == "hundred" and last in ("unit", "tens") and current < 100
+                  or word == "thousand" and last is not None and current and not total):
+                current *= self.SCALES[word]
+                if self.SCALES[word] >= 1000:
+                    total, current = current, 0
+                last = "scale"
+            elif word == "a" and last is None and following in self.SCALES:
+                current, last = 1, "unit"  # "a hundred", "a thousand and one"
+            elif (word == "-" and last == "tens"
+                  and 0 < self.UNITS.get(following, 0) < 10
+                  or word == "and" and last == "scale"
+                  and (self.UNITS.get(following, 0) > 0 or following in self.TENS)):
+                pass  # "twenty-five", "one hundred and five", not "two and three"
+            else:
+                break
+            index += 1
+
+        if last is None:
+            return None, start
+        return float(total + current), index
+
+    def _parse_unit(self, tokens: list[str], start: int) -> Tuple[float, str, int]:
+        """
+        Parses the unit following a number.
+
+        Args:
+            tokens (list[str]): Lowercased tokens of the text.
+            start (int): Index of the first token after the number.
+
+        Returns:
+            Tuple[float, str, int]: Value multiplier, unit and the index after the unit.
+            (1.0, "", start) if no unit follows.
+        """
+        index = start
+        while index < len(tokens) and tokens[index] in self.UNIT_PREFIXES:
+            index += 1
+        if index < len(tokens):
+            # "20 °c", "20 degrees c"
+            word = tokens[index]
+            if index > start and tokens[index - 1] in self.DEGREE_WORDS \
+                    and "°" + word in self.UNIT_MAPPING:
+                word = "°" + word
+            if tokens[index] == "cent" and index > start and tokens[index - 1] == "per":
+                word = "percent"
+            if word in self.UNIT_MAPPING:
+                multiplier, unit = self.UNIT_MAPPING[word]
+                return multiplier, unit, index + 1
+        return 1.0, "", start
+
+    def extract(self, text: str) -> list[tuple[float, str]]:
+        """
+        Extracts numerical values, fractions and presets from the given text.
+
+        Args:
+            text (str): The text to process.
+
+        Returns:
+            list: A list of tuples, each containing a numerical value and a unit (if any).
+
+        Example:
+            If the input text is "50% of the room is at 20 celsius and the other half is dark",
+            the method would return:
+                [(0.5, ""), (20.0, "C"), (0.5, ""), (0.2, "")]
+        """
+        tokens = self._TOKEN_PATTERN.findall(text.lower())
+        numerical_values: list[tuple[float, str]] = []
+        index = 0
+        while index < len(tokens):
+            number, index_after = self._parse_number(tokens, index)
+            if number is not None:
+                if index_after < len(tokens) and tokens[index_after] in self.fraction_mapping:
+                    # "three quarters", "one half"
+                    numerical_values.append(
+                        (number * self.fraction_mapping[tokens[index_after]], ""))
+                    index = index_after + 1
+                    continue
+                multiplier, unit, index = self._parse_unit(tokens, index_after)
+                numerical_values.append((number * multiplier, unit))
+                continue
+
+            token = tokens[index]
+            if token in self.fraction_mapping:
+                numerical_values.append((self.fraction_mapping[token], ""))
+            elif token in self.preset_mapping:
+                numerical_values.append((self.preset_mapping[token], ""))
+            index += 1
+
+        return numerical_values
@@ -0,0 +1,175 @@
+# pylint: disable=C0114
+import hashlib
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional
+import ner.config as cfg
+from ner.ner_cache import path_fingerprint
+
+
+class VhVocab(NamedTuple):
+    """
+    A NamedTuple holding the vocabulary compiled from the .voc files, see load_vocab.
+
+    Attributes:
+        hashes (Dict[str, str]): SHA-256 of every .voc file by path relative to the vocabulary.
+        labels (Dict[str, List[str]]): Entry names (file names without .voc) by vocabulary
+            directory, e.g. {"things": ["LIGHT", ...], "helpers": [...]}, sorted.
+        synonyms (Dict[str, List[str]]): Lowercase phrases (lines) by lowercase entry name.
+            As in the training data, an entry name used by several labels, e.g.
+            actions/LOCK.voc and things/LOCK.voc, keeps the phrases of the last label.
+        reverse (Dict[str, List[str]]): Lowercase entry names by phrase, in entry name order.
+            The first entry is the canonical entry of the phrase.
+
+    Methods:
+        canonical(phrase: str) -> str | None:
+            Returns the canonical entry of a phrase.
+
+        digest() -> str:
+            Returns one hash of the content of all .voc files.
+    """
+    hashes: Dict[str, str]
+    labels: Dict[str, List[str]]
+    synonyms: Dict[str, List[str]]
+    reverse: Dict[str, List[str]]
+
+    def canonical(self, phrase: str) -> Optional[str]:
+        """
+        Returns the canonical entry of a phrase.
+
+        Args:
+            phrase (str): The phrase, e.g. "switch on".
+
+        Returns:
+            str | None: The lowercase entry name, e.g. "turn_on", None for unknown phrases.
+        """
+        entries = self.reverse.get(phrase.lower())
+        return entries[0] if entries else None
+
+    def digest(self) -> str:
+        """
+        Returns one hash of the content of all .voc files, e.g. to record the vocabulary a
+        model was trained with.
+
+        Returns:
+            str: The hex SHA-256 of the file hashes.
+        """
+        return hashlib.sha256(json.dumps(self.hashes, sort_keys=True).encode()).hexdigest()
+
+
+# Version of the artifact layout, artifacts of another version are rebuilt
+VOCAB_ARTIFACT_VERSION = 1
+
+
+def compile_vocab(path: str = cfg.PATH_VOCAB) -> VhVocab:
+    """
+    Reads every .voc file of the vocabulary. A file holds one phrase per line.
+
+    Args:
+        path (str): The vocabulary directory, with one directory per label.
+
+    Returns:
+        VhVocab: The compiled vocabulary.
+    """
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"The directory {path} does not exist.")
+
+    hashes: Dict[str, str] = {}
+    labels: Dict[str, List[str]] = {}
+    synonyms: Dict[str, List[str]] = {}
+    for label in sorted(os.listdir(path)):
+        label_dir = os.path.join(path, label)
+        if not os.path.isdir(label_dir):
+            continue
+        labels[label] = []
+        for file_name in sorted(os.listdir(label_dir)):
+            if not file_name.endswith(".voc"):
+                continue
+            entry = os.path.splitext(file_name)[0]
+            labels[label].append(entry)
+            with open(os.path.join(label_dir, file_name), "rb") as file:
+                data = file.read()
+            hashes[f"{label}/{file_name}"] = hashlib.sha256(data).hexdigest()
+            synonyms[entry.lower()] = [
+                line.strip().lower() for line in data.decode("UTF-8").splitlines()]
+
+    reverse: Dict[str, List[str]] = {}
+    for entry, phrases in sorted(synonyms.items()):
+        for phrase in phrases:
+            if phrase and entry not in reverse.setdefault(phrase, []):
+                reverse[phrase].append(entry)
+    return VhVocab(hashes, labels, synonyms, reverse)
+
+
+def save_vocab(vocab: VhVocab, path: str, fingerprint: list) -> int:
+    """
+    Writes a vocabulary artifact. The file is replaced atomically, so a reader never sees a
+    partially written artifact.
+
+    Args:
+        vocab (VhVocab): The compiled vocabulary.
+        path (str): The artifact file path.
+        fingerprint (list): The path_fingerprint of the vocabulary directory it was
+            compiled from, validated by load_vocab.
+
+    Returns:
+        int: The size of the artifact in bytes.
+    """
+    data = json.dumps({
+        "version": VOCAB_ARTIFACT_VERSION,
+        "fingerprint": fingerprint,
+        **vocab._asdict(),
+    }, ensure_ascii=False, separators=(",", ":")).encode("UTF-8")
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+    os.replace(temporary_path, path)
+    return len(data)
+
+
+_LOADED: Dict[tuple, VhVocab] = {}
+
+
+def load_vocab(
+    path: str = cfg.PATH_VOCAB, artifact_path: Optional[str] = cfg.PATH_VOCAB_ARTIFACT
+) -> VhVocab:
+    """
+    Loads the vocabulary from its artifact in one read. The artifact is validated against
+    the size and modification time of the .voc files, which are not read, and rebuilt if
+    any of them changed or the artifact is missing. The vocabulary is loaded once per
+    process, later calls return the same instance.
+
+    Args:
+        path (str): The vocabulary directory.
+        artifact_path (str | None): The artifact file path. None compiles the vocabulary
+            without an artifact.
+
+    Returns:
+        VhVocab: The vocabulary.
+    """
+    key = (path, artifact_path)
+    vocab = _LOADED.get(key)
+    if vocab is not None:
+        return vocab
+
+    # As read back from JSON
+    fingerprint = [list(entry) for entry in path_fingerprint(path)]
+    if artifact_path is not None and os.path.exists(artifact_path):
+        try:
+            with open(artifact_path, "rb") as file:
+                artifact = json.loads(file.read())
+            if (artifact.get("version") == VOCAB_ARTIFACT_VERSION
+                    and artifact.get("fingerprint") == fingerprint):
+                vocab = VhVocab(**{field: artifact[field] for field in VhVocab._fields})
+        except (OSError, ValueError, KeyError, TypeError):
+            vocab = None
+
+    if vocab is None:
+        vocab = compile_vocab(path)
+        if artifact_path is not None:
+            try:
+                save_vocab(vocab, artifact_path, fingerprint)
+            except OSError as error:
+                print(f"Vocabulary artifact was not saved: {error}")
+    return _LOADED.setdefault(key, vocab)
+
@@ -0,0 +1,283 @@
+# pylint: disable=C0114
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Tuple, TypeVar
+import aiohttp
+from homeassistant_api import Client
+from homeassistant_api.errors import (
+    EndpointNotFoundError,
+    InternalServerError,
+    RequestError,
+    RequestTimeoutError,
+    UnauthorizedError,
+)
+from homeassistant_api.models import Group, State
+
+T = TypeVar("T")
+
+
+class HasAsyncClient:
+    """
+    An asyncio client of the Home Assistant REST API with a persistent connection pool.
+
+    All requests share one aiohttp session, whose connector keeps up to max_connections
+    keep-alive connections open, so consecutive requests skip the TCP (and TLS) handshake.
+    A semaphore bounds the number of requests in flight. The session lives on an event loop
+    running in a background thread: coroutines can be awaited from async code, and
+    synchronous code (the CLI path of the orchestrator and the skills) submits them with run()
+    or run_all(), which lets several service calls and state reads overlap instead of running
+    back to back. Coroutines on another event loop, e.g. the server's, await gather(), which
+    does not block their loop.
+
+    Errors are raised as the homeassistant_api errors of the synchronous Client, so skills
+    handle both the same way: timeouts and connection failures raise RequestTimeoutError.
+
+    Methods:
+        start() -> None:
+            Starts the background loop and opens the session.
+
+        get_state(entity_id: str) -> State:
+            Fetches the state of an entity.
+
+        get_states() -> Tuple[State, ...]:
+            Fetches the states of all entities.
+
+        get_entities(client: Client) -> Dict[str, Group]:
+            Fetches all entities grouped by domain.
+
+        trigger_service(domain: str, service: str, **service_data) -> Tuple[State, ...]:
+            Calls a service, returns the states changed by it.
+
+        submit(coroutine: Awaitable) -> concurrent.futures.Future:
+            Schedules a coroutine on the client loop from any thread.
+
+        run(coroutine: Awaitable) -> Any:
+            Runs a coroutine on the client loop and waits for its result.
+
+        run_all(coroutines: Iterable[Awaitable]) -> List[Any]:
+            Runs coroutines concurrently and waits for all results.
+
+        gather(coroutines: Iterable[Awaitable]) -> List[Any]:
+            Coroutine, runs coroutines concurrently and awaits all results from any loop.
+
+        close() -> None:
+            Closes the session and stops the background loop.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        token: str,
+        max_connections: int = 8,
+        max_concurrency: Optional[int] = None,
+        timeout: float = 10.0,
+    ) -> None:
+        """
+        Initializes a new instance of the HasAsyncClient class.
+
+        Args:
+            api_url (str): The REST API URL, e.g. "http://homeassistant.local:8123/api".
+            token (str): The long lived access token.
+            max_connections (int): Size of the keep-alive connection pool. Defaults to 8.
+            max_concurrency (int | None): Maximum number of requests in flight. Defaults to
+                max_connections.
+            timeout (float): Total timeout of a request, in seconds. Defaults to 10.
+        """
+        self.api_url: str = api_url.rstrip("/")
+        self.max_connections: int = max_connections
+        self.max_concurrency: int = max_concurrency or max_connections
+        self.timeout: float = timeout
+        self._headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def start(self) -> None:
+        """Starts the background loop and opens the session. Does nothing if started."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="HasAsyncClient", daemon=True)
+        self._thread.start()
+        self.run(self._open())
+
+    async def _open(self) -> None:
+        """Creates the session and the semaphore on the client loop."""
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self._headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def close(self) -> None:
+        """Closes the session and stops the background loop."""
+        if self._thread is None or self._loop is None:
+            return
+        if self._session is not None:
+            self.run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+        self._session = None
+
+    def submit(self, coroutine: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """
+        Schedules a coroutine on the client loop from any thread.
+
+        Args:
+            coroutine (Awaitable): The coroutine, e.g. client.get_state("light.kitchen").
+
+        Returns:
+            concurrent.futures.Future: The future of its result.
+        """
+        if self._loop is None:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)  # type: ignore
+
+    def run(self, coroutine: Awaitable[T]) -> T:
+        """
+        Runs a coroutine on the client loop and waits for its result.
+
+        Args:
+            coroutine (Awaitable): The coroutine.
+
+        Returns:
+            The result of the coroutine. Its exceptions are raised in the caller.
+        """
+        return self.submit(coroutine).result()
+
+    def run_all(self, coroutines: Iterable[Awaitable[Any]]) -> List[Any]:
+        """
+        Runs coroutines concurrently, bounded by max_concurrency, and waits for all of them.
+
+        Args:
+            coroutines (Iterable[Awaitable]): The coroutines.
+
+        Returns:
+            List[Any]: The results in order. A failed coroutine gives its exception instead
+            of a result, so one failure does not hide the others.
+        """
+        return self.run(self._gather(list(coroutines)))
+
+    async def gather(self, coroutines: Iterable[Awaitable[Any]]) -> List[Any]:
+        """
+        Runs coroutines concurrently on the client loop, bounded by max_concurrency, and
+        awaits all of them without blocking the event loop of the caller.
+
+        Args:
+            coroutines (Iterable[Awaitable]): The coroutines.
+
+        Returns:
+            List[Any]: The results in order, see run_all.
+        """
+        return await asyncio.wrap_future(self.submit(self._gather(list(coroutines))))
+
+    @staticmethod
+    async def _gather(pending: List[Awaitable[Any]]) -> List[Any]:
+        """Gathers coroutines on the client loop, exceptions are returned as results."""
+        return await asyncio.gather(*pending, return_exceptions=True)
+
+    async def request(self, method: str, path: str, json: Any = None) -> Any:
+        """
+        Sends a request to the REST API.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path below the API URL, e.g. "states/light.kitchen".
+            json (Any): The JSON body, if any.
+
+        Returns:
+            Any: The decoded JSON response.
+
+        Raises:
+            RuntimeError: If the client is not started.
+            RequestTimeoutError: On timeouts and connection failures.
+            UnauthorizedError, EndpointNotFoundError, InternalServerError, RequestError:
+                On error status codes.
+        """
+        if self._session is None or self._semaphore is None:
+            raise RuntimeError("HasAsyncClient is not started")
+        url = f"{self.api_url}/{path}"
+        async with self._semaphore:
+            try:
+                async with self._session.request(method, url, json=json) as response:
+                    if response.status in (200, 201):
+                        return await response.json(content_type=None)
+                    content = await response.text()
+            except asyncio.TimeoutError as error:
+                raise RequestTimeoutError(
+                    f"Home Assistant did not respond in time (timeout: {self.timeout} sec)"
+                ) from error
+            except aiohttp.ClientConnectionError as error:
+                raise RequestTimeoutError(f"No connection to Home Assistant: {error}") from error
+
+        if response.status == 401:
+            raise UnauthorizedError()
+        if response.status == 404:
+            raise EndpointNotFoundError(url)
+        if response.status >= 500:
+            raise InternalServerError(response.status, content)
+        raise RequestError(content)
+
+    async def get_state(self, entity_id: str) -> State:
+        """
+        Fetches the state of an entity.
+
+        Args:
+            entity_id (str): The entity_id, e.g. "light.kitchen".
+
+        Returns:
+            State: The current state.
+        """
+        return State.from_json(await self.request("GET", f"states/{entity_id}"))
+
+    async def get_states(self) -> Tuple[State, ...]:
+        """
+        Fetches the states of all entities.
+
+        Returns:
+            Tuple[State, ...]: The current states.
+        """
+        return tuple(State.from_json(state) for state in await self.request("GET", "states"))
+
+    async def get_entities(self, client: Client) -> Dict[str, Group]:
+        """
+        Fetches all entities grouped by domain, like Client.get_entities, over the
+        connection pool.
+
+        Args:
+            client (Client): The synchronous client the entities are bound to, used by the
+                methods of Group and Entity.
+
+        Returns:
+            Dict[str, Group]: The entity groups by domain, e.g. "light".
+        """
+        groups: Dict[str, Group] = {}
+        for state in await self.get_states():
+            domain, _, slug = state.entity_id.partition(".")
+            if domain not in groups:
+                groups[domain] = Group(group_id=domain, _client=client)
+            groups[domain]._add_entity(slug, state)  # pylint: disable=W0212
+        return groups
+
+    async def trigger_service(self, domain: str, service: str, **service_data) -> Tuple[State, ...]:
+        """
+        Calls a service, like Client.trigger_service.
+
+        Args:
+            domain (str): The service domain, e.g. "light".
+            service (str): The service, e.g. "turn_on".
+            **service_data: The service data, e.g. entity_id and brightness_pct.
+
+        Returns:
+            Tuple[State, ...]: The states changed by the service call.
+        """
+        changed: List[Dict[str, Any]] = await self.request(
+            "POST", f"services/{domain}/{service}", json=service_data)
+        return tuple(State.from_json(state) for state in changed)
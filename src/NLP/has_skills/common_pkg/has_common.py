@@ -1,5 +1,7 @@
 # pylint: disable=C0114
-from typing import List, Dict, Any, Callable
+import bisect
+from collections import Counter
+from typing import List, Dict, Any, Callable, NamedTuple, Optional
 from fuzzywuzzy import fuzz
 from homeassistant_api import Entity
 
@@ -80,3 +82,397 @@ class HasFind:
                 candidates.append({"entity": entity, "similarity": ratio})
 
         return candidates
+
+
+class HasServiceCall(NamedTuple):
+    """
+    A Home Assistant service call planned by a skill.
+
+    Attributes:
+        domain (str): The service domain, e.g. "light".
+        service (str): The service, e.g. "turn_on".
+        entity_ids (tuple[str, ...]): The target entities.
+        data (tuple[tuple[str, Any], ...]): The other service data as sorted (key, value) pairs,
+            so calls with the same data compare equal.
+    """
+    domain: str
+    service: str
+    entity_ids: tuple
+    data: tuple = ()
+
+    @classmethod
+    def create(cls, domain: str, service: str, entity_id: str, **data) -> "HasServiceCall":
+        """
+        Creates a call of a service for one entity.
+
+        Args:
+            domain (str): The service domain.
+            service (str): The service.
+            entity_id (str): The target entity.
+            **data: The other service data, e.g. brightness_pct.
+
+        Returns:
+            HasServiceCall: The call.
+        """
+        return cls(domain, service, (entity_id,), tuple(sorted(data.items())))
+
+    @classmethod
+    def batch(cls, calls: List["HasServiceCall"]) -> List["HasServiceCall"]:
+        """
+        Merges the calls of the same service with the same data into one call per service,
+        whose entity_id is the list of all their targets.
+
+        Args:
+            calls (List[HasServiceCall]): The planned calls.
+
+        Returns:
+            List[HasServiceCall]: The merged calls, in order of first appearance.
+        """
+        merged: Dict[tuple, list] = {}
+        for call in calls:
+            targets = merged.setdefault((call.domain, call.service, call.data), [])
+            targets.extend(entity_id for entity_id in call.entity_ids if entity_id not in targets)
+        return [cls(domain, service, tuple(entity_ids), data)
+                for (domain, service, data), entity_ids in merged.items()]
+
+    def service_data(self) -> Dict[str, Any]:
+        """
+        Returns the service data to send, with a single entity_id or a list of them.
+
+        Returns:
+            Dict[str, Any]: The service data, e.g. {"entity_id": ["light.a", "light.b"]}.
+        """
+        entity_id: Any = self.entity_ids[0] if len(self.entity_ids) == 1 else list(self.entity_ids)
+        return {"entity_id": entity_id, **dict(self.data)}
+
+
+class _IndexEntry(NamedTuple):
+    """An indexed entity with the search keys derived from its names."""
+    order: int
+    entity: Entity
+    names: tuple
+    tokens: tuple
+    grams: tuple
+
+
+class HasEntityIndex:
+    """
+    A prebuilt search index over entity ids (and optionally friendly names) that returns
+    the same candidates as HasFind.find_candidates without scoring every entity.
+
+    Every name is split into character tokens numbered by occurrence ("ll" gives l#1 and
+    l#2), so the size of a token set intersection is the multiset character overlap of two
+    names. fuzz.ratio can never exceed 200 * overlap / (len(a) + len(b)), which gives three
+    exact pruning steps before the real fuzz.ratio call:
+    - Length bound: posting lists are split by name length, and lengths that alone limit
+      the ratio to the threshold are never read.
+    - Trigram prefix filter: names are also split into character trigrams numbered by
+      occurrence. A name of a given length reaching the threshold must share a minimal
+      character overlap with the query, and every query character outside it breaks at most
+      3 query trigrams, every name character outside it at most 2. The remaining trigrams
+      are shared, so the name must contain one of the rarest query trigrams (all but
+      minimal shared trigrams - 1 of them). Only their posting lists are read, and with one
+      more trigram in the prefix, only names in two of them are kept.
+    - Token prefix filter: the same over character tokens, used where the trigram bound
+      is too weak (short names, low levels) or reads longer posting lists.
+    Top-k queries start with a strict similarity level, whose prefix holds only a few rare
+    trigrams, and relax it until k candidates are certain.
+
+    Methods:
+        add(key: str, entity: Entity) -> None:
+            Indexes an entity, replacing an entity indexed under the same key.
+
+        remove(key: str) -> None:
+            Removes an entity from the index.
+
+        entities() -> Dict[str, Entity]:
+            Returns the indexed entities by key.
+
+        find_candidates(query: str, top_k: int | None, **kwargs) -> List[Dict[str, Any]]:
+            Returns the entities similar to the query, like HasFind.find_candidates.
+    """
+
+    # Similarity levels probed by top-k queries before the threshold, strictest first
+    TOP_K_LEVELS = (95, 90, 80, 70)
+    GRAM_SIZE = 3
+    # Prefixes hold PREFIX_HITS - 1 more tokens than needed, and a name must then appear in
+    # PREFIX_HITS of their posting lists
+    PREFIX_HITS = 2
+
+    def __init__(
+        self,
+        entities: Optional[Dict[str, Entity]] = None,
+        use_friendly_names: bool = False,
+        threshold: int = CANDIDATES_ADD_THRESHOLD,
+    ) -> None:
+        """
+        Initializes a new instance of the HasEntityIndex class.
+
+        Args:
+            entities (Dict[str, Entity] | None): Entities to index, e.g. Group.entities.
+            use_friendly_names (bool): If True, the friendly name of an entity is indexed next
+                to its entity id and the similarity is the better of both. Defaults to False,
+                which scores entity ids only, like HasFind.find_candidates.
+            threshold (int): Similarity an entity must exceed to be a candidate. Defaults to
+                CANDIDATES_ADD_THRESHOLD.
+        """
+        self.use_friendly_names: bool = use_friendly_names
+        self.threshold: int = threshold
+        self._entries: Dict[str, _IndexEntry] = {}
+        # Character or trigram token -> name length -> keys of the entities with a name of
+        # that length
+        self._postings: Dict[tuple, Dict[int, set]] = {}
+        self._token_counts: Counter = Counter()
+        self._lengths: Counter = Counter()
+        self._sorted_lengths: List[int] = []
+        self._next_order: int = 0
+        for key, entity in (entities or {}).items():
+            self.add(key, entity)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entities(self) -> Dict[str, Entity]:
+        """
+        Returns the indexed entities by key, in the order they were first added.
+
+        Returns:
+            Dict[str, Entity]: The entities, e.g. to build another scorer over them.
+        """
+        return {key: entry.entity
+                for key, entry in sorted(self._entries.items(), key=lambda item: item[1].order)}
+
+    @staticmethod
+    def _tokenize(name: str, size: int = 1) -> tuple:
+        """Splits a name into (substring of the size, occurrence number) tokens."""
+        seen: Counter = Counter()
+        tokens = []
+        for start in range(len(name) - size + 1):
+            part = name[start:start + size]
+            seen[part] += 1
+            tokens.append((part, seen[part]))
+        return tuple(tokens)
+
+    def _names_of(self, entity: Entity) -> tuple:
+        """Returns the names of an entity that are scored against queries."""
+        names = [entity.entity_id]
+        if self.use_friendly_names:
+            friendly_name = entity.state.attributes.get("friendly_name")
+            if friendly_name and friendly_name != entity.entity_id:
+                names.append(friendly_name)
+        return tuple(names)
+
+    def add(self, key: str, entity: Entity) -> None:
+        """
+        Indexes an entity, replacing an entity indexed under the same key.
+
+        Args:
+            key (str): The key of the entity, as in Group.entities.
+            entity (Entity): The entity to index.
+        """
+        # A replaced entity keeps its position, like an updated dictionary item
+        previous = self._entries.get(key)
+        if previous is not None:
+            order = previous.order
+            self.remove(key)
+        else:
+            order = self._next_order
+            self._next_order += 1
+        names = self._names_of(entity)
+        tokens = tuple(self._tokenize(name) for name in names)
+        grams = tuple(self._tokenize(name, self.GRAM_SIZE) for name in names)
+        self._entries[key] = _IndexEntry(order, entity, names, tokens, grams)
+        for name, name_tokens, name_grams in zip(names, tokens, grams):
+            for token in name_tokens + name_grams:
+                self._postings.setdefault(token, {}).setdefault(len(name), set()).add(key)
+                self._token_counts[token] += 1
+            if self._lengths[len(name)] == 0:
+                bisect.insort(self._sorted_lengths, len(name))
+            self._lengths[len(name)] += 1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes an entity from the index. Does nothing for unknown keys.
+
+        Args:
+            key (str): The key of the entity.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for name, name_tokens, name_grams in zip(entry.names, entry.tokens, entry.grams):
+            for token in name_tokens + name_grams:
+                by_length = self._postings[token]
+                by_length[len(name)].discard(key)
+                if not by_length[len(name)]:
+                    del by_length[len(name)]
+                if not by_length:
+                    del self._postings[token]
+                self._token_counts[token] -= 1
+                if not self._token_counts[token]:
+                    del self._token_counts[token]
+            self._lengths[len(name)] -= 1
+            if self._lengths[len(name)] == 0:
+                del self._lengths[len(name)]
+                self._sorted_lengths.remove(len(name))
+
+    @staticmethod
+    def _score_bound(overlap: int, total_length: int) -> int:
+        """Returns the highest fuzz.ratio two names with the given overlap can reach."""
+        return int(round(200 * overlap / total_length)) if total_length else 0
+
+    def _min_overlap(self, query_length: int, length: int, level: int) -> Optional[int]:
+        """
+        Returns the smallest character overlap with which a name of the given length could
+        exceed the similarity level, or None if its length alone prevents it.
+        """
+        shared = min(query_length, length)
+        if self._score_bound(shared, query_length + length) <= level:
+            return None
+        for overlap in range(1, shared + 1):
+            if self._score_bound(overlap, query_length + length) > level:
+                return overlap
+        return shared
+
+    def _min_shared_grams(self, query_length: int, length: int, min_overlap: int) -> int:
+        """
+        Returns the smallest number of trigrams a name of the given length shares with the
+        query if their character overlap is at least min_overlap, 0 if none are certain.
+        """
+        size = self.GRAM_SIZE
+        return max(
+            0,
+            query_length - size + 1 - size * (query_length - min_overlap)
+            - (size - 1) * (length - min_overlap),
+            length - size + 1 - size * (length - min_overlap)
+            - (size - 1) * (query_length - min_overlap),
+        )
+
+    def _ranked(self, query_tokens: tuple) -> List[tuple]:
+        """
+        Returns the indexed query tokens, rarest first. Unknown tokens have no postings and
+        are never shared, so a prefix of the result with all but min_shared - 1 of them
+        holds a token of every name sharing min_shared of the query tokens.
+        """
+        return sorted(
+            (token for token in query_tokens if token in self._postings),
+            key=self._token_counts.__getitem__)
+
+    def _shortlist(self, query: str, level: int) -> set:
+        """
+        Returns the keys of the entities that pass the length and the trigram or token
+        prefix filters.
+        """
+        tokens = self._ranked(self._tokenize(query))
+        grams = self._ranked(self._tokenize(query, self.GRAM_SIZE))
+        keys: set = set()
+        for length in self._sorted_lengths:
+            min_overlap = self._min_overlap(len(query), length, level)
+            if min_overlap is None:
+                continue
+            hits, postings = self._prefix(tokens, min_overlap, length)
+            min_shared = self._min_shared_grams(len(query), length, min_overlap)
+            if min_shared:
+                gram_hits, gram_postings = self._prefix(grams, min_shared, length)
+                # Read the shorter of both prefixes
+                if sum(map(len, gram_postings)) < sum(map(len, postings)):
+                    hits, postings = gram_hits, gram_postings
+            if hits == 1:
+                for posting in postings:
+                    keys.update(posting)
+                continue
+            counts: Counter = Counter()
+            for posting in postings:
+                counts.update(posting)
+            keys.update(key for key, count in counts.items() if count >= hits)
+        return keys
+
+    def _prefix(self, ranked: List[tuple], min_shared: int, length: int) -> tuple:
+        """
+        Returns the posting lists of the rarest tokens for names of the given length and
+        the number of them a name sharing min_shared tokens with the query appears in.
+        """
+        hits = min(self.PREFIX_HITS, min_shared)
+        postings = [
+            self._postings[token].get(length, ())
+            for token in ranked[:max(len(ranked) - min_shared + hits, 0)]]
+        return hits, postings
+
+    def _bound(self, query: str, query_token_set: set, entry: _IndexEntry) -> int:
+        """Returns the upper bound of the similarity of the query to an indexed entity."""
+        bound = 0
+        for name_tokens in entry.tokens:
+            total_length = len(query) + len(name_tokens)
+            # Length bound first, it is cheaper than the overlap
+            if self._score_bound(min(len(query), len(name_tokens)), total_length) <= bound:
+                continue
+            bound = max(bound, self._score_bound(
+                len(query_token_set.intersection(name_tokens)), total_length))
+        return bound
+
+    def find_candidates(
+        self, query: str, top_k: Optional[int] = None, **kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for entities that match the given query and optional filters.
+
+        Top-k queries probe the index at the similarity levels of TOP_K_LEVELS first and
+        stop as soon as the k-th best similarity exceeds the level, since no entity outside
+        the shortlist of a level can reach it.
+
+        Args:
+            query (str): The query string to match entities against.
+            top_k (int | None): If set, only the top_k most similar entities are returned,
+                best first. Defaults to None, which returns all candidates in the order
+                HasFind.find_candidates would return them.
+            **kwargs: Filters to apply, see HasFind.filters.
+
+        Returns:
+            List[Dict[str, Any]]: List of dictionaries representing the matching entities and their
+                                  similarity to the query.
+        """
+        if not query or top_k == 0:
+            return []
+        query_token_set = set(self._tokenize(query))
+
+        levels = [level for level in self.TOP_K_LEVELS if level > self.threshold] if top_k else []
+        levels.append(self.threshold)
+
+        seen: set = set()
+        pending: list = []
+        candidates: list = []
+        for level in levels:
+            for key in self._shortlist(query, level) - seen:
+                seen.add(key)
+                entry = self._entries[key]
+                bound = self._bound(query, query_token_set, entry)
+                if bound > self.threshold:
+                    pending.append((bound, entry))
+
+            # Score the entities that may exceed this level, keep the others for later
+            remaining = []
+            for bound, entry in pending:
+                if bound <= level:
+                    remaining.append((bound, entry))
+                    continue
+                if not all(
+                    HasFind.filters[key](entry.entity, value) # type: ignore
+                    for key, value in kwargs.items()
+                    if key in HasFind.filters
+                ):
+                    continue
+                ratio = max(fuzz.ratio(query, name) for name in entry.names)
+                if ratio > self.threshold:
+                    candidates.append((ratio, entry.order, entry.entity))
+            pending = remaining
+
+            if top_k is not None:
+                candidates.sort(key=lambda item: (-item[0], item[1]))
+                if len(candidates) >= top_k and candidates[top_k - 1][0] > level:
+                    break
+
+        if top_k is None:
+            candidates.sort(key=lambda item: item[1])
+        else:
+            candidates = candidates[:top_k]
+        return [{"entity": entity, "similarity": ratio} for ratio, _, entity in candidates]
@@ -0,0 +1,166 @@
+# pylint: disable=C0114
+from enum import Enum
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+
+class HasServiceTemplate(NamedTuple):
+    """
+    The service call a handler issues, see has_handles.
+
+    Attributes:
+        service (str): The service of the skill domain, e.g. "turn_on".
+        field (str | None): The service data field set by the handler, e.g. "brightness_pct".
+        value (float | None): The value of the field as a fraction, e.g. 0.25 for 25%.
+            None takes the value from the request.
+    """
+    service: str
+    field: Optional[str] = None
+    value: Optional[float] = None
+
+
+class HasDispatchRule(NamedTuple):
+    """
+    A request handled by a skill method.
+
+    Attributes:
+        action (str): The action name, lowercase.
+        attribute (str | None): The attribute name, lowercase. None matches any attribute.
+        state (str | None): The state name, lowercase. None matches any state.
+        handler (Callable): The skill method.
+        template (HasServiceTemplate | None): The service call of the handler, None for
+            queries.
+    """
+    action: str
+    attribute: Optional[str]
+    state: Optional[str]
+    handler: Callable
+    template: Optional[HasServiceTemplate]
+
+
+def _name(member: Optional[Enum]) -> Optional[str]:
+    """Returns the lowercase name of an enum member, as produced by the NER."""
+    return member.name.lower() if member is not None else None
+
+
+def has_handles(
+    action: Enum,
+    attribute: Optional[Enum] = None,
+    state: Optional[Enum] = None,
+    service: Optional[str] = None,
+    field: Optional[str] = None,
+    value: Optional[float] = None,
+) -> Callable[[Callable], Callable]:
+    """
+    Decorator that declares a request handled by a skill method. A method may handle
+    several requests. The rules of a class are compiled into its HasDispatchTable when the
+    class is created.
+
+    Args:
+        action (Enum): The action, e.g. Actions.TURN_ON.
+        attribute (Enum | None): The attribute, e.g. Attributes.BRIGHTNESS. None matches any.
+        state (Enum | None): The state, e.g. States.POWERED. None matches any.
+        service (str | None): The service the handler calls, None for queries.
+        field (str | None): The service data field set by the handler.
+        value (float | None): The fixed value of the field, None takes it from the request.
+
+    Returns:
+        Callable[[Callable], Callable]: The decorator, it returns the method unchanged.
+    """
+    template = HasServiceTemplate(service, field, value) if service else None
+    rule = (_name(action), _name(attribute), _name(state), template)
+
+    def decorator(method: Callable) -> Callable:
+        method.__dict__.setdefault("has_rules", []).append(rule)
+        return method
+
+    return decorator
+
+
+class HasDispatchTable:
+    """
+    Maps the (action, attribute, state) of a request to the method handling it, with the
+    names normalized once when the table is built.
+
+    A request is looked up with its attribute and state, then with each of them replaced
+    by the wildcard, so the cost does not depend on the number of rules and a rule
+    restricting the attribute or state wins over a wildcard rule.
+
+    Methods:
+        from_class(skill_class: type) -> HasDispatchTable:
+            Compiles the has_handles rules of a class and its bases.
+
+        find(action: str | None, attribute: str | None, state: str | None) -> HasDispatchRule | None:
+            Returns the rule of a request.
+
+        actions_and_attributes() -> Tuple[Tuple[str, str | None], ...]:
+            Returns the distinct (action, attribute) pairs of the rules.
+    """
+
+    def __init__(self, rules: Iterable[HasDispatchRule]) -> None:
+        """
+        Initializes a new instance of the HasDispatchTable class.
+
+        Args:
+            rules (Iterable[HasDispatchRule]): The rules, the first rule of a key wins.
+        """
+        self.rules: Dict[Tuple[str, Optional[str], Optional[str]], HasDispatchRule] = {}
+        for rule in rules:
+            self.rules.setdefault((rule.action, rule.attribute, rule.state), rule)
+
+    @classmethod
+    def from_class(cls, skill_class: type) -> "HasDispatchTable":
+        """
+        Compiles the has_handles rules of a class and its bases. A method overridden in a
+        subclass keeps the rules of the base method unless it declares its own.
+
+        Args:
+            skill_class (type): The skill class.
+
+        Returns:
+            HasDispatchTable: The table.
+        """
+        rules = []
+        seen = set()
+        for klass in skill_class.__mro__:
+            for name, method in vars(klass).items():
+                if name in seen or not hasattr(method, "has_rules"):
+                    continue
+                seen.add(name)
+                handler = getattr(skill_class, name)
+                rules.extend(HasDispatchRule(action, attribute, state, handler, template)
+                             for action, attribute, state, template in method.has_rules)
+        return cls(rules)
+
+    def find(
+        self, action: Optional[str], attribute: Optional[str], state: Optional[str]
+    ) -> Optional[HasDispatchRule]:
+        """
+        Returns the rule of a request.
+
+        Args:
+            action (str | None): The action name, lowercase.
+            attribute (str | None): The attribute name, lowercase.
+            state (str | None): The state name, lowercase.
+
+        Returns:
+            HasDispatchRule | None: The most specific matching rule, None if the skill does
+            not handle the request.
+        """
+        rules = self.rules
+        return (rules.get((action, attribute, state))
+                or rules.get((action, attribute, None))
+                or rules.get((action, None, state))
+                or rules.get((action, None, None)))
+
+    def actions_and_attributes(self) -> Tuple[Tuple[str, Optional[str]], ...]:
+        """
+        Returns the distinct (action, attribute) pairs of the rules, e.g. to declare the
+        routes of the skill.
+
+        Returns:
+            Tuple[Tuple[str, str | None], ...]: The pairs, in rule order.
+        """
+        return tuple(dict.fromkeys((action, attribute) for action, attribute, _ in self.rules))
+
+    def __len__(self) -> int:
+        return len(self.rules)
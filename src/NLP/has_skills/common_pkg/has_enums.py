@@ -1,30 +1,26 @@
 # pylint: disable=C0114
-import os
 from enum import Enum
-import ner.config as cfg
+from ner.vh_vocab import VhVocab, load_vocab
 
 
-def generate_enum_from_files(directory: str, enum_name: str) -> Enum:
+def generate_enum_from_vocab(vocab: VhVocab, directory: str, enum_name: str) -> Enum:
     """
-    Generate a Python Enum class from the files in the specified directory.
+    Generate a Python Enum class from the .voc files of a vocabulary directory.
 
     Args:
-        directory (str): The path to the directory containing the files.
+        vocab (VhVocab): The compiled vocabulary, see vh_vocab.load_vocab.
+        directory (str): The name of the vocabulary directory, e.g. "things".
         enum_name (str): The desired name for the Enum class.
 
     Returns:
         Enum: An Enum class with keys derived from the file names in the directory.
     """
-    # Check if path is valid
-    if not os.path.exists(directory):
-        raise FileNotFoundError(f"The directory {directory} does not exist.")
+    # Check if directory is in the vocabulary
+    if directory not in vocab.labels:
+        raise FileNotFoundError(f"The vocabulary directory {directory} does not exist.")
 
-    # Get the list of files in the directory
-    files = os.listdir(directory)
-
-    # Remove file extensions (assuming they are .voc files)
-    names = [os.path.splitext(file)[0]
-             for file in files if file.endswith(".voc")]
+    # File names without the .voc extension
+    names = vocab.labels[directory]
 
     # Check if voc files are present
     if not names:
@@ -39,16 +35,11 @@ def generate_enum_from_files(directory: str, enum_name: str) -> Enum:
     return Enum(enum_name, {name.upper(): name for name in names})
 
 
-# Generate Enums based on files in the respective directories
-Things = generate_enum_from_files(
-    os.path.join(cfg.PATH_VOCAB, "things"), "Things")
-Actions = generate_enum_from_files(
-    os.path.join(cfg.PATH_VOCAB, "actions"), "Actions")
-Attributes = generate_enum_from_files(
-    os.path.join(cfg.PATH_VOCAB, "attributes"), "Attributes"
-)
-Locations = generate_enum_from_files(
-    os.path.join(cfg.PATH_VOCAB, "location"), "Locations"
-)
-States = generate_enum_from_files(
-    os.path.join(cfg.PATH_VOCAB, "states"), "States")
+# Generate Enums based on files in the respective directories, read from the compiled
+# vocabulary artifact instead of scanning the directories
+_VOCAB = load_vocab()
+Things = generate_enum_from_vocab(_VOCAB, "things", "Things")
+Actions = generate_enum_from_vocab(_VOCAB, "actions", "Actions")
+Attributes = generate_enum_from_vocab(_VOCAB, "attributes", "Attributes")
+Locations = generate_enum_from_vocab(_VOCAB, "location", "Locations")
+States = generate_enum_from_vocab(_VOCAB, "states", "States")
@@ -0,0 +1,321 @@
+# pylint: disable=C0114
+import re
+import threading
+from enum import Enum
+from typing import List, Dict, Any, Optional, Tuple
+from homeassistant_api import Entity
+from .has_common import HasEntityIndex
+from .has_enums import Locations
+from .has_vector_find import HasVectorFind
+
+
+class HasEntityRegistry:
+    """
+    A registry of Home Assistant entities partitioned by domain and by location.
+
+    The location of an entity is the longest Locations name found as a word sequence in its
+    object id or friendly name ("light.upper_bathroom_mirror" is in UPPER_BATHROOM, not in
+    BATHROOM). Every domain and every (domain, location) pair has its own HasEntityIndex,
+    so a request naming a location scores the entities of that location first, and the
+    whole domain only if none of them matches. Adding or
+    removing an entity only updates the partitions it belongs to. All methods are thread
+    safe, so the registry can be updated from the HasStateMirror thread. Every change bumps
+    `version`, so results derived from the registry can be invalidated.
+
+    Entities are scored with fuzz.ratio by default. With scorer="vector" a partition is
+    scored with a HasVectorFind instead, built from its index on the first search and
+    rebuilt after the partition changed, with the threshold of HasVectorFind. It is built
+    outside the lock, so the registry can be updated meanwhile.
+
+    Methods:
+        add(entity: Entity) -> None:
+            Adds or replaces an entity.
+
+        remove(entity_id: str) -> None:
+            Removes an entity.
+
+        location_of(location: str | Enum | None) -> Enum | None:
+            Maps a NER location name to a Locations member.
+
+        partition_sizes() -> Dict[Tuple[str, str | None], int]:
+            Returns the number of entities of every partition.
+
+        find_candidates(query: str, domain: str, location: str | Enum | None, top_k: int | None,
+                        **kwargs) -> List[Dict[str, Any]]:
+            Returns the entities of a domain, and of a location if given, similar to the query.
+    """
+
+    # Locations with their names split in words, longest first so that the most specific
+    # location wins
+    _LOCATION_WORDS: List[Tuple[Enum, Tuple[str, ...]]] = sorted(
+        ((location, tuple(location.value.lower().split("_"))) for location in Locations),
+        key=lambda item: -len(item[1]))
+
+    _WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+    SCORERS = ("fuzz", "vector")
+
+    def __init__(self, groups: Optional[Dict[str, Any]] = None, scorer: str = "fuzz") -> None:
+        """
+        Initializes a new instance of the HasEntityRegistry class.
+
+        Args:
+            groups (Dict[str, Group] | None): Entity groups by domain, as returned by
+                Client.get_entities.
+            scorer (str): The similarity of find_candidates, one of SCORERS. Defaults to
+                "fuzz", the fuzz.ratio of HasEntityIndex.
+        """
+        self._lock = threading.RLock()
+        self.scorer = scorer
+        # HasVectorFind by partition, dropped when the partition changes
+        self._vector_finds: Dict[Any, HasVectorFind] = {}
+        self._entities: Dict[str, Entity] = {}
+        self._locations: Dict[str, Optional[Enum]] = {}
+        self._domains: Dict[str, HasEntityIndex] = {}
+        self._partitions: Dict[Tuple[str, Enum], HasEntityIndex] = {}
+        self._version = 0
+        for group in (groups or {}).values():
+            for entity in group.entities.values():
+                self.add(entity)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._entities
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The lock can not be pickled, see HasRegistrySnapshot
+        state = self.__dict__.copy()
+        del state["_lock"]
+        # Rebuilt on the first search
+        state["_vector_finds"] = {}
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__dict__.setdefault("_version", 0)
+        self.__dict__.setdefault("_scorer", "fuzz")
+        self.__dict__.setdefault("_vector_finds", {})
+        self._lock = threading.RLock()
+
+    @property
+    def scorer(self) -> str:
+        """
+        Returns the similarity used by find_candidates.
+
+        Returns:
+            str: One of SCORERS.
+        """
+        return self._scorer
+
+    @scorer.setter
+    def scorer(self, scorer: str) -> None:
+        if scorer not in self.SCORERS:
+            raise ValueError(f"Unknown scorer '{scorer}', expected one of {self.SCORERS}.")
+        self._scorer = scorer
+
+    @property
+    def version(self) -> int:
+        """
+        Returns the number of changes made to the registry, e.g. to invalidate a cache of
+        resolved entities.
+
+        Returns:
+            int: Increases with every add and with every remove of a known entity.
+        """
+        return self._version
+
+    def locked(self) -> threading.RLock:
+        """
+        Returns the lock of the registry, to keep it unchanged during a longer operation.
+
+        Returns:
+            threading.RLock: The lock, to use in a with statement.
+        """
+        return self._lock
+
+    @classmethod
+    def locate(cls, entity: Entity) -> Optional[Enum]:
+        """
+        Finds the location of an entity from its object id and friendly name.
+
+        Args:
+            entity (Entity): The entity.
+
+        Returns:
+            Enum | None: The Locations member, or None if no location is named.
+        """
+        names = [entity.entity_id.split(".", 1)[-1]]
+        friendly_name = entity.state.attributes.get("friendly_name")
+        if friendly_name:
+            names.append(friendly_name)
+        for name in names:
+            words = cls._WORD_PATTERN.findall(name.lower())
+            for location, location_words in cls._LOCATION_WORDS:
+                size = len(location_words)
+                if any(tuple(words[start:start + size]) == location_words
+                       for start in range(len(words) - size + 1)):
+                    return location
+        return None
+
+    @staticmethod
+    def location_of(location: Any) -> Optional[Enum]:
+        """
+        Maps a location name, as recognized by the NER, to a Locations member.
+
+        Args:
+            location (str | Enum | None): A location name ("kitchen", "living_room") or member.
+
+        Returns:
+            Enum | None: The Locations member, or None if the name is not a known location.
+        """
+        if location is None or isinstance(location, Locations):
+            return location
+        return Locations.__members__.get(str(location).replace(" ", "_").upper())
+
+    def add(self, entity: Entity) -> None:
+        """
+        Adds an entity, replacing an entity with the same entity_id.
+
+        Args:
+            entity (Entity): The entity to add.
+        """
+        entity_id = entity.entity_id
+        domain = entity_id.split(".", 1)[0]
+        location = self.locate(entity)
+        with self._lock:
+            if entity_id in self._entities and self._locations[entity_id] != location:
+                self.remove(entity_id)
+
+            self._entities[entity_id] = entity
+            self._locations[entity_id] = location
+            self._version += 1
+            self._vector_finds.pop(domain, None)
+            self._vector_finds.pop((domain, location), None)
+            self._domains.setdefault(domain, HasEntityIndex()).add(entity_id, entity)
+            if location is not None:
+                self._partitions.setdefault(
+                    (domain, location), HasEntityIndex()).add(entity_id, entity)
+
+    def remove(self, entity_id: str) -> None:
+        """
+        Removes an entity. Does nothing for unknown entity ids.
+
+        Args:
+            entity_id (str): The entity_id of the entity.
+        """
+        with self._lock:
+            if self._entities.pop(entity_id, None) is None:
+                return
+            self._version += 1
+            domain = entity_id.split(".", 1)[0]
+            location = self._locations.pop(entity_id)
+            self._vector_finds.pop(domain, None)
+            self._vector_finds.pop((domain, location), None)
+            self._remove_from(self._domains, domain, entity_id)
+            if location is not None:
+                self._remove_from(self._partitions, (domain, location), entity_id)
+
+    @staticmethod
+    def _remove_from(indexes: dict, partition: Any, entity_id: str) -> None:
+        """Removes an entity from the index of a partition, and drops the index if it is empty."""
+        index = indexes.get(partition)
+        if index is None:
+            return
+        index.remove(entity_id)
+        if not len(index):
+            del indexes[partition]
+
+    def partition_sizes(self) -> Dict[Tuple[str, Optional[str]], int]:
+        """
+        Returns the number of entities of every partition.
+
+        Returns:
+            Dict[Tuple[str, str | None], int]: Sizes by (domain, location name), the whole
+            domain has location None.
+        """
+        with self._lock:
+            sizes: Dict[Tuple[str, Optional[str]], int] = {
+                (domain, None): len(index) for domain, index in self._domains.items()}
+            sizes.update({
+                (domain, location.value): len(index)
+                for (domain, location), index in self._partitions.items()})
+        return sizes
+
+    def find_candidates(
+        self,
+        query: str,
+        domain: str,
+        location: Any = None,
+        top_k: Optional[int] = None,
+        **kwargs,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for entities of a domain that match the given query.
+
+        If a known location is given and the domain has entities in it, only those are
+        scored. Otherwise, or if none of them exceeds the threshold, all entities of the
+        domain are: the location of an entity is only known from its name, so an entity
+        whose name does not name its location is still found. Similarities are those of the
+        scorer of the registry.
+
+        Args:
+            query (str): The query string to match entities against.
+            domain (str): The domain to search, e.g. "light".
+            location (str | Enum | None): The location named by the request, see location_of.
+            top_k (int | None): Maximum number of candidates, see HasEntityIndex.find_candidates.
+            **kwargs: Filters to apply, see HasFind.filters.
+
+        Returns:
+            List[Dict[str, Any]]: List of dictionaries representing the matching entities and their
+                                  similarity to the query.
+        """
+        location = self.location_of(location)
+        partitions: List[Any] = [(domain, location)] if location is not None else []
+        partitions.append(domain)
+        for partition in partitions:
+            with self._lock:
+                index = (self._partitions.get(partition) if isinstance(partition, tuple)
+                         else self._domains.get(partition))
+                if index is None:
+                    continue
+                if self._scorer != "vector":
+                    candidates = index.find_candidates(query, top_k, **kwargs)
+                else:
+                    vector_find = self._vector_finds.get(partition)
+                    if vector_find is None:
+                        version = self._version
+                        entities = index.entities()
+                        use_friendly_names = index.use_friendly_names
+            if self._scorer == "vector":
+                if vector_find is None:
+                    vector_find = self._build_vector_find(
+                        partition, version, entities, use_friendly_names)
+                candidates = vector_find.find_candidates(query, top_k, **kwargs)
+            if candidates:
+                return candidates
+        return []
+
+    def _build_vector_find(
+        self, partition: Any, version: int, entities: Dict[str, Entity], use_friendly_names: bool
+    ) -> HasVectorFind:
+        """
+        Builds the HasVectorFind of a partition outside the lock, as building the TF-IDF
+        matrix of a large partition blocks the registry, and keeps it for later searches
+        unless the registry changed meanwhile.
+
+        Args:
+            partition (str | Tuple[str, Enum]): The domain or (domain, location) partition.
+            version (int): The version of the registry the entities were read at.
+            entities (Dict[str, Entity]): A copy of the entities of the partition.
+            use_friendly_names (bool): See HasVectorFind.
+
+        Returns:
+            HasVectorFind: The scorer of the partition.
+        """
+        vector_find = HasVectorFind(entities, use_friendly_names=use_friendly_names)
+        with self._lock:
+            if self._version == version:
+                self._vector_finds[partition] = vector_find
+        return vector_find
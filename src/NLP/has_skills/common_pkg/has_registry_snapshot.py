@@ -0,0 +1,161 @@
+# pylint: disable=C0114
+import gc
+import io
+import os
+import pickle
+from typing import Any, Dict, Optional, Tuple
+from homeassistant_api import Client, Entity
+from homeassistant_api.models import Group
+from .has_registry import HasEntityRegistry
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """Pickles entities as references to their entity_id."""
+
+    def persistent_id(self, obj: Any) -> Optional[str]:  # pylint: disable=R1710
+        if isinstance(obj, Entity):
+            return obj.entity_id
+        return None
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Resolves entity_id references to the entities of the restored groups."""
+
+    def __init__(self, file: io.BytesIO, groups: Dict[str, Group]) -> None:
+        super().__init__(file)
+        self.groups = groups
+
+    def persistent_load(self, pid: str) -> Entity:
+        domain, _, slug = pid.partition(".")
+        return self.groups[domain].entities[slug]
+
+
+class HasRegistrySnapshot:
+    """
+    Serializes the Home Assistant entity groups and the HasEntityRegistry, with its prebuilt
+    search indexes, so the orchestrator can start without downloading all states.
+
+    A snapshot holds two consecutive pickles: a header with the version and the State of
+    every entity, followed by the registry with every entity replaced by its entity_id.
+    Loading restores the groups from the header first and then resolves the references of
+    the registry to the restored entities, so the search indexes are not rebuilt. The
+    snapshot may be stale: the state mirror resyncs the groups and the registry once it
+    connects.
+
+    Methods:
+        to_bytes(groups: Dict[str, Group], registry: HasEntityRegistry) -> bytes:
+            Serializes the groups and the registry.
+
+        from_bytes(data: bytes, client: Client) -> Tuple[Dict[str, Group], HasEntityRegistry] | None:
+            Restores the groups and the registry, None if the snapshot is not usable.
+
+        save(path: str, groups: Dict[str, Group], registry: HasEntityRegistry) -> int:
+            Writes a snapshot file atomically.
+
+        load(path: str, client: Client) -> Tuple[Dict[str, Group], HasEntityRegistry] | None:
+            Reads a snapshot file.
+    """
+
+    SNAPSHOT_VERSION = 1
+
+    @staticmethod
+    def to_bytes(groups: Dict[str, Group], registry: HasEntityRegistry) -> bytes:
+        """
+        Serializes the groups and the registry.
+
+        Args:
+            groups (Dict[str, Group]): Entity groups by domain.
+            registry (HasEntityRegistry): The registry of the entities of the groups.
+
+        Returns:
+            bytes: The snapshot.
+        """
+        file = io.BytesIO()
+        pickler = _SnapshotPickler(file, protocol=pickle.HIGHEST_PROTOCOL)
+        # The state mirror changes the groups under the same lock
+        with registry.locked():
+            states = [
+                entity.state for group in groups.values() for entity in group.entities.values()]
+            pickler.dump({"version": HasRegistrySnapshot.SNAPSHOT_VERSION, "states": states})
+            pickler.dump(registry)
+        return file.getvalue()
+
+    @staticmethod
+    def from_bytes(
+        data: bytes, client: Client
+    ) -> Optional[Tuple[Dict[str, Group], HasEntityRegistry]]:
+        """
+        Restores the groups and the registry.
+
+        Args:
+            data (bytes): The snapshot.
+            client (Client): The client of the restored groups, used by Entity.get_state.
+
+        Returns:
+            Tuple[Dict[str, Group], HasEntityRegistry] | None: The groups and the registry,
+            None if the snapshot has another version, is damaged or refers to a module
+            that no longer exists.
+        """
+        groups: Dict[str, Group] = {}
+        unpickler = _SnapshotUnpickler(io.BytesIO(data), groups)
+        # Garbage collections triggered by the many new objects would find nothing to free
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            header = unpickler.load()
+            if header.get("version") != HasRegistrySnapshot.SNAPSHOT_VERSION:
+                return None
+            for state in header["states"]:
+                domain, _, slug = state.entity_id.partition(".")
+                if domain not in groups:
+                    groups[domain] = Group(group_id=domain, _client=client)
+                groups[domain]._add_entity(slug, state)  # pylint: disable=W0212
+            registry = unpickler.load()
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError,
+                ValueError, TypeError):
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if not isinstance(registry, HasEntityRegistry):
+            return None
+        return groups, registry
+
+    @staticmethod
+    def save(path: str, groups: Dict[str, Group], registry: HasEntityRegistry) -> int:
+        """
+        Writes a snapshot file. The file is replaced atomically, so a reader never sees a
+        partially written snapshot.
+
+        Args:
+            path (str): The snapshot file path.
+            groups (Dict[str, Group]): Entity groups by domain.
+            registry (HasEntityRegistry): The registry of the entities of the groups.
+
+        Returns:
+            int: The size of the snapshot in bytes.
+        """
+        data = HasRegistrySnapshot.to_bytes(groups, registry)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+        return len(data)
+
+    @staticmethod
+    def load(path: str, client: Client) -> Optional[Tuple[Dict[str, Group], HasEntityRegistry]]:
+        """
+        Reads a snapshot file.
+
+        Args:
+            path (str): The snapshot file path.
+            client (Client): The client of the restored groups.
+
+        Returns:
+            Tuple[Dict[str, Group], HasEntityRegistry] | None: The groups and the registry,
+            None if there is no usable snapshot.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as file:
+            return HasRegistrySnapshot.from_bytes(file.read(), client)
@@ -0,0 +1,165 @@
+# pylint: disable=C0114
+import asyncio
+import time
+from typing import Dict, NamedTuple, Iterable, Optional, Tuple
+from homeassistant_api.models import State
+from .has_async_client import HasAsyncClient
+
+
+class HasStateCacheStats(NamedTuple):
+    """
+    A NamedTuple with the counters of a HasStateCache.
+
+    Attributes:
+        reads (int): Number of get_state calls.
+        hits (int): Reads answered from the cache.
+        coalesced (int): Reads that joined a request already in flight.
+        upstream (int): Requests sent to Home Assistant.
+        invalidations (int): Entities invalidated by writes.
+    """
+    reads: int
+    hits: int
+    coalesced: int
+    upstream: int
+    invalidations: int
+
+    @property
+    def saved(self) -> int:
+        """Number of requests to Home Assistant saved by the cache."""
+        return self.hits + self.coalesced
+
+
+class HasStateCache:
+    """
+    A single-flight, short TTL cache of entity states in front of HasAsyncClient.
+
+    Concurrent reads of the same entity share one request in flight, and the state is then
+    served from the cache for ttl seconds. Service calls sent through the cache invalidate
+    the states of their target entities. A read that was in flight when its entity was
+    invalidated still returns its result to the callers already waiting, but is not cached
+    and is not joined by later reads, so a state read before a write is never served after
+    it.
+
+    All methods are coroutines of the client loop, so the cache needs no locking. Synchronous
+    code runs them with HasAsyncClient.run.
+
+    Methods:
+        get_state(entity_id: str) -> State:
+            Returns the state of an entity, from the cache if it is fresh.
+
+        trigger_service(domain: str, service: str, **service_data) -> Tuple[State, ...]:
+            Calls a service and invalidates the states of its targets.
+
+        invalidate(entity_ids: Iterable[str]) -> None:
+            Drops the cached states of entities.
+
+        stats() -> HasStateCacheStats:
+            Returns the read and upstream counters.
+    """
+
+    def __init__(self, client: HasAsyncClient, ttl: float = 2.0) -> None:
+        """
+        Initializes a new instance of the HasStateCache class.
+
+        Args:
+            client (HasAsyncClient): The client that sends the requests.
+            ttl (float): Time a state is served from the cache, in seconds. Defaults to 2.
+                0 disables caching but still coalesces concurrent reads.
+        """
+        self.client: HasAsyncClient = client
+        self.ttl: float = ttl
+        self._states: Dict[str, Tuple[float, State]] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # Incremented by every invalidation, a read is only cached if it did not change
+        self._generations: Dict[str, int] = {}
+        self._reads = 0
+        self._hits = 0
+        self._coalesced = 0
+        self._upstream = 0
+        self._invalidations = 0
+
+    async def get_state(self, entity_id: str) -> State:
+        """
+        Returns the state of an entity, from the cache if it is younger than the TTL.
+
+        Args:
+            entity_id (str): The entity_id, e.g. "light.kitchen".
+
+        Returns:
+            State: The state.
+        """
+        self._reads += 1
+        cached = self._states.get(entity_id)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            self._hits += 1
+            return cached[1]
+
+        in_flight = self._in_flight.get(entity_id)
+        if in_flight is not None:
+            self._coalesced += 1
+            # Shielded, so a cancelled caller does not cancel the read of the others
+            return await asyncio.shield(in_flight)
+
+        task = asyncio.ensure_future(self._fetch(entity_id))
+        self._in_flight[entity_id] = task
+        return await asyncio.shield(task)
+
+    async def _fetch(self, entity_id: str) -> State:
+        """Reads a state from Home Assistant and caches it unless it was invalidated meanwhile."""
+        generation = self._generations.get(entity_id, 0)
+        self._upstream += 1
+        try:
+            state = await self.client.get_state(entity_id)
+        finally:
+            # An invalidation may have replaced the read in flight by a newer one
+            if self._in_flight.get(entity_id) is asyncio.current_task():
+                del self._in_flight[entity_id]
+        if self.ttl > 0 and self._generations.get(entity_id, 0) == generation:
+            self._states[entity_id] = (time.monotonic(), state)
+        return state
+
+    def invalidate(self, entity_ids: Iterable[str]) -> None:
+        """
+        Drops the cached states of entities, e.g. after a service call changed them.
+
+        Args:
+            entity_ids (Iterable[str]): The entity_ids.
+        """
+        for entity_id in entity_ids:
+            self._invalidations += 1
+            self._states.pop(entity_id, None)
+            # Later reads must not join a read that may have started before the write
+            self._in_flight.pop(entity_id, None)
+            self._generations[entity_id] = self._generations.get(entity_id, 0) + 1
+
+    async def trigger_service(self, domain: str, service: str, **service_data) -> Tuple[State, ...]:
+        """
+        Calls a service, like HasAsyncClient.trigger_service, and invalidates its targets.
+
+        Args:
+            domain (str): The service domain, e.g. "light".
+            service (str): The service, e.g. "turn_on".
+            **service_data: The service data, with entity_id as a string or a list.
+
+        Returns:
+            Tuple[State, ...]: The states changed by the service call.
+        """
+        targets = service_data.get("entity_id") or []
+        if isinstance(targets, str):
+            targets = [entity_id.strip() for entity_id in targets.split(",")]
+        # Before and after the call: reads started during the call may see the old state
+        self.invalidate(targets)
+        try:
+            return await self.client.trigger_service(domain, service, **service_data)
+        finally:
+            self.invalidate(targets)
+
+    def stats(self) -> HasStateCacheStats:
+        """
+        Returns the read and upstream counters.
+
+        Returns:
+            HasStateCacheStats: The current counters.
+        """
+        return HasStateCacheStats(
+            self._reads, self._hits, self._coalesced, self._upstream, self._invalidations)
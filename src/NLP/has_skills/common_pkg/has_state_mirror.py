@@ -0,0 +1,314 @@
+# pylint: disable=C0114
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+import aiohttp
+from homeassistant_api import Client
+from homeassistant_api.models import Group, State
+from .has_registry import HasEntityRegistry
+
+
+class HasMirrorStats(NamedTuple):
+    """
+    A NamedTuple with the counters of a HasStateMirror.
+
+    Attributes:
+        connected (bool): True while the websocket subscription is active.
+        connections (int): Number of successful connections, reconnects included.
+        events (int): Number of state_changed events applied.
+        added (int): Number of entities added by events.
+        removed (int): Number of entities removed by events.
+        last_event_age (float | None): Seconds since the last event, None if none arrived.
+    """
+    connected: bool
+    connections: int
+    events: int
+    added: int
+    removed: int
+    last_event_age: Optional[float]
+
+
+class HasStateMirror:
+    """
+    A local mirror of the Home Assistant entity states fed by the websocket event stream.
+
+    A background thread runs an asyncio loop that authenticates on the websocket API,
+    subscribes to state_changed events and then fetches all states once, so no change
+    between the initial get_entities call and the subscription is lost. Every event
+    replaces the State of the Entity in the entity groups in place, adds entities that
+    did not exist before and removes deleted ones, so the groups (e.g. the light group of
+    the orchestrator) and the entity registry stay current without a restart. Skills read
+    states from the groups with no network call while the mirror is live. The connection
+    is restored with exponential backoff, followed by a full resync. A message that can not
+    be applied is logged and skipped, it does not end the subscription.
+
+    The groups are changed under the lock of the registry (or a lock of the mirror without a
+    registry), see locked. Code iterating over the groups on another thread must hold it.
+
+    Methods:
+        start() -> None:
+            Starts the background thread.
+
+        wait_until_live(timeout: float) -> bool:
+            Waits for the first successful subscription and resync.
+
+        get_state(entity_id: str) -> State | None:
+            Returns the mirrored state of an entity.
+
+        locked() -> threading.RLock:
+            Returns the lock guarding the groups.
+
+        stats() -> HasMirrorStats:
+            Returns connection and event counters.
+
+        stop() -> None:
+            Closes the connection and stops the thread.
+    """
+
+    SUBSCRIBE_ID = 1
+    GET_STATES_ID = 2
+    MIN_RECONNECT_DELAY = 0.5
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(
+        self,
+        client: Client,
+        groups: Dict[str, Group],
+        registry: Optional[HasEntityRegistry] = None,
+        on_resync: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Initializes a new instance of the HasStateMirror class.
+
+        Args:
+            client (Client): The Home Assistant client, for the API URL and token.
+            groups (Dict[str, Group]): Entity groups by domain, as returned by
+                Client.get_entities. Updated in place.
+            registry (HasEntityRegistry | None): Entity registry to keep in sync.
+            on_resync (Callable[[], None] | None): Called on the mirror thread after every full
+                resync, e.g. to save a registry snapshot.
+        """
+        self.client: Client = client
+        self.groups: Dict[str, Group] = groups
+        self.registry: Optional[HasEntityRegistry] = registry
+        self.on_resync: Optional[Callable[[], None]] = on_resync
+        self.websocket_url: str = self.websocket_url_from(client.api_url)
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = threading.Event()
+        self._live = threading.Event()
+        self._lock = registry.locked() if registry is not None else threading.RLock()
+        self._connections = 0
+        self._events = 0
+        self._added = 0
+        self._removed = 0
+        self._last_event_at: Optional[float] = None
+
+    @staticmethod
+    def websocket_url_from(api_url: str) -> str:
+        """
+        Derives the websocket API URL from the REST API URL.
+
+        Args:
+            api_url (str): The REST API URL, e.g. "http://homeassistant.local:8123/api".
+
+        Returns:
+            str: The websocket URL, e.g. "ws://homeassistant.local:8123/api/websocket".
+        """
+        url = api_url.rstrip("/")
+        if url.startswith("http"):
+            url = "ws" + url[len("http"):]
+        if not url.endswith("/api"):
+            url += "/api"
+        return url + "/websocket"
+
+    @property
+    def is_live(self) -> bool:
+        """True while the mirror is subscribed and has synced all states."""
+        return self._live.is_set()
+
+    def start(self) -> None:
+        """Starts the background thread that maintains the mirror."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._run())
+        self._thread = threading.Thread(
+            target=self._run_loop, name="HasStateMirror", daemon=True)
+        self._thread.start()
+
+    def wait_until_live(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until the mirror is subscribed and synced.
+
+        Args:
+            timeout (float | None): Maximum time to wait, in seconds.
+
+        Returns:
+            bool: True if the mirror is live.
+        """
+        return self._live.wait(timeout)
+
+    def stop(self) -> None:
+        """Closes the connection and waits for the background thread."""
+        self._stopping.set()
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def locked(self) -> threading.RLock:
+        """
+        Returns the lock guarding the groups, the lock of the registry if there is one.
+
+        Returns:
+            threading.RLock: The lock, to use in a with statement.
+        """
+        return self._lock
+
+    def get_state(self, entity_id: str) -> Optional[State]:
+        """
+        Returns the mirrored state of an entity.
+
+        Args:
+            entity_id (str): The entity_id, e.g. "light.kitchen".
+
+        Returns:
+            State | None: The last known state, or None for unknown entities.
+        """
+        domain, _, slug = entity_id.partition(".")
+        with self._lock:
+            group = self.groups.get(domain)
+            entity = group.entities.get(slug) if group is not None else None
+            return entity.state if entity is not None else None
+
+    def stats(self) -> HasMirrorStats:
+        """
+        Returns connection and event counters.
+
+        Returns:
+            HasMirrorStats: The current counters.
+        """
+        age = time.monotonic() - self._last_event_at if self._last_event_at is not None else None
+        return HasMirrorStats(
+            self.is_live, self._connections, self._events, self._added, self._removed, age)
+
+    def _run_loop(self) -> None:
+        """Runs the asyncio loop of the background thread."""
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._task)  # type: ignore
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()  # type: ignore
+
+    async def _run(self) -> None:
+        """Keeps a subscription open, reconnecting with exponential backoff."""
+        delay = self.MIN_RECONNECT_DELAY
+        async with aiohttp.ClientSession() as session:
+            while not self._stopping.is_set():
+                try:
+                    await self._subscribe(session)
+                    delay = self.MIN_RECONNECT_DELAY
+                except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as error:
+                    print(f"State mirror connection failed: {error}")
+                finally:
+                    self._live.clear()
+                if not self._stopping.is_set():
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+    async def _subscribe(self, session: aiohttp.ClientSession) -> None:
+        """Authenticates, subscribes to state_changed, resyncs and applies events until closed."""
+        async with session.ws_connect(self.websocket_url, heartbeat=30) as websocket:
+            message = await websocket.receive_json()
+            if message.get("type") == "auth_required":
+                await websocket.send_json({"type": "auth", "access_token": self.client.token})
+                message = await websocket.receive_json()
+            if message.get("type") != "auth_ok":
+                raise ConnectionError(f"Authentication failed: {message.get('message', message)}")
+
+            await websocket.send_json({
+                "id": self.SUBSCRIBE_ID, "type": "subscribe_events", "event_type": "state_changed"})
+            await websocket.send_json({"id": self.GET_STATES_ID, "type": "get_states"})
+            self._connections += 1
+
+            async for frame in websocket:
+                if frame.type != aiohttp.WSMsgType.TEXT:
+                    break
+                # A malformed or unexpected message must not end the subscription
+                try:
+                    self._handle_message(frame.json())
+                except Exception as error:  # pylint: disable=W0718
+                    print(f"State mirror message skipped: {error!r}")
+
+    def _handle_message(self, message: Dict[str, Any]) -> None:
+        """Applies a message of the websocket API."""
+        if message.get("type") == "event":
+            data = message["event"].get("data", {})
+            self._apply_state(data["entity_id"], data.get("new_state"))
+            self._events += 1
+            self._last_event_at = time.monotonic()
+        elif message.get("type") == "result" and message.get("id") == self.GET_STATES_ID:
+            if message.get("success"):
+                with self._lock:
+                    self._resync(message["result"])
+                self._live.set()
+                if self.on_resync is not None:
+                    self.on_resync()
+
+    def _resync(self, states: list) -> None:
+        """Replaces all mirrored states with a full state list."""
+        current = {state.get("entity_id") for state in states}
+        for domain, group in list(self.groups.items()):
+            for slug in list(group.entities):
+                if f"{domain}.{slug}" not in current:
+                    self._apply_state(f"{domain}.{slug}", None)
+        for state in states:
+            try:
+                self._apply_state(state["entity_id"], state)
+            except (KeyError, ValueError) as error:
+                print(f"State mirror state skipped: {error!r}")
+
+    def _apply_state(self, entity_id: str, new_state: Optional[Dict[str, Any]]) -> None:
+        """
+        Updates, adds or removes the entity of a state, under the lock of the groups.
+
+        Args:
+            entity_id (str): The entity_id.
+            new_state (dict | None): The new state as sent by Home Assistant, None if the
+                entity was removed.
+        """
+        # Parsed before taking the lock, an invalid state leaves the groups unchanged
+        state = State.from_json(new_state) if new_state is not None else None
+        domain, _, slug = entity_id.partition(".")
+        with self._lock:
+            group = self.groups.get(domain)
+            entity = group.entities.get(slug) if group is not None else None
+
+            if state is None:
+                if entity is not None:
+                    del group.entities[slug]  # type: ignore
+                    self._removed += 1
+                if self.registry is not None:
+                    self.registry.remove(entity_id)
+                return
+
+            if entity is not None:
+                renamed = (state.attributes.get("friendly_name")
+                           != entity.state.attributes.get("friendly_name"))
+                entity.state = state
+                if renamed and self.registry is not None:
+                    self.registry.add(entity)
+                return
+
+            if group is None:
+                group = self.groups[domain] = Group(group_id=domain, _client=self.client)
+            group._add_entity(slug, state)  # pylint: disable=W0212
+            self._added += 1
+            if self.registry is not None:
+                self.registry.add(group.entities[slug])
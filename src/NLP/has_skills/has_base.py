@@ -1,8 +1,12 @@
 # pylint: disable=C0114
-from typing import Tuple, TYPE_CHECKING, Optional
-from ..nlp_skill import NlpSkill
-from ..ner.ner_result import NerResult
-from ..nlp_common import NlpResult
+from typing import Any, Dict, Iterable, List, Tuple, TYPE_CHECKING, Optional
+from homeassistant_api.errors import RequestTimeoutError
+from .common_pkg.has_common import HasServiceCall
+from .common_pkg.has_dispatch import HasDispatchRule, HasDispatchTable
+from ..nlp_skill import NlpRoute, NlpSkill
+from ..ner.ner_result import NerResult, NerResultSingle
+from ..nlp_common import NlpResult, NlpResultStatus
+from ..nlp_metrics import METRICS
 
 if TYPE_CHECKING:
     from vh_orchestrator import VHOrchestator
@@ -16,11 +20,38 @@ class HasBase(NlpSkill):
     for handling natural language processing (NLP) results and invoking the appropriate
     skills based on NLP/NER results.
 
+    A skill of a Home Assistant domain sets DOMAIN and THING and declares its handler methods
+    with common_pkg.has_dispatch.has_handles. The rules are compiled once per class into
+    `dispatch_table`, and the routes of the skill are derived from them. The request of every
+    target is then handled without branching code: the best matching entity of the domain is
+    chosen and the rule of the (action, attribute, state) of the request calls its handler as
+    handler(self, orchst, single_request, winner_entity, result, template). Handlers return
+    the HasServiceCall to issue, or None for queries they answer at once from the state of the
+    winner entity, refreshed before by refresh_states. The service calls of a successful
+    command are kept as the plan of its result, see execute_plan.
+
     Attributes:
         child_skills_dict (dict): A dictionary containing all child classes that inherit 
                                   from `HAS_Base` indexed by their class names.
+        DOMAIN (str | None): The Home Assistant domain of the entities, e.g. "light".
+        THING (str | None): The thing name of the NER, e.g. "light".
+        dispatch_table (HasDispatchTable): The handler rules of the class.
     """
 
+    DOMAIN: Optional[str] = None
+    THING: Optional[str] = None
+    dispatch_table: HasDispatchTable = HasDispatchTable(())
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """
+        Compiles the dispatch table and the routes of a skill class once, when it is created.
+        """
+        super().__init_subclass__(**kwargs)
+        cls.dispatch_table = HasDispatchTable.from_class(cls)
+        if cls.THING and len(cls.dispatch_table):
+            cls.ROUTES = tuple(NlpRoute(cls.THING, action, attribute)
+                               for action, attribute in cls.dispatch_table.actions_and_attributes())
+
     def __init__(self):
         """
         Initializes a new instance of the `HAS_Base` class.
@@ -35,6 +66,28 @@ class HasBase(NlpSkill):
             skill.__name__: skill() for skill in HasBase.__subclasses__()
         }  # All child classes instances that inherit from HAS_Base
 
+    def handlers(self) -> Iterable['HasBase']:
+        """
+        Returns the child skills, requests are routed to them directly.
+
+        Returns:
+            Iterable[HasBase]: The instances of all subclasses of `HasBase`.
+        """
+        return self.child_skills_dict.values()
+
+    def route_score(self, ner_result: NerResult, _: str) -> float:
+        """
+        Breaks ties between skills with equally specific routes by the request score.
+
+        Args:
+            ner_result (NER_result): The NER result to score.
+            _ (str): The utterance, unused.
+
+        Returns:
+            float: The score of get_req_score.
+        """
+        return self.get_req_score(ner_result)
+
     def request_handling_score(self, ner_result: NerResult, _: str) -> Tuple[Optional['HasBase'], float]:
         """
         Determine the best handler for a given NER result.
@@ -73,35 +126,450 @@ class HasBase(NlpSkill):
 
     def get_req_score(self, ner_result: NerResult):
         """
-        Get the request score for a given NER result.
-
-        This method should be implemented in subclasses to provide specific scoring mechanisms.
+        Returns a score how good request can be handled by that skill.
+        TODO Add more logic
 
         Args:
             ner_result (NER_result): The NER result to score.
 
-        Raises:
-            NotImplementedError: This method needs to be implemented in subclasses.
+        Returns:
+            int: 100 if the NER result is the THING of the skill, 0 otherwise. - Simple logic
         """
-        raise NotImplementedError(
-            "This method should be overridden in subclasses.")
+        return 100 if self.THING and self.THING in ner_result.thing else 0  # type: ignore
 
     def handle_utterance(
         self, orchst: "VHOrchestator", ner_result: NerResult, utterance: str
     ) -> NlpResult:
         """
-        Handles the provided utterance based on the NER result.
+        Handles a given utterance by checking for matching entities, choosing a winner, and delegating action handling
+        to the handler methods of the dispatch table.
 
-        This method should be implemented in subclasses to provide specific action based on the user's utterance 
-        and the derived NER result.
+        Compound requests ("turn on lights in kitchen and bathroom") are split into one request per
+        target. The states read by the queries of all targets are refreshed together, see
+        refresh_states, and the service calls of all targets are collected first and issued
+        together, see trigger_service_calls, so a multi-room request costs one round trip.
 
         Args:
-            orchst (VHOrchestator): The orchestration instance to use.
+            orchst (VHOrchestator): The orchestation instance to use.
             ner_result (NER_result): The NER result associated with the utterance.
             utterance (str): The user's utterance.
 
-        Raises:
-            NotImplementedError: This method needs to be implemented in subclasses.
+        Returns:
+            NLP_result: The result of NLP skill, overall outcome
+        """
+        target_results, resolved = self._resolve_targets(orchst, ner_result)
+
+        # 55. Refresh the states read by the queries of all targets at once
+        refreshed = self.refresh_states(orchst, self._query_targets(resolved))
+        planned_calls = self._dispatch(orchst, resolved, refreshed)
+
+        # 60. Issue the service calls of all targets
+        if planned_calls:
+            self.trigger_service_calls(orchst, planned_calls)
+        return self._combine_with_plan(target_results, planned_calls)
+
+    async def handle_utterance_async(
+        self, orchst: "VHOrchestator", ner_result: NerResult, utterance: str
+    ) -> NlpResult:
+        """
+        Coroutine, handles a given utterance like handle_utterance. The state reads and the
+        service calls are awaited, so the event loop of the caller serves other requests
+        while they wait for Home Assistant.
+
+        Args:
+            orchst (VHOrchestator): The orchestation instance to use.
+            ner_result (NER_result): The NER result associated with the utterance.
+            utterance (str): The user's utterance.
+
+        Returns:
+            NLP_result: The result of NLP skill, overall outcome
+        """
+        target_results, resolved = self._resolve_targets(orchst, ner_result)
+
+        # 55. Refresh the states read by the queries of all targets at once
+        refreshed = await self.refresh_states_async(orchst, self._query_targets(resolved))
+        planned_calls = self._dispatch(orchst, resolved, refreshed)
+
+        # 60. Issue the service calls of all targets
+        if planned_calls:
+            await self.trigger_service_calls_async(orchst, planned_calls)
+        return self._combine_with_plan(target_results, planned_calls)
+
+    def _resolve_targets(
+        self, orchst: "VHOrchestator", ner_result: NerResult
+    ) -> Tuple[List[NlpResult], List[Tuple[NerResultSingle, NlpResult, HasDispatchRule, Dict[str, Any]]]]:
+        """
+        Splits a request into one request per target and resolves the entity and the rule
+        of every target.
+
+        Returns:
+            tuple: The dialogue result of every target, and the request, result, rule and
+            winner entity of the targets that can be handled.
+        """
+        # 10. Split compound requests into one request per target
+        single_requests: List[NerResultSingle] = ner_result.split_targets()
+        target_results: List[NlpResult] = []
+        resolved: List[Tuple[NerResultSingle, NlpResult, HasDispatchRule, Dict[str, Any]]] = []
+
+        for single_request in single_requests:
+            # 20. Prepare object to return
+            result = NlpResult(
+                NlpResultStatus.UNKNOWN, f"ERROR : HAS {type(self).__name__} skill failed"
+            )
+            target_results.append(result)
+            target = self.resolve_target(orchst, single_request, result)
+            if target is not None:
+                resolved.append((single_request, result, *target))
+        return target_results, resolved
+
+    @staticmethod
+    def _query_targets(resolved: list) -> List[Tuple[Dict[str, Any], NlpResult]]:
+        """Returns the winner entity and the result of the resolved queries."""
+        return [(winner_entity, result)
+                for _, result, rule, winner_entity in resolved if rule.template is None]
+
+    def _dispatch(
+        self, orchst: "VHOrchestator", resolved: list, refreshed: Dict[str, bool]
+    ) -> List[Tuple[HasServiceCall, NlpResult]]:
+        """
+        Delegates action handling to the handlers of the resolved requests. Queries whose
+        state could not be read are skipped, they already have a failure result.
+
+        Returns:
+            List[Tuple[HasServiceCall, NlpResult]]: The service call of every command with the
+            dialogue result of its target.
+        """
+        planned_calls: List[Tuple[HasServiceCall, NlpResult]] = []
+        for single_request, result, rule, winner_entity in resolved:
+            if rule.template is None and not refreshed[winner_entity["entity"].entity_id]:
+                continue
+            call = rule.handler(self, orchst, single_request, winner_entity, result, rule.template)
+            if call is not None:
+                planned_calls.append((call, result))
+        return planned_calls
+
+    def _combine_with_plan(
+        self, target_results: List[NlpResult], planned_calls: List[Tuple[HasServiceCall, NlpResult]]
+    ) -> NlpResult:
+        """Combines the target results, with the plan of a command that can be replayed."""
+        # 70. A command whose every target was a successful service call can be replayed
+        combined = self.combine_results(target_results)
+        if planned_calls and len(planned_calls) == len(target_results) and combined.is_successful():
+            combined.plan = tuple((call, result.dialog_to_say) for call, result in planned_calls)
+        return combined
+
+    def execute_plan(
+        self, orchst: "VHOrchestator", plan: Tuple[Tuple[HasServiceCall, str], ...]
+    ) -> NlpResult:
+        """
+        Replays a command resolved by handle_utterance: the service calls of its targets are
+        issued again as they were resolved, without the entity search.
+
+        Args:
+            orchst (VHOrchestator): The orchestator object to use.
+            plan (Tuple[Tuple[HasServiceCall, str], ...]): The service call and the dialog
+                of every target, see NlpResult.plan.
+
+        Returns:
+            NLP_result: The combined result of the targets, with the plan if it succeeded.
+        """
+        planned_calls = [(call, NlpResult(NlpResultStatus.SUCCESS, dialog)) for call, dialog in plan]
+        self.trigger_service_calls(orchst, planned_calls)
+        return self._combine_replayed(plan, planned_calls)
+
+    async def execute_plan_async(
+        self, orchst: "VHOrchestator", plan: Tuple[Tuple[HasServiceCall, str], ...]
+    ) -> NlpResult:
+        """
+        Coroutine, replays a command like execute_plan and awaits its service calls.
+
+        Args:
+            orchst (VHOrchestator): The orchestator object to use.
+            plan (Tuple[Tuple[HasServiceCall, str], ...]): The service call and the dialog
+                of every target, see NlpResult.plan.
+
+        Returns:
+            NLP_result: The combined result of the targets, with the plan if it succeeded.
+        """
+        planned_calls = [(call, NlpResult(NlpResultStatus.SUCCESS, dialog)) for call, dialog in plan]
+        await self.trigger_service_calls_async(orchst, planned_calls)
+        return self._combine_replayed(plan, planned_calls)
+
+    def _combine_replayed(
+        self, plan: Tuple[Tuple[HasServiceCall, str], ...],
+        planned_calls: List[Tuple[HasServiceCall, NlpResult]],
+    ) -> NlpResult:
+        """Combines the target results of a replayed plan, keeping the plan if it succeeded."""
+        combined = self.combine_results([result for _, result in planned_calls])
+        if combined.is_successful():
+            combined.plan = plan
+        return combined
+
+    def handle_single_request(
+        self, orchst: "VHOrchestator", single_request: NerResultSingle, result: NlpResult
+    ) -> Optional[HasServiceCall]:
+        """
+        Handles the request of one target. Queries are answered at once, commands return the
+        service call to issue.
+
+        Args:
+            orchst (VHOrchestator): The orchestator object to use.
+            single_request (NerResultSingle): The request of one target.
+            result (NLP_result): The dialogue result of the target to modify.
+
+        Returns:
+            HasServiceCall | None: The service call to issue, if the request is a command.
+        """
+        target = self.resolve_target(orchst, single_request, result)
+        if target is None:
+            return None
+        rule, winner_entity = target
+        if rule.template is None and not self.refresh_states(orchst, [(winner_entity, result)])[
+                winner_entity["entity"].entity_id]:
+            return None
+        return rule.handler(self, orchst, single_request, winner_entity, result, rule.template)
+
+    def resolve_target(
+        self, orchst: "VHOrchestator", single_request: NerResultSingle, result: NlpResult
+    ) -> Optional[Tuple[HasDispatchRule, Dict[str, Any]]]:
+        """
+        Finds the entity and the handler rule of the request of one target.
+
+        Args:
+            orchst (VHOrchestator): The orchestator object to use.
+            single_request (NerResultSingle): The request of one target.
+            result (NLP_result): The dialogue result of the target, set if nothing was found.
+
+        Returns:
+            Tuple[HasDispatchRule, Dict[str, Any]] | None: The rule and the winner entity,
+            None if the request cannot be handled.
+        """
+        # 30. Looking for matching entities in the requested location, only the best one is needed
+        with METRICS.timer("candidate_search"):
+            candidates: List[Dict[str, Any]] = orchst.ha_registry.find_candidates(
+                self.build_suggest_entity_name(single_request),
+                self.DOMAIN,
+                location=single_request.location,
+                top_k=1,
+            )
+
+        # 40. Choose winner
+        winner_entity: Dict[str, Any] = self.choose_winner(candidates)
+
+        # 50. If winner was not found decide to fail execution or ask user for more details
+        if winner_entity is None:
+            result.set_state(NlpResultStatus.NEED_MORE_INFO)
+            return None
+
+        # 52. Find the handler of the request
+        rule = self.dispatch_table.find(
+            single_request.action.lower() if single_request.action else None,  # type: ignore
+            single_request.attribute.lower() if single_request.attribute else None,  # type: ignore
+            single_request.state.lower() if single_request.state else None,  # type: ignore
+        )
+        if rule is None:
+            result.set_state(NlpResultStatus.UNKNOWN_ACTION)
+            return None
+        return rule, winner_entity
+
+    @classmethod
+    def refresh_states(
+        cls, orchst: "VHOrchestator", targets: List[Tuple[Dict[str, Any], NlpResult]]
+    ) -> Dict[str, bool]:
+        """
+        Refreshes the states of the winner entities of queries. While the state mirror is live
+        the mirrored states are current and nothing is read, otherwise all states are read
+        concurrently through the state cache. The targets of a read that failed get a
+        failure result. Blocks until the reads are done, see refresh_states_async.
+
+        Args:
+            orchst (VHOrchestator): The orchestator object to use.
+            targets (List[Tuple[Dict[str, Any], NlpResult]]): The winner entity of every
+                query with the dialogue result of the target.
+
+        Returns:
+            Dict[str, bool]: By entity_id, True if the state of the entity is current.
+        """
+        entity_ids = cls._entity_ids_to_read(orchst, targets)
+        outcomes: List[Any] = []
+        if entity_ids:
+            with METRICS.timer("ha_state_read"):
+                outcomes = orchst.ha_client.run_all(
+                    orchst.ha_state_cache.get_state(entity_id) for entity_id in entity_ids)
+        return cls._apply_states(targets, dict(zip(entity_ids, outcomes)))
+
+    @classmethod
+    async def refresh_states_async(
+        cls, orchst: "VHOrchestator", targets: List[Tuple[Dict[str, Any], NlpResult]]
+    ) -> Dict[str, bool]:
+        """
+        Coroutine, refreshes the states of the winner entities of queries like refresh_states,
+        without blocking the event loop of the caller.
+
+        Args:
+            orchst (VHOrchestator): The orchestator object to use.
+            targets (List[Tuple[Dict[str, Any], NlpResult]]): The winner entity of every
+                query with the dialogue result of the target.
+
+        Returns:
+            Dict[str, bool]: By entity_id, True if the state of the entity is current.
+        """
+        entity_ids = cls._entity_ids_to_read(orchst, targets)
+        outcomes: List[Any] = []
+        if entity_ids:
+            with METRICS.timer("ha_state_read"):
+                outcomes = await orchst.ha_client.gather(
+                    orchst.ha_state_cache.get_state(entity_id) for entity_id in entity_ids)
+        return cls._apply_states(targets, dict(zip(entity_ids, outcomes)))
+
+    @staticmethod
+    def _entity_ids_to_read(
+        orchst: "VHOrchestator", targets: List[Tuple[Dict[str, Any], NlpResult]]
+    ) -> List[str]:
+        """Returns the distinct entity ids of the targets, none while the state mirror is live."""
+        if orchst.ha_state_mirror.is_live:
+            return []
+        return list(dict.fromkeys(winner["entity"].entity_id for winner, _ in targets))
+
+    @staticmethod
+    def _apply_states(
+        targets: List[Tuple[Dict[str, Any], NlpResult]], states: Dict[str, Any]
+    ) -> Dict[str, bool]:
+        """Sets the read states, or the failure of their targets, see refresh_states."""
+        for winner, result in targets:
+            state = states.get(winner["entity"].entity_id)
+            if state is None:
+                continue
+            if isinstance(state, RequestTimeoutError):
+                result.set_state(NlpResultStatus.FAILURE, "No connection to Home Assistant server")
+            elif isinstance(state, BaseException):
+                raise state
+            else:
+                winner["entity"].state = state
+        return {winner["entity"].entity_id:
+                not isinstance(states.get(winner["entity"].entity_id), BaseException)
+                for winner, _ in targets}
+
+    @staticmethod
+    def trigger_service_calls(
+        orchst: "VHOrchestator", planned_calls: List[Tuple[HasServiceCall, NlpResult]]
+    ) -> None:
+        """
+        Issues the service calls of all targets. Calls of the same service with the same data
+        are merged into one call with an entity_id list, the remaining calls run concurrently.
+        The targets of a call that failed get a failure result. Blocks until the calls are
+        done, see trigger_service_calls_async.
+
+        Args:
+            orchst (VHOrchestator): The orchestator object to use.
+            planned_calls (List[Tuple[HasServiceCall, NlpResult]]): The call of every target
+                with the dialogue result of the target.
+        """
+        batched_calls = HasServiceCall.batch([call for call, _ in planned_calls])
+        with METRICS.timer("ha_call"):
+            outcomes = orchst.ha_client.run_all(
+                orchst.ha_state_cache.trigger_service(
+                    call.domain, call.service, **call.service_data())
+                for call in batched_calls
+            )
+        HasBase._apply_outcomes(planned_calls, batched_calls, outcomes)
+
+    @staticmethod
+    async def trigger_service_calls_async(
+        orchst: "VHOrchestator", planned_calls: List[Tuple[HasServiceCall, NlpResult]]
+    ) -> None:
+        """
+        Coroutine, issues the service calls of all targets like trigger_service_calls,
+        without blocking the event loop of the caller.
+
+        Args:
+            orchst (VHOrchestator): The orchestator object to use.
+            planned_calls (List[Tuple[HasServiceCall, NlpResult]]): The call of every target
+                with the dialogue result of the target.
+        """
+        batched_calls = HasServiceCall.batch([call for call, _ in planned_calls])
+        with METRICS.timer("ha_call"):
+            outcomes = await orchst.ha_client.gather(
+                orchst.ha_state_cache.trigger_service(
+                    call.domain, call.service, **call.service_data())
+                for call in batched_calls
+            )
+        HasBase._apply_outcomes(planned_calls, batched_calls, outcomes)
+
+    @staticmethod
+    def _apply_outcomes(
+        planned_calls: List[Tuple[HasServiceCall, NlpResult]],
+        batched_calls: List[HasServiceCall],
+        outcomes: List[Any],
+    ) -> None:
+        """Sets the failure of the targets of failed service calls, see trigger_service_calls."""
+        for batched_call, outcome in zip(batched_calls, outcomes):
+            if isinstance(outcome, RequestTimeoutError):
+                for call, result in planned_calls:
+                    if call._replace(entity_ids=()) == batched_call._replace(entity_ids=()):
+                        result.set_state(
+                            NlpResultStatus.FAILURE, "No connection to Home Assistant server"
+                        )
+            elif isinstance(outcome, BaseException):
+                raise outcome
+
+    @staticmethod
+    def combine_results(target_results: List[NlpResult]) -> NlpResult:
+        """
+        Combines the dialogue results of all targets into one.
+
+        Args:
+            target_results (List[NlpResult]): The result of every target.
+
+        Returns:
+            NlpResult: The result of a single target as is. For several targets, the first
+            unsuccessful status (SUCCESS if none) with the dialogs of all targets.
         """
-        raise NotImplementedError(
-            "This method should be overridden in subclasses.")
+        if len(target_results) == 1:
+            return target_results[0]
+        failed = [result for result in target_results if not result.is_successful()]
+        return NlpResult(
+            failed[0].status if failed else NlpResultStatus.SUCCESS,
+            " ".join(result.dialog_to_say for result in target_results),
+        )
+
+    @staticmethod
+    def choose_winner(candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Choose the best candidate based on the highest similarity score.
+
+        Args:
+            candidates (List[Dict[str, Any]]): A list of candidate entities.
+
+        Returns:
+            Dict[str, Any]: The candidate with the highest similarity score, None if there are no
+                            candidates.
+        """
+
+        return max(candidates, key=lambda x: x["similarity"], default=None)  # type: ignore
+
+    def build_suggest_entity_name(self, ner_result: NerResult):
+        """
+        Build a name to suggest an entity, based on the named entity recognition result. 
+        This method constructs an expected entity name using the NER result, which is 
+        then used to find the closest match in the database.
+
+        Args:
+            ner_result (NER_result): The result of named entity recognition.
+
+        Returns:
+            str: A string that suggests an entity name, to be used in database search.
+        """
+        description = ""
+        location = ""
+        if ner_result.description:
+            description = "_".join(list(ner_result.description))
+        if ner_result.location:  # type: ignore
+            location = ner_result.location  # type: ignore
+
+        if description:
+            description = "_" + description
+        # Common pattern: <domain>.<location>_<description>_<thing>
+        query = f"{self.DOMAIN}." + location.lower() + description + f"_{self.THING}"
+
+        return query
@@ -2,7 +2,7 @@
 Module contains common Nlp classes 
 '''
 from enum import Enum
-from typing import Union
+from typing import Any, Optional, Union
 
 
 class NlpResultStatus(Enum):
@@ -37,6 +37,8 @@ class NlpResult:
     Attributes:
     - status (NLP_result_status): The status of the NLP result.
     - dialog_to_say (str): The response dialog associated with the result.
+    - plan (Any | None): The resolved steps of a successful command, set by skills that can
+      replay it without the NER and the entity search, see NlpSkill.execute_plan.
 
     Methods:
     - is_successful: Checks if the NLP result status is successful.
@@ -53,6 +55,7 @@ class NlpResult:
         """
         self.status: NlpResultStatus = status
         self.dialog_to_say: str = dialog_to_say
+        self.plan: Optional[Any] = None
 
     def is_successful(self) -> bool:
         """
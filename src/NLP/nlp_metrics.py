@@ -0,0 +1,284 @@
+'''
+Module contains latency metrics of the request processing stages
+'''
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class StageStats(NamedTuple):
+    """
+    A NamedTuple with the latency summary of one stage.
+
+    Attributes:
+    - count (int): Number of observations.
+    - total (float): Sum of all observations, in seconds.
+    - p50, p95, p99 (float): Estimated percentiles, in seconds.
+    - max (float): Largest observation, in seconds.
+    """
+    count: int
+    total: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    def format(self) -> str:
+        """Formats the summary in milliseconds."""
+        return (f"n={self.count} p50={self.p50 * 1000:.2f}ms p95={self.p95 * 1000:.2f}ms "
+                f"p99={self.p99 * 1000:.2f}ms max={self.max * 1000:.2f}ms")
+
+
+class LatencyHistogram:
+    """
+    A latency histogram with fixed, logarithmically spaced buckets.
+
+    Memory and observation cost do not depend on the number of observations. Percentiles
+    are interpolated inside the bucket holding them, so their relative error is below the
+    bucket growth factor (19% for 4 buckets per doubling).
+
+    Methods:
+    - observe: Adds an observation.
+    - quantile: Estimates a quantile.
+    - stats: Returns count, sum and the p50/p95/p99 estimates.
+    - cumulative_buckets: Returns the (upper bound, cumulative count) pairs.
+    """
+
+    # Upper bounds from 50 us to about 100 s, 4 buckets per doubling
+    BOUNDS: Tuple[float, ...] = tuple(50e-6 * 2 ** (index / 4) for index in range(85))
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty histogram.
+        """
+        # One more count for the observations above the last bound
+        self.counts: List[int] = [0] * (len(self.BOUNDS) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Adds an observation.
+
+        Args:
+        - seconds (float): The observed latency.
+        """
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile by linear interpolation inside its bucket.
+
+        Args:
+        - q (float): The quantile, from 0 to 1.
+
+        Returns:
+        - float: The estimate in seconds, 0 if there are no observations.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.BOUNDS[index - 1] if index > 0 else 0.0
+                upper = self.BOUNDS[index] if index < len(self.BOUNDS) else self.max
+                estimate = lower + (upper - lower) * (rank - cumulative) / bucket_count
+                return min(estimate, self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def stats(self) -> StageStats:
+        """
+        Returns the summary of the histogram.
+
+        Returns:
+        - StageStats: Count, sum, percentiles and maximum.
+        """
+        return StageStats(self.count, self.total, self.quantile(0.5), self.quantile(0.95),
+                          self.quantile(0.99), self.max)
+
+    def cumulative_buckets(self) -> Iterator[Tuple[float, int]]:
+        """
+        Returns the cumulative counts of the buckets, as in the Prometheus histogram format.
+
+        Returns:
+        - Iterator[Tuple[float, int]]: (upper bound, observations at or below it) pairs, the
+          last bound is infinity.
+        """
+        cumulative = 0
+        for bound, bucket_count in zip(self.BOUNDS + (math.inf,), self.counts):
+            cumulative += bucket_count
+            yield bound, cumulative
+
+
+class NlpMetrics:
+    """
+    Latency histograms of the request processing stages, by stage name.
+
+    Stages are timed with the timer context manager or recorded with observe. The metrics
+    are read with snapshot, or pulled over HTTP in the Prometheus text format from the
+    endpoint started by serve. All methods are thread safe.
+
+    Methods:
+    - timer: Context manager that records the time spent in its block.
+    - observe: Records a latency.
+    - add_gauge: Registers a value read when the metrics are exported, e.g. a cache hit ratio.
+    - snapshot: Returns the summary of every stage.
+    - to_prometheus: Returns all metrics in the Prometheus text exposition format.
+    - serve: Starts the HTTP endpoint.
+    - reset: Drops all observations.
+    """
+
+    METRIC_NAME = "vh_stage_latency_seconds"
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty set of metrics.
+        """
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Records the latency of a stage.
+
+        Args:
+        - stage (str): The stage name, e.g. "ner".
+        - seconds (float): The latency.
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """
+        Records the time spent in the with block as a latency of the stage, also if the
+        block raises.
+
+        Args:
+        - stage (str): The stage name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, StageStats]:
+        """
+        Returns the summary of every stage.
+
+        Returns:
+        - Dict[str, StageStats]: Summaries by stage name, in order of first observation.
+        """
+        with self._lock:
+            return {stage: histogram.stats() for stage, histogram in self._histograms.items()}
+
+    def reset(self) -> None:
+        """
+        Drops all observations.
+        """
+        with self._lock:
+            self._histograms.clear()
+
+    def add_gauge(self, name: str, description: str, read: Callable[[], float]) -> None:
+        """
+        Registers a gauge, its value is read by to_prometheus. A gauge registered under the
+        same name again replaces the previous one.
+
+        Args:
+        - name (str): The metric name, e.g. "vh_plan_cache_hit_ratio".
+        - description (str): The help text of the metric.
+        - read (Callable[[], float]): Returns the current value, called from any thread.
+        """
+        with self._lock:
+            self._gauges[name] = (description, read)
+
+    def to_prometheus(self) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format: a histogram of the
+        latency of every stage, a gauge with its p50/p95/p99 estimates, and the gauges
+        registered with add_gauge.
+
+        Returns:
+        - str: The metrics text.
+        """
+        name = self.METRIC_NAME
+        lines = [f"# HELP {name} Latency of the request processing stages.",
+                 f"# TYPE {name} histogram"]
+        quantile_lines = [f"# HELP {name}_quantile Estimated latency percentiles of the stages.",
+                          f"# TYPE {name}_quantile gauge"]
+        with self._lock:
+            for stage, histogram in self._histograms.items():
+                for bound, cumulative in histogram.cumulative_buckets():
+                    bound_text = "+Inf" if math.isinf(bound) else f"{bound:.6g}"
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound_text}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total:.9g}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+                for q in self.QUANTILES:
+                    quantile_lines.append(
+                        f'{name}_quantile{{stage="{stage}",quantile="{q}"}} '
+                        f'{histogram.quantile(q):.9g}')
+            gauges = list(self._gauges.items())
+        gauge_lines = []
+        for gauge, (description, read) in gauges:
+            gauge_lines += [f"# HELP {gauge} {description}", f"# TYPE {gauge} gauge",
+                            f"{gauge} {read():.9g}"]
+        return "\n".join(lines + quantile_lines + gauge_lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Starts an HTTP endpoint on a daemon thread that returns to_prometheus() on GET /metrics.
+        Does nothing if the endpoint is running.
+
+        Args:
+        - port (int): The port, 0 for a free port.
+        - host (str): The host to bind. Defaults to localhost.
+
+        Returns:
+        - ThreadingHTTPServer: The server, server_address holds the bound address.
+        """
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            """Serves the metrics text."""
+
+            def do_GET(self) -> None:  # pylint: disable=C0103
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:  # pylint: disable=W0622
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(
+            target=self._server.serve_forever, name="NlpMetrics", daemon=True).start()
+        return self._server
+
+
+METRICS = NlpMetrics()
+"""Metrics of the orchestrator, the NER and the skills."""
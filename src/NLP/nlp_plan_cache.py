@@ -0,0 +1,137 @@
+'''
+Module contains the cache of the resolved plans of commands, by utterance
+'''
+import threading
+import time
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Tuple
+from ner.ner_cache import VhCacheStats, VhLruCache, normalize_utterance, path_fingerprint
+from nlp.nlp_skill import NlpSkill
+
+
+class NlpPlan(NamedTuple):
+    """
+    A command resolved by a skill, replayed with NlpSkill.execute_plan.
+
+    Attributes:
+    - skill (NlpSkill): The skill that handled the command.
+    - steps (Any): The plan of the result of the skill, see NlpResult.plan.
+    """
+    skill: NlpSkill
+    steps: Any
+
+
+class NlpPlanCache:
+    """
+    A cache of the plans of successful commands by normalized utterance, so a repeated
+    command skips the NER, the skill lookup and the entity search and goes straight to the
+    Home Assistant call.
+
+    A plan is only valid for the entities, vocabulary and model it was resolved with. The
+    whole cache is cleared when the version of the entity registry changes, checked on every
+    lookup, or when the files of the vocabulary or the model change, checked at most once per
+    CHECK_INTERVAL. Every clear starts a new generation: a plan resolved during an older
+    generation is not stored, as it may have been resolved with the old entities.
+
+    Methods:
+    - get: Returns the plan of an utterance, None on a miss.
+    - put: Stores the plan of an utterance.
+    - stats: Returns the hit, miss and invalidation counters.
+    - generation: Returns the current generation, to pass to put.
+    """
+
+    CHECK_INTERVAL = 1.0  # seconds
+
+    def __init__(
+        self, version: Callable[[], int], paths: Iterable[str], max_size: int = 1024
+    ) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+        - version (Callable[[], int]): Returns the version of the data plans are resolved
+          from, e.g. HasEntityRegistry.version.
+        - paths (Iterable[str]): Files or directories plans depend on, e.g. the vocabulary
+          and the trained model.
+        - max_size (int): The maximum number of plans. Defaults to 1024.
+        """
+        self._version_of = version
+        self._paths: Tuple[str, ...] = tuple(paths)
+        self._plans = VhLruCache(max_size)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._version = version()
+        self._fingerprints = self._fingerprint()
+        self._checked_at = time.monotonic()
+
+    def _fingerprint(self) -> Tuple[tuple, ...]:
+        """Returns the fingerprints of the paths."""
+        return tuple(path_fingerprint(path) for path in self._paths)
+
+    def _validate(self) -> None:
+        """Clears the cache if the version or the files changed."""
+        version = self._version_of()
+        now = time.monotonic()
+        if version == self._version and now - self._checked_at < self.CHECK_INTERVAL:
+            return
+
+        with self._lock:
+            changed = version != self._version
+            if now - self._checked_at >= self.CHECK_INTERVAL:
+                self._checked_at = now
+                fingerprints = self._fingerprint()
+                changed = changed or fingerprints != self._fingerprints
+                self._fingerprints = fingerprints
+            if changed:
+                self._version = version
+                self._generation += 1
+                self._plans.clear()
+
+    @property
+    def generation(self) -> int:
+        """
+        Returns the current generation, read it before resolving a plan to store.
+
+        Returns:
+        - int: Increases with every clear.
+        """
+        return self._generation
+
+    def get(self, utterance: str) -> Optional[NlpPlan]:
+        """
+        Returns the plan of an utterance.
+
+        Args:
+        - utterance (str): The utterance, normalized by the cache.
+
+        Returns:
+        - NlpPlan | None: The plan, None if the utterance has no valid plan.
+        """
+        self._validate()
+        return self._plans.get(normalize_utterance(utterance))
+
+    def put(self, utterance: str, plan: NlpPlan, generation: int) -> bool:
+        """
+        Stores the plan of an utterance, unless the cache was cleared since the generation.
+
+        Args:
+        - utterance (str): The utterance, normalized by the cache.
+        - plan (NlpPlan): The plan.
+        - generation (int): The generation read before the plan was resolved.
+
+        Returns:
+        - bool: True if the plan was stored.
+        """
+        with self._lock:
+            if generation != self._generation or self._version_of() != self._version:
+                return False
+            self._plans.put(normalize_utterance(utterance), plan)
+        return True
+
+    def stats(self) -> VhCacheStats:
+        """
+        Returns the cache counters, hit_rate is the fraction of commands replayed.
+
+        Returns:
+        - VhCacheStats: Hits, misses, invalidations and the number of plans.
+        """
+        return self._plans.stats()
@@ -0,0 +1,111 @@
+'''
+Module contains the routing index that finds the skill of a request
+'''
+import itertools
+from typing import Dict, Iterable, List, Optional, Tuple
+from ner.ner_result import NerResult
+from nlp.nlp_skill import NlpSkill
+
+
+class NlpSkillRouter:
+    """
+    A routing index compiled from the ROUTES of the skills.
+
+    Every route is stored under its (thing, action, attribute) key, with None for the fields
+    it does not restrict. A request is looked up under the 8 keys of each of its
+    (thing, action, attribute) combinations, with the fields replaced by None in every
+    possible way, so the cost of a lookup does not depend on the number of skills or routes.
+    The matches are memoized by the entity names of the request, so repeated requests cost
+    one dictionary lookup.
+
+    The skill whose route restricts the most fields wins. Skills with equally specific
+    routes are compared by route_score, then by registration order.
+
+    Methods:
+    - find: Returns the skill of a request, None if no route matches.
+    - routes: Returns the number of compiled routes.
+    """
+
+    # Which fields of a request a lookup key keeps, most specific first
+    _MASKS: Tuple[Tuple[bool, ...], ...] = tuple(itertools.product((True, False), repeat=3))
+
+    def __init__(self, skills: Iterable[NlpSkill]) -> None:
+        """
+        Compiles the routes of the handlers of the skills.
+
+        Args:
+        - skills (Iterable[NlpSkill]): The top level skills of the orchestrator.
+        """
+        self._index: Dict[Tuple[Optional[str], ...], List[NlpSkill]] = {}
+        self._order: Dict[NlpSkill, int] = {}
+        self._route_count = 0
+        # Best matching handlers by the (thing, action, attribute) names of a request. The
+        # names are default names of the vocabulary, so the number of entries is bounded
+        self._matches: Dict[tuple, Tuple[NlpSkill, ...]] = {}
+        for skill in skills:
+            for handler in skill.handlers():
+                self._order.setdefault(handler, len(self._order))
+                for route in handler.ROUTES:
+                    key = tuple(field.lower() if field else None for field in route)
+                    handlers = self._index.setdefault(key, [])
+                    if handler not in handlers:
+                        handlers.append(handler)
+                        self._route_count += 1
+
+    @staticmethod
+    def _names(names: Optional[Tuple[str, ...]]) -> List[Optional[str]]:
+        """Returns the distinct lowercase names of an entity type, [None] if there are none."""
+        return list(dict.fromkeys(name.lower() for name in names)) if names else [None]
+
+    def find(self, ner_result: NerResult, utterance: str) -> Optional[NlpSkill]:
+        """
+        Returns the skill of a request.
+
+        Args:
+        - ner_result (NER_result): The result of named entity recognition.
+        - utterance (str): The original user input.
+
+        Returns:
+        - NlpSkill | None: The skill with the most specific matching route, None if no
+          route matches.
+        """
+        request = (ner_result.thing, ner_result.action, ner_result.attribute)
+        matches = self._matches.get(request)
+        if matches is None:
+            matches = self._matches.setdefault(request, self._match(*request))
+        if len(matches) < 2:
+            return matches[0] if matches else None
+        return max(matches, key=lambda handler: (
+            handler.route_score(ner_result, utterance), -self._order[handler]))
+
+    def _match(
+        self,
+        things: Optional[Tuple[str, ...]],
+        actions: Optional[Tuple[str, ...]],
+        attributes: Optional[Tuple[str, ...]],
+    ) -> Tuple[NlpSkill, ...]:
+        """Returns the handlers with the most specific routes matching the entity names."""
+        specificity: Dict[NlpSkill, int] = {}
+        for request in itertools.product(
+            self._names(things), self._names(actions), self._names(attributes)
+        ):
+            for mask in self._MASKS:
+                key = tuple(field if keep else None for field, keep in zip(request, mask))
+                restricted = sum(field is not None for field in key)
+                for handler in self._index.get(key, ()):
+                    if restricted > specificity.get(handler, -1):
+                        specificity[handler] = restricted
+
+        if not specificity:
+            return ()
+        best = max(specificity.values())
+        return tuple(handler for handler, restricted in specificity.items() if restricted == best)
+
+    def routes(self) -> int:
+        """
+        Returns the number of compiled routes.
+
+        Returns:
+        - int: Routes in the index.
+        """
+        return self._route_count
@@ -1,6 +1,7 @@
 # pylint: disable=C0114
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Tuple, TYPE_CHECKING, Optional
+from typing import Any, Iterable, NamedTuple, Tuple, TYPE_CHECKING, Optional
 from ner.ner_result import NerResult
 from nlp.nlp_common import NlpResult
 
@@ -8,6 +9,21 @@ if TYPE_CHECKING:
     from vh_orchestrator import VHOrchestator
 
 
+class NlpRoute(NamedTuple):
+    """
+    A (thing, action, attribute) combination handled by a skill, see NlpSkill.ROUTES.
+
+    Attributes:
+    - thing (str | None): The thing, e.g. "light". None matches any thing.
+    - action (str | None): The action, e.g. "turn_on". None matches any action.
+    - attribute (str | None): The attribute, e.g. "brightness". None matches any attribute,
+      also none at all.
+    """
+    thing: Optional[str] = None
+    action: Optional[str] = None
+    attribute: Optional[str] = None
+
+
 class NlpSkill(ABC):
     """
     Abstract base class representing an NLP skill. Any specific NLP skill should subclass
@@ -18,12 +34,23 @@ class NlpSkill(ABC):
     2. Handling an utterance based on extracted entities.
     3. Initializing the child elements or processes specific to the skill.
 
+    Skills declare the requests they handle in ROUTES, which the orchestrator compiles into
+    a routing index (see nlp_router.NlpSkillRouter), so finding the skill of a request does
+    not depend on the number of skills. Skills without routes are found by their score.
+
     Methods:
     - request_handling_score: Returns a score indicating the suitability of the skill for handling a request.
     - handle_utterance: Processes the utterance and returns the result.
     - init_own_children: Initializes the child elements or processes specific to the skill.
+    - handlers: Returns the skills that handle requests for this skill, with their ROUTES.
+    - route_score: Breaks ties between skills with equally specific routes.
+    - execute_plan: Replays the plan of a result returned by handle_utterance.
+    - handle_utterance_async, execute_plan_async: Coroutines of the same, awaited by the server.
     """
 
+    # Requests handled by the skill, lowercase names as produced by the NER
+    ROUTES: Tuple[NlpRoute, ...] = ()
+
     @abstractmethod
     def request_handling_score(self, ner_result: NerResult, utterance: str) -> Tuple[Optional['NlpSkill'], float]:
         """
@@ -62,3 +89,75 @@ class NlpSkill(ABC):
         should be overridden to set up any child processes or data structures that 
         are unique to the specific NLP skill.
         """
+
+    def handlers(self) -> Iterable['NlpSkill']:
+        """
+        Returns the skills that handle the requests routed to this skill. Skills that
+        delegate to child skills return the children.
+
+        Returns:
+        - Iterable[NlpSkill]: The skills whose ROUTES are compiled into the routing index.
+        """
+        return (self,)
+
+    def route_score(self, ner_result: NerResult, utterance: str) -> float:  # pylint: disable=W0613
+        """
+        Returns a score to choose between skills whose routes match a request equally well.
+
+        Args:
+        - ner_result (NER_result): The result of named entity recognition.
+        - utterance (str): The original user input.
+
+        Returns:
+        - float: The score, higher is better. Defaults to 0.
+        """
+        return 0
+
+    def execute_plan(self, orchst: "VHOrchestator", plan: Any) -> NlpResult:
+        """
+        Replays the plan of a successful result of handle_utterance, see NlpResult.plan.
+        The orchestrator caches plans by utterance, so a repeated command skips the NER, the
+        skill lookup and the entity search. Only skills that set plans implement it.
+
+        Args:
+        - orchst (VHOrchestator): An instance of the orchestrator that manages multiple NLP skills.
+        - plan (Any): The plan of a previous result of the skill.
+
+        Returns:
+        - NLP_result: The result of executing the plan.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not replay plans")
+
+    async def handle_utterance_async(
+        self, orchst: "VHOrchestator", ner_result: NerResult, utterance: str
+    ) -> NlpResult:
+        """
+        Coroutine, processes the utterance like handle_utterance without blocking the event
+        loop. Skills that wait for I/O override it to await it; by default handle_utterance
+        runs in the default executor of the loop.
+
+        Args:
+        - orchst (VHOrchestator): An instance of the orchestrator that manages multiple NLP skills.
+        - ner_result (NER_result): The result of named entity recognition.
+        - utterance (str): The original user input.
+
+        Returns:
+        - NLP_result: The result of processing the utterance.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.handle_utterance, orchst, ner_result, utterance)
+
+    async def execute_plan_async(self, orchst: "VHOrchestator", plan: Any) -> NlpResult:
+        """
+        Coroutine, replays a plan like execute_plan without blocking the event loop, see
+        handle_utterance_async.
+
+        Args:
+        - orchst (VHOrchestator): An instance of the orchestrator that manages multiple NLP skills.
+        - plan (Any): The plan of a previous result of the skill.
+
+        Returns:
+        - NLP_result: The result of executing the plan.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.execute_plan, orchst, plan)
@@ -0,0 +1,349 @@
+'''
+Module with a local stand-in for the Home Assistant REST and websocket APIs
+
+It serves synthetic lights with the endpoints used by the HAS skills (states, light services)
+and the websocket state_changed subscription, so the orchestrator and the benchmarks can run
+without a Home Assistant instance. Point SECRETS.URL to http://127.0.0.1:8123/api and
+SECRETS.TOKEN to TOKEN to use it.
+'''
+import asyncio
+import json
+import random
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Optional
+from aiohttp import web, WSMsgType
+
+HOST = "127.0.0.1"
+PORT = 8123
+TOKEN = "mock-token"
+LIGHT_COUNT = 200
+LATENCY = 0.02  # Simulated processing time of every REST request, in seconds
+
+ROOMS = ["kitchen", "living_room", "bedroom", "kids_room", "office", "garage", "bathroom",
+         "upper_bathroom", "corridor", "entryway", "back_balcony", "wardrobe", "stairs"]
+KINDS = ["ceiling", "wall", "desk", "strip", "lamp", "spot", "night", "main"]
+SUPPORT_BRIGHTNESS = 1
+
+
+def make_state(entity_id: str, state: str, attributes: dict[str, Any]) -> dict[str, Any]:
+    '''
+    Build a state object as sent by Home Assistant.
+
+    Args:
+        entity_id (str): The entity_id.
+        state (str): The state, e.g. "on".
+        attributes (dict[str, Any]): The state attributes.
+
+    Returns:
+        dict[str, Any]: The state in the JSON format of the REST and websocket APIs.
+    '''
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "entity_id": entity_id,
+        "state": state,
+        "attributes": attributes,
+        "last_changed": now,
+        "last_updated": now,
+        "context": {"id": uuid.uuid4().hex, "parent_id": None, "user_id": None},
+    }
+
+
+def make_light_states(count: int, rng: random.Random) -> dict[str, dict[str, Any]]:
+    '''
+    Build the states of synthetic lights named like real installations.
+
+    Args:
+        count (int): Number of lights.
+        rng (random.Random): Random generator.
+
+    Returns:
+        dict[str, dict[str, Any]]: States by entity_id.
+    '''
+    states = {}
+    while len(states) < count:
+        room, kind = rng.choice(ROOMS), rng.choice(KINDS)
+        slug = f"{room}_{kind}_light"
+        if f"light.{slug}" in states:
+            slug += f"_{len(states)}"
+        entity_id = f"light.{slug}"
+        powered = rng.random() < 0.5
+        states[entity_id] = make_state(entity_id, "on" if powered else "off", {
+            "friendly_name": slug.replace("_", " ").title(),
+            "supported_features": SUPPORT_BRIGHTNESS,
+            "brightness": rng.randrange(1, 256) if powered else None,
+        })
+    return states
+
+
+def json_response(data: Any) -> web.Response:
+    '''Return a JSON response with the bare content type sent by Home Assistant.'''
+    return web.Response(body=json.dumps(data).encode(), content_type="application/json")
+
+
+class HaMockServer:
+    '''
+    A minimal Home Assistant API server.
+
+    REST: GET /api/, GET /api/states, GET/POST/DELETE /api/states/{entity_id} and
+    POST /api/services/light/{turn_on|turn_off|toggle}. Websocket: /api/websocket with
+    authentication, subscribe_events and get_states. Every state change is broadcast as a
+    state_changed event to the subscribers.
+
+    Attributes:
+        states (dict[str, dict]): The current states by entity_id.
+        latency (float): Delay added to every REST request, in seconds.
+        rest_requests (int): Number of REST requests served.
+        service_calls (int): Number of service calls served.
+    '''
+
+    def __init__(self, states: dict[str, dict[str, Any]], token: str = TOKEN,
+                 latency: float = 0.0) -> None:
+        '''
+        Initializes a new instance of the HaMockServer class.
+
+        Args:
+            states (dict[str, dict[str, Any]]): The initial states by entity_id.
+            token (str): The accepted access token.
+            latency (float): Delay added to every REST request, in seconds.
+        '''
+        self.states: dict[str, dict[str, Any]] = states
+        self.token: str = token
+        self.latency: float = latency
+        self.rest_requests: int = 0
+        self.service_calls: int = 0
+        self._subscribers: dict[web.WebSocketResponse, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def build_app(self) -> web.Application:
+        '''Returns the aiohttp application with all routes.'''
+        app = web.Application(middlewares=[self._rest_middleware])
+        app.router.add_get("/api/websocket", self._websocket)
+        app.router.add_get("/api/", self._api_running)
+        app.router.add_get("/api/states", self._get_states)
+        app.router.add_get("/api/states/{entity_id}", self._get_state)
+        app.router.add_post("/api/states/{entity_id}", self._post_state)
+        app.router.add_delete("/api/states/{entity_id}", self._delete_state)
+        app.router.add_post("/api/services/{domain}/{service}", self._call_service)
+        return app
+
+    async def start(self, host: str = HOST, port: int = PORT) -> web.AppRunner:
+        '''
+        Starts serving on the running event loop.
+
+        Args:
+            host (str): The host to bind.
+            port (int): The port to bind, 0 for a free port.
+
+        Returns:
+            web.AppRunner: The runner, call cleanup() on it to stop.
+        '''
+        self._loop = asyncio.get_running_loop()
+        runner = web.AppRunner(self.build_app())
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        return runner
+
+    def start_in_thread(self, host: str = HOST, port: int = 0) -> str:
+        '''
+        Starts serving on a daemon thread, for benchmarks with synchronous clients.
+
+        Args:
+            host (str): The host to bind.
+            port (int): The port to bind, 0 for a free port.
+
+        Returns:
+            str: The REST API URL, e.g. "http://127.0.0.1:8123/api".
+        '''
+        started = threading.Event()
+        address: list = []
+
+        def serve() -> None:
+            loop = asyncio.new_event_loop()
+            runner = loop.run_until_complete(self.start(host, port))
+            address.append(runner.addresses[0])
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=serve, name="HaMockServer", daemon=True).start()
+        started.wait()
+        return f"http://{address[0][0]}:{address[0][1]}/api"
+
+    def set_state(self, entity_id: str, state: Optional[str],
+                  attributes: Optional[dict[str, Any]] = None) -> None:
+        '''
+        Changes or removes a state from any thread and broadcasts the event.
+
+        Args:
+            entity_id (str): The entity_id.
+            state (str | None): The new state, None removes the entity.
+            attributes (dict[str, Any] | None): Attributes to update.
+        '''
+        assert self._loop is not None, "Server is not started"
+        asyncio.run_coroutine_threadsafe(
+            self._change(entity_id, state, attributes), self._loop).result()
+
+    @web.middleware
+    async def _rest_middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        '''Checks the bearer token and simulates the latency of REST requests.'''
+        if request.path == "/api/websocket":
+            return await handler(request)
+        if request.headers.get("Authorization") != f"Bearer {self.token}":
+            raise web.HTTPUnauthorized()
+        self.rest_requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    async def _api_running(self, _: web.Request) -> web.Response:
+        return json_response({"message": "API running."})
+
+    async def _get_states(self, _: web.Request) -> web.Response:
+        return json_response(list(self.states.values()))
+
+    async def _get_state(self, request: web.Request) -> web.Response:
+        state = self.states.get(request.match_info["entity_id"])
+        if state is None:
+            raise web.HTTPNotFound()
+        return json_response(state)
+
+    async def _post_state(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        new_state = await self._change(
+            request.match_info["entity_id"], str(body["state"]), body.get("attributes", {}))
+        return json_response(new_state)
+
+    async def _delete_state(self, request: web.Request) -> web.Response:
+        entity_id = request.match_info["entity_id"]
+        if entity_id not in self.states:
+            raise web.HTTPNotFound()
+        await self._change(entity_id, None, None)
+        return json_response({"message": "Entity removed."})
+
+    async def _call_service(self, request: web.Request) -> web.Response:
+        '''Turns lights on or off and changes their brightness, like the light integration.'''
+        domain, service = request.match_info["domain"], request.match_info["service"]
+        data = await request.json() if request.can_read_body else {}
+        self.service_calls += 1
+        if domain != "light" or service not in ("turn_on", "turn_off", "toggle"):
+            raise web.HTTPBadRequest(text=f"Service {domain}.{service} not found.")
+
+        entity_ids = data.get("entity_id", [])
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_id.strip() for entity_id in entity_ids.split(",")]
+        changed = []
+        for entity_id in entity_ids:
+            current = self.states.get(entity_id)
+            if current is None:
+                continue
+            attributes = dict(current["attributes"])
+            turn_on = service == "turn_on" or (service == "toggle" and current["state"] != "on")
+            if turn_on:
+                brightness = attributes.get("brightness") or 255
+                if "brightness_pct" in data:
+                    brightness = round(float(data["brightness_pct"]) * 255 / 100)
+                elif "brightness_step_pct" in data:
+                    brightness += round(float(data["brightness_step_pct"]) * 255 / 100)
+                brightness = max(0, min(255, brightness))
+                attributes["brightness"] = brightness or None
+                state = "on" if brightness else "off"
+            else:
+                attributes["brightness"] = None
+                state = "off"
+            changed.append(await self._change(entity_id, state, attributes))
+        return json_response(changed)
+
+    async def _change(self, entity_id: str, state: Optional[str],
+                      attributes: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+        '''Applies a state change and broadcasts the state_changed event.'''
+        old_state = self.states.get(entity_id)
+        new_state = None
+        if state is None:
+            self.states.pop(entity_id, None)
+        else:
+            merged = dict(old_state["attributes"]) if old_state else {}
+            merged.update(attributes or {})
+            new_state = make_state(entity_id, state, merged)
+            if old_state is not None and old_state["state"] == state:
+                new_state["last_changed"] = old_state["last_changed"]
+            self.states[entity_id] = new_state
+        await self._broadcast(entity_id, old_state, new_state)
+        return new_state
+
+    async def _broadcast(self, entity_id: str, old_state: Optional[dict],
+                         new_state: Optional[dict]) -> None:
+        '''Sends a state_changed event to every subscriber.'''
+        for websocket, subscription_id in list(self._subscribers.items()):
+            try:
+                await websocket.send_json({
+                    "id": subscription_id,
+                    "type": "event",
+                    "event": {
+                        "event_type": "state_changed",
+                        "data": {"entity_id": entity_id, "old_state": old_state,
+                                 "new_state": new_state},
+                        "origin": "LOCAL",
+                        "time_fired": datetime.now(timezone.utc).isoformat(),
+                    },
+                })
+            except ConnectionError:
+                self._subscribers.pop(websocket, None)
+
+    async def _websocket(self, request: web.Request) -> web.WebSocketResponse:
+        '''Serves the authentication, subscribe_events and get_states commands.'''
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        await websocket.send_json({"type": "auth_required", "ha_version": "mock"})
+        auth = await websocket.receive_json()
+        if auth.get("type") != "auth" or auth.get("access_token") != self.token:
+            await websocket.send_json({"type": "auth_invalid", "message": "Invalid access token"})
+            await websocket.close()
+            return websocket
+        await websocket.send_json({"type": "auth_ok", "ha_version": "mock"})
+
+        try:
+            async for frame in websocket:
+                if frame.type != WSMsgType.TEXT:
+                    break
+                message = frame.json()
+                reply: dict[str, Any] = {"id": message.get("id"), "type": "result", "success": True}
+                if message.get("type") == "subscribe_events":
+                    self._subscribers[websocket] = message["id"]
+                    reply["result"] = None
+                elif message.get("type") == "get_states":
+                    reply["result"] = list(self.states.values())
+                else:
+                    reply.update(success=False, error={
+                        "code": "unknown_command", "message": "Unknown command."})
+                await websocket.send_json(reply)
+        finally:
+            self._subscribers.pop(websocket, None)
+        return websocket
+
+
+async def serve() -> None:
+    '''Serves synthetic lights until interrupted.'''
+    server = HaMockServer(make_light_states(LIGHT_COUNT, random.Random(0)), latency=LATENCY)
+    runner = await server.start(HOST, PORT)
+    print(f"Mock Home Assistant with {LIGHT_COUNT} lights on http://{HOST}:{PORT}/api, "
+          f"token {TOKEN!r}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    '''
+    Main function to run the mock Home Assistant server
+    '''
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
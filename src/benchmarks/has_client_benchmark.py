@@ -0,0 +1,107 @@
+'''
+Module to benchmark the synchronous Home Assistant client against HasAsyncClient and HasStateCache
+'''
+import random
+import statistics
+import time
+from homeassistant_api import Client
+from nlp.has_skills.common_pkg.has_async_client import HasAsyncClient
+from nlp.has_skills.common_pkg.has_state_cache import HasStateCache
+from ha_mock_server import HaMockServer, TOKEN, make_light_states
+
+LIGHT_COUNT = 100
+REQUEST_COUNT = 64
+LATENCY = 0.02  # Simulated REST processing time, in seconds
+POOL_SIZES = (1, 4, 8, 16)
+READ_COUNT = 256
+HOT_ENTITY_COUNT = 8  # Entities read by the simulated satellites
+
+
+def report(label: str, samples: list[float], elapsed: float) -> None:
+    '''
+    Print one benchmark row.
+
+    Args:
+        label (str): Name of the client and mode.
+        samples (list[float]): Latency of every request, in seconds.
+        elapsed (float): Wall time of all requests, in seconds.
+    '''
+    print(f"{label:<32} {statistics.median(samples) * 1000:>8.1f} "
+          f"{REQUEST_COUNT / elapsed:>10.1f} {elapsed:>8.2f}")
+
+
+async def timed_call(client: HasAsyncClient, entity_id: str, samples: list[float]) -> None:
+    '''Call turn_on for an entity and record the latency.'''
+    start = time.perf_counter()
+    await client.trigger_service("light", "turn_on", entity_id=entity_id, brightness_pct=50)
+    samples.append(time.perf_counter() - start)
+
+
+def main():
+    '''
+    Main function to compare latency and throughput of light service calls
+    '''
+    rng = random.Random(0)
+    server = HaMockServer(make_light_states(LIGHT_COUNT, rng), latency=LATENCY)
+    api_url = server.start_in_thread()
+    entity_ids = [rng.choice(list(server.states)) for _ in range(REQUEST_COUNT)]
+
+    print(f"Service calls: {REQUEST_COUNT}, simulated latency: {LATENCY * 1000:.0f} ms")
+    print(f"{'client':<32} {'p50 ms':>8} {'calls/s':>10} {'wall s':>8}")
+
+    sync_client = Client(api_url, TOKEN, cache_session=False)
+    samples = []
+    start = time.perf_counter()
+    for entity_id in entity_ids:
+        call_start = time.perf_counter()
+        sync_client.trigger_service("light", "turn_on", entity_id=entity_id, brightness_pct=50)
+        samples.append(time.perf_counter() - call_start)
+    report("Client, sequential", samples, time.perf_counter() - start)
+
+    client = HasAsyncClient(api_url, TOKEN, max_connections=1)
+    client.start()
+    samples = []
+    start = time.perf_counter()
+    for entity_id in entity_ids:
+        client.run(timed_call(client, entity_id, samples))
+    report("HasAsyncClient, sequential", samples, time.perf_counter() - start)
+    client.close()
+
+    for pool_size in POOL_SIZES:
+        client = HasAsyncClient(api_url, TOKEN, max_connections=pool_size)
+        client.start()
+        samples = []
+        start = time.perf_counter()
+        client.run_all(timed_call(client, entity_id, samples) for entity_id in entity_ids)
+        report(f"HasAsyncClient, {pool_size} connections", samples, time.perf_counter() - start)
+        client.close()
+
+    # Concurrent reads of a few hot entities, with a write in the middle
+    hot_entities = entity_ids[:HOT_ENTITY_COUNT]
+    reads = [rng.choice(hot_entities) for _ in range(READ_COUNT)]
+    client = HasAsyncClient(api_url, TOKEN)
+    client.start()
+    print(f"\nState reads: {READ_COUNT} of {HOT_ENTITY_COUNT} entities")
+    print(f"{'reader':<32} {'upstream':>8} {'saved':>10} {'wall s':>8}")
+    requests_before = server.rest_requests
+    start = time.perf_counter()
+    client.run_all(client.get_state(entity_id) for entity_id in reads)
+    print(f"{'HasAsyncClient':<32} {server.rest_requests - requests_before:>8} {0:>10} "
+          f"{time.perf_counter() - start:>8.2f}")
+
+    cache = HasStateCache(client)
+    requests_before = server.rest_requests
+    start = time.perf_counter()
+    half = READ_COUNT // 2
+    client.run_all(cache.get_state(entity_id) for entity_id in reads[:half])
+    client.run(cache.trigger_service("light", "turn_off", entity_id=hot_entities[0]))
+    client.run_all(cache.get_state(entity_id) for entity_id in reads[half:])
+    stats = cache.stats()
+    print(f"{'HasStateCache':<32} {stats.upstream:>8} {stats.saved:>10} "
+          f"{time.perf_counter() - start:>8.2f}")
+    print(f"Cache stats: {stats}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
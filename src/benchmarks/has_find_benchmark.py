@@ -0,0 +1,133 @@
+'''
+Module to benchmark the entity scorers of the HAS skills on synthetic registries
+'''
+import random
+import time
+from typing import Any, NamedTuple
+from nlp.has_skills.common_pkg.has_common import HasFind, HasEntityIndex
+from nlp.has_skills.common_pkg.has_vector_find import HasVectorFind
+
+REGISTRY_SIZES = (1_000, 10_000, 100_000)
+QUERY_COUNT = 20
+BATCH_SIZE = 4
+
+ROOMS = ["kitchen", "living_room", "bedroom", "kids_room", "office", "garage", "bathroom",
+         "hall", "attic", "basement", "porch", "back_balcony", "dining_room", "guest_room"]
+KINDS = ["ceiling", "wall", "floor", "desk", "strip", "bulb", "lamp", "spot", "night", "main"]
+DOMAINS = ["light", "switch", "sensor", "climate", "cover"]
+
+
+class SyntheticState(NamedTuple):
+    '''State with the attributes read by the scorers.'''
+    attributes: dict[str, Any]
+
+
+class SyntheticEntity(NamedTuple):
+    '''Entity with the fields read by the scorers.'''
+    entity_id: str
+    state: SyntheticState
+
+
+def make_registry(size: int, rng: random.Random) -> dict[str, SyntheticEntity]:
+    '''
+    Build a registry of entities with realistic, unique ids and friendly names.
+
+    Args:
+        size (int): Number of entities.
+        rng (random.Random): Random generator.
+
+    Returns:
+        dict[str, SyntheticEntity]: Entities by slug, like Group.entities.
+    '''
+    registry = {}
+    while len(registry) < size:
+        room, kind, domain = rng.choice(ROOMS), rng.choice(KINDS), rng.choice(DOMAINS)
+        slug = f"{room}_{kind}_{domain}_{rng.randrange(size)}"
+        friendly_name = slug.replace("_", " ").title()
+        registry[slug] = SyntheticEntity(
+            f"{domain}.{slug}", SyntheticState({"friendly_name": friendly_name}))
+    return registry
+
+
+def make_queries(registry: dict[str, SyntheticEntity], rng: random.Random) -> list[str]:
+    '''
+    Build queries as slightly misspelled entity ids of the registry.
+
+    Args:
+        registry (dict[str, SyntheticEntity]): The registry.
+        rng (random.Random): Random generator.
+
+    Returns:
+        list[str]: QUERY_COUNT queries.
+    '''
+    queries = []
+    for entity in rng.sample(list(registry.values()), QUERY_COUNT):
+        position = rng.randrange(len(entity.entity_id))
+        queries.append(entity.entity_id[:position] + entity.entity_id[position + 1:])
+    return queries
+
+
+def timed(function, *args, **kwargs) -> tuple[Any, float]:
+    '''Call a function and return its result and the elapsed time in seconds.'''
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    '''
+    Main function to compare build and query times of HasFind, HasEntityIndex and HasVectorFind
+    '''
+    rng = random.Random(0)
+    print(f"{'entities':>9} {'scorer':<28} {'build s':>8} {'ms/query':>10} {'top-1 agree':>12}")
+    for size in REGISTRY_SIZES:
+        registry = make_registry(size, rng)
+        queries = make_queries(registry, rng)
+
+        scan_results, scan_time = timed(
+            lambda: [HasFind.find_candidates(query, registry) for query in queries])
+        scan_winners = [
+            max(candidates, key=lambda x: x["similarity"])["entity"] if candidates else None
+            for candidates in scan_results]
+        print(f"{size:>9} {'HasFind scan':<28} {'-':>8} {scan_time / QUERY_COUNT * 1000:>10.2f} {'-':>12}")
+
+        index, build_time = timed(HasEntityIndex, registry)
+        results, query_time = timed(
+            lambda: [index.find_candidates(query, top_k=1) for query in queries])
+        report(size, "HasEntityIndex top-1", build_time, query_time, results, scan_winners)
+
+        vector_find, build_time = timed(HasVectorFind, registry)
+        results, query_time = timed(
+            lambda: [vector_find.find_candidates(query, top_k=1) for query in queries])
+        report(size, "HasVectorFind top-1", build_time, query_time, results, scan_winners)
+
+        results, query_time = timed(lambda: [
+            candidates
+            for start in range(0, QUERY_COUNT, BATCH_SIZE)
+            for candidates in vector_find.find_candidates_batch(
+                queries[start:start + BATCH_SIZE], top_k=1)])
+        report(size, f"HasVectorFind batch of {BATCH_SIZE}", build_time, query_time, results,
+               scan_winners)
+
+
+def report(size: int, label: str, build_time: float, query_time: float,
+           results: list[list[dict[str, Any]]], scan_winners: list) -> None:
+    '''
+    Print one benchmark row.
+
+    Args:
+        size (int): Number of entities.
+        label (str): Name of the scorer.
+        build_time (float): Time to build the scorer, in seconds.
+        query_time (float): Time to answer all queries, in seconds.
+        results (list): Top-1 candidates of every query.
+        scan_winners (list): Winners of the HasFind scan, for the agreement rate.
+    '''
+    winners = [candidates[0]["entity"] if candidates else None for candidates in results]
+    agreement = sum(winner is scan for winner, scan in zip(winners, scan_winners)) / QUERY_COUNT
+    print(f"{size:>9} {label:<28} {build_time:>8.2f} {query_time / QUERY_COUNT * 1000:>10.2f} "
+          f"{agreement:>12.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+'''
+Module to benchmark orchestrator entity startup from Home Assistant against the registry snapshot
+'''
+import os
+import random
+import tempfile
+import threading
+import time
+from homeassistant_api import Client
+from nlp.has_skills.common_pkg.has_registry import HasEntityRegistry
+from nlp.has_skills.common_pkg.has_registry_snapshot import HasRegistrySnapshot
+from nlp.has_skills.common_pkg.has_state_mirror import HasStateMirror
+from ha_mock_server import HaMockServer, TOKEN, make_light_states
+
+LIGHT_COUNTS = (1_000, 10_000)
+LATENCY = 0.2  # Simulated REST processing time, in seconds
+
+
+def main():
+    '''
+    Main function to compare the time until the first request can be served, with and
+    without the snapshot, and the time the mirror needs to reconcile a stale snapshot
+    '''
+    rng = random.Random(0)
+    print(f"{'lights':>7} {'HA start s':>11} {'snapshot s':>11} {'size kB':>8} "
+          f"{'reconcile s':>12} {'same winner':>12}")
+    for light_count in LIGHT_COUNTS:
+        server = HaMockServer(make_light_states(light_count, rng), latency=LATENCY)
+        api_url = server.start_in_thread()
+        client = Client(api_url, TOKEN, cache_session=False)
+        query = "light.kitchen_ceiling_light"
+
+        start = time.perf_counter()
+        groups = client.get_entities()
+        registry = HasEntityRegistry(groups)
+        start_time = time.perf_counter() - start
+        expected = registry.find_candidates(query, "light", "kitchen", top_k=1)
+
+        path = os.path.join(tempfile.mkdtemp(), "entities.snapshot")
+        size = HasRegistrySnapshot.save(path, groups, registry)
+
+        # Home Assistant changes while the orchestrator is down
+        removed = next(iter(server.states))
+        server.set_state(removed, None)
+        server.set_state("light.garage_new_light", "on", {"friendly_name": "Garage New Light"})
+
+        start = time.perf_counter()
+        snapshot = HasRegistrySnapshot.load(path, client)
+        snapshot_time = time.perf_counter() - start
+        assert snapshot is not None, "Snapshot was rejected"
+        groups, registry = snapshot
+        found = registry.find_candidates(query, "light", "kitchen", top_k=1)
+        same = [c["entity"].entity_id for c in found] == [c["entity"].entity_id for c in expected]
+
+        resynced = threading.Event()
+        mirror = HasStateMirror(client, groups, registry, on_resync=resynced.set)
+        start = time.perf_counter()
+        mirror.start()
+        resynced.wait(30)
+        reconcile_time = time.perf_counter() - start
+        mirror.stop()
+        assert removed not in registry and "light.garage_new_light" in registry
+
+        print(f"{light_count:>7} {start_time:>11.3f} {snapshot_time:>11.3f} {size / 1000:>8.0f} "
+              f"{reconcile_time:>12.3f} {str(same):>12}")
+
+
+if __name__ == "__main__":
+    main()
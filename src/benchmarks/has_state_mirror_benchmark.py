@@ -0,0 +1,85 @@
+'''
+Module to benchmark state queries answered by HasStateMirror against REST requests
+'''
+import random
+import statistics
+import time
+from homeassistant_api import Client
+from nlp.has_skills.common_pkg.has_registry import HasEntityRegistry
+from nlp.has_skills.common_pkg.has_state_mirror import HasStateMirror
+from ha_mock_server import HaMockServer, TOKEN, make_light_states
+
+LIGHT_COUNT = 500
+QUERY_COUNT = 200
+EVENT_COUNT = 200
+LATENCY = 0.005  # Simulated REST processing time, in seconds
+
+
+def percentile_ms(samples: list[float], percent: int) -> float:
+    '''Return a percentile of samples in seconds, in milliseconds.'''
+    return statistics.quantiles(samples, n=100)[percent - 1] * 1000
+
+
+def main():
+    '''
+    Main function to compare the latency of state queries with and without the mirror,
+    and to measure how fast state changes reach the mirror
+    '''
+    rng = random.Random(0)
+    server = HaMockServer(make_light_states(LIGHT_COUNT, rng), latency=LATENCY)
+    api_url = server.start_in_thread()
+    client = Client(api_url, TOKEN, cache_session=False)
+    groups = client.get_entities()
+    registry = HasEntityRegistry(groups)
+    mirror = HasStateMirror(client, groups, registry)
+    mirror.start()
+    assert mirror.wait_until_live(10), "Mirror did not connect"
+
+    lights = list(groups["light"].entities.values())
+    queried = [rng.choice(lights) for _ in range(QUERY_COUNT)]
+
+    rest_samples = []
+    for entity in queried:
+        start = time.perf_counter()
+        entity.get_state()
+        rest_samples.append(time.perf_counter() - start)
+
+    requests_before = server.rest_requests
+    mirror_samples = []
+    for entity in queried:
+        start = time.perf_counter()
+        _ = mirror.get_state(entity.entity_id).state  # type: ignore
+        mirror_samples.append(time.perf_counter() - start)
+    mirror_requests = server.rest_requests - requests_before
+
+    # Time from the server side change to the change being visible in the group
+    event_samples = []
+    for _ in range(EVENT_COUNT):
+        entity = rng.choice(lights)
+        new_state = "off" if entity.state.state == "on" else "on"
+        start = time.perf_counter()
+        server.set_state(entity.entity_id, new_state)
+        while mirror.get_state(entity.entity_id).state != new_state:  # type: ignore
+            time.sleep(0)
+        event_samples.append(time.perf_counter() - start)
+
+    # Entities added and removed at runtime reach the groups and the registry
+    server.set_state("light.garage_new_strip_light", "on", {"friendly_name": "Garage New Strip"})
+    server.set_state(lights[0].entity_id, None)
+    time.sleep(0.2)
+    added = "light.garage_new_strip_light" in registry
+    removed = lights[0].entity_id not in registry
+    mirror.stop()
+
+    print(f"{'query':<22} {'p50 ms':>8} {'p95 ms':>8} {'REST requests':>14}")
+    print(f"{'REST get_state':<22} {percentile_ms(rest_samples, 50):>8.3f} "
+          f"{percentile_ms(rest_samples, 95):>8.3f} {QUERY_COUNT:>14}")
+    print(f"{'mirror get_state':<22} {percentile_ms(mirror_samples, 50):>8.4f} "
+          f"{percentile_ms(mirror_samples, 95):>8.4f} {mirror_requests:>14}")
+    print(f"{'event to mirror':<22} {percentile_ms(event_samples, 50):>8.3f} "
+          f"{percentile_ms(event_samples, 95):>8.3f} {'-':>14}")
+    print(f"Runtime entity added: {added}, removed: {removed}, stats: {mirror.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+'''
+Module to benchmark repeated commands with and without the plan cache of the orchestrator
+'''
+import random
+import statistics
+import time
+from typing import Optional
+from homeassistant_api import Client
+from vh_ner import VhNer
+import nlp.ner.config as cfg
+from nlp.ner.ner_result import NerResult
+from nlp.nlp_common import NlpResult
+from nlp.nlp_plan_cache import NlpPlan, NlpPlanCache
+from nlp.nlp_router import NlpSkillRouter
+from nlp.has_skills.has_lights import HasBase, HasLights  # pylint: disable=W0611
+from nlp.has_skills.common_pkg.has_registry import HasEntityRegistry
+from nlp.has_skills.common_pkg.has_state_mirror import HasStateMirror
+from nlp.has_skills.common_pkg.has_async_client import HasAsyncClient
+from nlp.has_skills.common_pkg.has_state_cache import HasStateCache
+from ha_mock_server import HaMockServer, TOKEN, ROOMS, make_light_states
+
+LIGHT_COUNT = 200
+LATENCY = 0.002  # Simulated processing time of every REST request, in seconds
+ROUNDS = 20  # Every command is repeated this many times
+COMMANDS = ([f"turn on the {room.replace('_', ' ')} lights" for room in ROOMS[:6]]
+            + [f"turn off {room.replace('_', ' ')} light" for room in ROOMS[:6]]
+            + ["turn on lights in kitchen and bathroom"])
+
+
+class BenchmarkOrchestrator:
+    '''The parts of VHOrchestator used by the skills, connected to the mock server.'''
+
+    def __init__(self, api_url: str) -> None:
+        self.ner = VhNer(cfg.PATH_TRAINED_MODEL)
+        self.hass_instance = Client(api_url, TOKEN, cache_session=False)
+        self.all_entities = self.hass_instance.get_entities()
+        self.ha_registry = HasEntityRegistry(self.all_entities)
+        self.ha_client = HasAsyncClient(api_url, TOKEN)
+        self.ha_client.start()
+        self.ha_state_cache = HasStateCache(self.ha_client)
+        self.ha_state_mirror = HasStateMirror(self.hass_instance, self.all_entities, self.ha_registry)
+        self.ha_state_mirror.start()
+        self.ha_state_mirror.wait_until_live(10)
+        skill = HasBase()
+        skill.init_own_children()
+        self.skill_router = NlpSkillRouter([skill])
+        self.plan_cache = NlpPlanCache(
+            lambda: self.ha_registry.version, (cfg.PATH_VOCAB, cfg.PATH_TRAINED_MODEL))
+
+    def process_uncached(self, utterance: str) -> Optional[NlpResult]:
+        '''Handle an utterance as VHOrchestator.process_request does without the plan cache.'''
+        ner_result = NerResult(utterance, self.ner.process_text(utterance))
+        skill = self.skill_router.find(ner_result, utterance)
+        return skill.handle_utterance(self, ner_result, utterance) if skill else None
+
+    def process(self, utterance: str) -> Optional[NlpResult]:
+        '''Handle an utterance as VHOrchestator.process_request does.'''
+        plan = self.plan_cache.get(utterance)
+        if plan is not None:
+            return plan.skill.execute_plan(self, plan.steps)
+        generation = self.plan_cache.generation
+        ner_result = NerResult(utterance, self.ner.process_text(utterance))
+        skill = self.skill_router.find(ner_result, utterance)
+        if skill is None:
+            return None
+        result = skill.handle_utterance(self, ner_result, utterance)
+        if result.plan is not None:
+            self.plan_cache.put(utterance, NlpPlan(skill, result.plan), generation)
+        return result
+
+
+def run(process, utterances: list[str]) -> tuple[list[float], list[str]]:
+    '''
+    Handle the utterances one after another.
+
+    Args:
+        process (Callable): The function handling an utterance.
+        utterances (list[str]): The utterances.
+
+    Returns:
+        tuple[list[float], list[str]]: The latency of every utterance, in seconds, and the
+        dialog of every utterance.
+    '''
+    samples, dialogs = [], []
+    for utterance in utterances:
+        start = time.perf_counter()
+        result = process(utterance)
+        samples.append(time.perf_counter() - start)
+        dialogs.append(result.dialog_to_say if result else "")
+    return samples, dialogs
+
+
+def report(label: str, samples: list[float]) -> None:
+    '''Print the p50/p95 latency of a run.'''
+    cuts = statistics.quantiles(samples, n=20)
+    print(f"{label:<28} {cuts[9] * 1000:>8.2f} {cuts[18] * 1000:>8.2f} "
+          f"{len(samples) / sum(samples):>10.1f}")
+
+
+def main():
+    '''
+    Main function to compare the end-to-end latency of repeated commands with and without
+    the plan cache
+    '''
+    rng = random.Random(0)
+    server = HaMockServer(make_light_states(LIGHT_COUNT, rng), latency=LATENCY)
+    orchestrator = BenchmarkOrchestrator(server.start_in_thread())
+    utterances = [command for _ in range(ROUNDS) for command in COMMANDS]
+    rng.shuffle(utterances)
+
+    print(f"Lights: {LIGHT_COUNT}, commands: {len(COMMANDS)}, requests: {len(utterances)}, "
+          f"simulated latency: {LATENCY * 1000:.0f} ms")
+    print(f"{'mode':<28} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>10}")
+
+    orchestrator.process_uncached(COMMANDS[0])  # Warm up
+    uncached, uncached_dialogs = run(orchestrator.process_uncached, utterances)
+    report("NER + skill every time", uncached)
+
+    cached, cached_dialogs = run(orchestrator.process, utterances)
+    report("plan cache", cached)
+    stats = orchestrator.plan_cache.stats()
+    print(f"Plans: {stats.size}, hit rate: {stats.hit_rate:.1%}, "
+          f"same dialogs: {uncached_dialogs == cached_dialogs}")
+
+    saved = statistics.median(uncached) - statistics.median(cached)
+    print(f"Median latency saved per request: {saved * 1000:.2f} ms")
+
+    # A registry change, e.g. a renamed entity, drops all plans
+    entity = next(iter(orchestrator.all_entities["light"].entities.values()))
+    orchestrator.ha_registry.add(entity)
+    orchestrator.process(COMMANDS[0])
+    stats = orchestrator.plan_cache.stats()
+    print(f"After a registry change: {stats.invalidations} invalidation(s), {stats.size} plan(s)")
+
+    orchestrator.ha_state_mirror.stop()
+    orchestrator.ha_client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+'''
+Module to benchmark skill lookup by scoring every skill against the compiled routing index
+'''
+import random
+import time
+from typing import Optional, Tuple
+from nlp.nlp_skill import NlpRoute, NlpSkill
+from nlp.nlp_router import NlpSkillRouter
+from nlp.ner.ner_result import NerResult, NerResultSingle
+
+SKILL_COUNTS = (1, 10, 50, 200)
+LOOKUP_COUNT = 20_000
+ACTIONS = ["turn_on", "turn_off", "binary_query", "adjust", "information_query"]
+ATTRIBUTES = ["brightness", "temperature", "color"]
+
+
+class SyntheticSkill(NlpSkill):
+    '''Skill of one thing, scored like HasLights.'''
+
+    def __init__(self, thing: str) -> None:
+        self.thing = thing
+        self.ROUTES = tuple(  # pylint: disable=C0103
+            [NlpRoute(thing, action) for action in ACTIONS[:3]]
+            + [NlpRoute(thing, action, attribute)
+               for action in ACTIONS[3:] for attribute in ATTRIBUTES])
+
+    def request_handling_score(
+        self, ner_result: NerResult, utterance: str
+    ) -> Tuple[Optional[NlpSkill], float]:
+        score = 100 if self.thing in ner_result.thing else 0  # type: ignore
+        return (self, score) if score else (None, 0)
+
+    def handle_utterance(self, orchst, ner_result, utterance):
+        raise NotImplementedError
+
+    def init_own_children(self) -> None:
+        pass
+
+
+def find_by_score(skills: list[SyntheticSkill], ner_result: NerResult) -> Optional[NlpSkill]:
+    '''Find the skill as VHOrchestator._find_skill does without the routing index.'''
+    scores = {}
+    for skill in skills:
+        result_skill, score = skill.request_handling_score(ner_result, "")
+        if result_skill is not None:
+            scores[result_skill] = score
+    return max(scores, key=lambda skill: scores[skill], default=None)
+
+
+def main():
+    '''
+    Main function to compare the lookup time of both methods for a growing number of skills
+    '''
+    rng = random.Random(0)
+    print(f"{'skills':>7} {'routes':>7} {'scoring us':>11} {'router us':>10} {'same':>5}")
+    for skill_count in SKILL_COUNTS:
+        skills = [SyntheticSkill(f"thing_{index}") for index in range(skill_count)]
+        router = NlpSkillRouter(skills)
+        requests = []
+        for _ in range(LOOKUP_COUNT):
+            action = rng.choice(ACTIONS)
+            requests.append(NerResultSingle("", "", {
+                "thing": (rng.choice(skills).thing,),
+                "action": (action,),
+                "attribute": (rng.choice(ATTRIBUTES),) if action in ACTIONS[3:] else None,
+            }))
+
+        start = time.perf_counter()
+        scored = [find_by_score(skills, request) for request in requests]
+        scoring_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # Requests matching no route are scored, as in VHOrchestator._find_skill
+        routed = [router.find(request, "") or find_by_score(skills, request)
+                  for request in requests]
+        router_time = time.perf_counter() - start
+
+        print(f"{skill_count:>7} {router.routes():>7} "
+              f"{scoring_time / LOOKUP_COUNT * 1e6:>11.2f} "
+              f"{router_time / LOOKUP_COUNT * 1e6:>10.2f} {str(scored == routed):>5}")
+
+
+if __name__ == "__main__":
+    main()
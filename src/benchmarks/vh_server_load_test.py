@@ -0,0 +1,123 @@
+'''
+Module to load test a running orchestrator server and find its saturation throughput
+'''
+import asyncio
+import itertools
+import time
+import aiohttp
+
+SERVER_URL = "http://127.0.0.1:8765"
+TRANSPORT = "http"  # "http" for POST /api/utterance, "websocket" for /api/websocket
+CONCURRENCY_LEVELS = (1, 2, 4, 8, 16, 32, 64, 128)
+LEVEL_DURATION = 5.0  # Seconds of load per concurrency level
+SATURATION_GAIN = 0.05  # Throughput is saturated when doubling clients gains less than this
+UTTERANCES = (
+    "turn on lights in office",
+    "turn off kitchen light",
+    "set brightness of ceiling light in office to 50 percent",
+    "is the light in bathroom on",
+    "turn on lights in kitchen and bathroom",
+    "what is the brightness of bedroom light",
+)
+
+
+async def http_client(session: aiohttp.ClientSession, utterances, deadline: float,
+                      latencies: list[float], errors: list[str]) -> None:
+    '''Send utterances one after another over keep-alive HTTP until the deadline.'''
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        async with session.post(f"{SERVER_URL}/api/utterance",
+                                json={"utterance": next(utterances)}) as response:
+            body = await response.json()
+        if response.status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(body.get("error", str(response.status)))
+
+
+async def websocket_client(session: aiohttp.ClientSession, utterances, deadline: float,
+                           latencies: list[float], errors: list[str]) -> None:
+    '''Send utterances one after another over one websocket until the deadline.'''
+    async with session.ws_connect(f"{SERVER_URL}/api/websocket") as websocket:
+        for request_id in itertools.count():
+            if time.perf_counter() >= deadline:
+                break
+            start = time.perf_counter()
+            await websocket.send_json({"id": request_id, "utterance": next(utterances)})
+            body = await websocket.receive_json()
+            if "error" in body:
+                errors.append(body["error"])
+            else:
+                latencies.append(time.perf_counter() - start)
+
+
+async def run_level(concurrency: int) -> tuple[float, list[float], list[str]]:
+    '''
+    Run one concurrency level.
+
+    Args:
+        concurrency (int): Number of clients, each waits for its result before the next request.
+
+    Returns:
+        tuple[float, list[float], list[str]]: Completed requests per second, the latencies
+        in seconds and the errors.
+    '''
+    client = websocket_client if TRANSPORT == "websocket" else http_client
+    latencies: list[float] = []
+    errors: list[str] = []
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        deadline = start + LEVEL_DURATION
+        await asyncio.gather(*(
+            # Every client starts at another utterance
+            client(session, itertools.islice(itertools.cycle(UTTERANCES), index, None),
+                   deadline, latencies, errors)
+            for index in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies, errors
+
+
+def percentile(samples: list[float], q: float) -> float:
+    '''Return the q quantile of the samples in milliseconds, 0 if there are none.'''
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000
+
+
+async def run() -> None:
+    '''Run all concurrency levels and report the saturation throughput.'''
+    print(f"Server: {SERVER_URL} ({TRANSPORT}), {LEVEL_DURATION:.0f} s per level")
+    print(f"{'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    best_throughput, best_concurrency = 0.0, 0
+    saturation = None
+    previous = (0.0, 0)
+    for concurrency in CONCURRENCY_LEVELS:
+        throughput, latencies, errors = await run_level(concurrency)
+        print(f"{concurrency:>8} {throughput:>9.1f} {percentile(latencies, 0.5):>8.1f} "
+              f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f} "
+              f"{len(errors):>7}")
+        if throughput > best_throughput:
+            best_throughput, best_concurrency = throughput, concurrency
+        # The first level after which more clients add latency but no throughput
+        if saturation is None and previous[0] and throughput < previous[0] * (1 + SATURATION_GAIN):
+            saturation = previous
+        previous = (throughput, concurrency)
+    print(f"Peak throughput: {best_throughput:.1f} req/s with {best_concurrency} clients")
+    if saturation is not None:
+        print(f"Saturation throughput: {saturation[0]:.1f} req/s, reached with "
+              f"{saturation[1]} clients")
+    else:
+        print("Not saturated, add concurrency levels")
+
+
+def main():
+    '''
+    Main function to load test the server started by vh_server.py
+    '''
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
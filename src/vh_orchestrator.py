@@ -1,17 +1,27 @@
 # pylint: disable=C0114
-from typing import Optional
+import os
+from typing import Optional, Tuple
 from vh_ner import VhNer, VhProcessedText
 from homeassistant_api import Client
 from homeassistant_api.models import Group
 from ner_result import NerResult
 from nlp_skill import NlpSkill
 from nlp_common import NlpResult, NlpResultStatus
-from nlp.ner.config import PATH_TRAINED_MODEL
+from nlp.ner.config import (
+    PATH_TRAINED_MODEL, PATH_NER_SNAPSHOT, PATH_HAS_SNAPSHOT, PATH_VOCAB, HAS_ENTITY_SCORER)
+from nlp.nlp_metrics import METRICS
+from nlp.nlp_router import NlpSkillRouter
+from nlp.nlp_plan_cache import NlpPlan, NlpPlanCache
 
 import SECRETS as sec
 
 # Import all skills endpoint classes to register
 from nlp.has_skills.has_lights import HasBase, HasLights # pylint: disable=C0412, disable=W0611
+from nlp.has_skills.common_pkg.has_registry import HasEntityRegistry
+from nlp.has_skills.common_pkg.has_registry_snapshot import HasRegistrySnapshot
+from nlp.has_skills.common_pkg.has_state_mirror import HasStateMirror
+from nlp.has_skills.common_pkg.has_async_client import HasAsyncClient
+from nlp.has_skills.common_pkg.has_state_cache import HasStateCache
 
 # Custom exceptions
 class NERProcessingError(Exception):
@@ -40,19 +50,63 @@ class VHOrchestator:
     NEED_MORE_INFO_DIALOG = "Can you provide more information?"
     DEFAULT_DIALOG = "I'm sorry, an unexpected error occurred."
 
-    def __init__(self) -> None:
+    # Default port of the Prometheus endpoint with the stage latencies, see nlp_metrics
+    METRICS_PORT = 9464
+
+    def __init__(self, metrics_port: Optional[int] = METRICS_PORT) -> None:
         """
         Initializes the VHOrchestrator with instances of VH_NER for Named Entity Recognition,
         Home Assistant Client, and setups dictionaries for entities and skills.
+
+        Args:
+            metrics_port (int | None): Port of the Prometheus endpoint, 0 for a free port.
+                None starts no endpoint, e.g. when the server exposes /metrics itself.
+                Defaults to METRICS_PORT.
         """
-        # Instance of VH_NER for Named Entity Recognition
-        self.ner: VhNer = VhNer(PATH_TRAINED_MODEL)
+        # Instance of VH_NER for Named Entity Recognition, loaded from the snapshot if
+        # it is up to date and warmed up in the background
+        self.ner: VhNer = VhNer(PATH_TRAINED_MODEL, lazy=True, stage_observer=METRICS.observe)
+        if os.path.exists(PATH_NER_SNAPSHOT):
+            try:
+                with open(PATH_NER_SNAPSHOT, "rb") as file:
+                    loaded = self.ner.from_bytes(file.read())
+            except OSError as error:
+                print(f"NER snapshot could not be read: {error}")
+                loaded = False
+            if not loaded:
+                # The warm-up loads the model with spacy.load instead
+                print("NER snapshot not used, loading the model")
+        self.ner.warm_up()
         # Instance of Home Assistant Client
         self.hass_instance: Client = Client(sec.URL, sec.TOKEN)
-        # Dictionary containing all entities from Home Assistant
-        self.all_entities: dict[str, Group] = self.hass_instance.get_entities()
+        # Asyncio client with a keep-alive connection pool for service calls and state reads
+        self.ha_client: HasAsyncClient = HasAsyncClient(sec.URL, sec.TOKEN)
+        self.ha_client.start()
+        # Coalesces state reads and caches them briefly, service calls invalidate their targets
+        self.ha_state_cache: HasStateCache = HasStateCache(self.ha_client)
+        # Dictionary containing all entities from Home Assistant, and the entities partitioned
+        # by domain and location with a fuzzy search index per partition. Restored from the
+        # snapshot if there is one, so startup does not wait for Home Assistant
+        try:
+            snapshot = HasRegistrySnapshot.load(PATH_HAS_SNAPSHOT, self.hass_instance)
+        except OSError as error:
+            print(f"Registry snapshot could not be read: {error}")
+            snapshot = None
+        if snapshot is not None:
+            self.all_entities: dict[str, Group] = snapshot[0]
+            self.ha_registry: HasEntityRegistry = snapshot[1]
+            self.ha_registry.scorer = HAS_ENTITY_SCORER
+        else:
+            self.all_entities = self.ha_client.run(self.ha_client.get_entities(self.hass_instance))
+            self.ha_registry = HasEntityRegistry(self.all_entities, scorer=HAS_ENTITY_SCORER)
         # Dictionary containing all light entities
         self.ha_entity_group_lights: Group = self.all_entities["light"]
+        # Keeps the entity groups and the registry current from the Home Assistant event stream.
+        # Its first resync reconciles a snapshot with Home Assistant, every resync saves one
+        self.ha_state_mirror: HasStateMirror = HasStateMirror(
+            self.hass_instance, self.all_entities, self.ha_registry,
+            on_resync=self.save_registry_snapshot)
+        self.ha_state_mirror.start()
         # All child classes instances that inherit from NLPSkills
 
         #self.nlp_skills_dict = {
@@ -65,11 +119,38 @@ class VHOrchestator:
 
         for skill in self.nlp_skills_dict.values():
             skill.init_own_children()
+        # Routing index compiled from the routes declared by the skills
+        self.skill_router: NlpSkillRouter = NlpSkillRouter(self.nlp_skills_dict.values())
+        # Resolved service calls of successful commands by utterance, invalidated when the
+        # entities, the vocabulary or the model change
+        self.plan_cache: NlpPlanCache = NlpPlanCache(
+            lambda: self.ha_registry.version, (PATH_VOCAB, PATH_TRAINED_MODEL))
+        METRICS.add_gauge(
+            "vh_plan_cache_hit_ratio", "Fraction of commands replayed from the plan cache.",
+            lambda: self.plan_cache.stats().hit_rate)
+
+        # Latency histograms of the request stages, pulled from
+        # http://localhost:<metrics_port>/metrics. A busy port must not prevent the startup
+        if metrics_port is not None:
+            try:
+                METRICS.serve(metrics_port)
+            except OSError as error:
+                print(f"Metrics endpoint not started on port {metrics_port}: {error}")
+
+    def save_registry_snapshot(self) -> None:
+        """
+        Saves the entity groups and the registry to the snapshot loaded on the next startup.
+        """
+        try:
+            HasRegistrySnapshot.save(PATH_HAS_SNAPSHOT, self.all_entities, self.ha_registry)
+        except OSError as error:
+            print(f"Registry snapshot was not saved: {error}")
 
     def _find_skill(self, utterance: str, ner_result: NerResult) -> Optional[NlpSkill]:
         """
         Evaluates the user's utterance and NER results to determine which skill is best
-        suited to handle the request.
+        suited to handle the request. The skill is looked up in the routing index, requests
+        that match no route are scored by every skill.
 
         Args:
             utterance (str): The user's spoken phrase.
@@ -78,6 +159,10 @@ class VHOrchestator:
         Returns:
             Optional[NLPSkill]: The skill determined to be the best fit for the utterance or None if no skill is found.
         """
+        routed_skill = self.skill_router.find(ner_result, utterance)
+        if routed_skill is not None:
+            return routed_skill
+
         skills_score: dict[NlpSkill, float] = {}
 
         for skill_instance in self.nlp_skills_dict.values():
@@ -94,43 +179,38 @@ class VHOrchestator:
 
         return max_score_skill
 
-    def _send_response(self, response: NlpResult):
+    def _resolve_dialog(self, response: NlpResult) -> NlpResult:
         """
-        Evaluates the result of the skill's processing to determine and send the appropriate
-        dialog response.
+        Replaces a missing dialog of the skill's result with the default dialog of its status.
 
         Args:
             response (NLP_result): The results after processing by the selected skill.
+
+        Returns:
+            NLP_result: The same result, with the dialog to say.
         """
+        default_dialogs = {
+            NlpResultStatus.UNKNOWN: self.UNKNOWN_DIALOG,
+            NlpResultStatus.SUCCESS: self.SUCCESS_DIALOG,
+            NlpResultStatus.FAILURE: self.FAILURE_DIALOG,
+            NlpResultStatus.NOT_FOUND: self.NOT_FOUND_DIALOG,
+            NlpResultStatus.NO_RESPONSE: self.NO_RESPONSE_DIALOG,
+            NlpResultStatus.UNKNOWN_ENTITY: self.UNKNOWN_ENTITY_DIALOG,
+            NlpResultStatus.UNKNOWN_ACTION: self.UNKNOWN_ACTION_DIALOG,
+            NlpResultStatus.NEED_MORE_INFO: self.NEED_MORE_INFO_DIALOG,
+        }
+        if not response.dialog_to_say:
+            response.dialog_to_say = default_dialogs.get(response.status, self.DEFAULT_DIALOG)
+        return response
 
-        # 10
-        if response.status == NlpResultStatus.UNKNOWN:
-            VHOrchestator.say_dialog_stub(
-                response.dialog_to_say if response.dialog_to_say else self.UNKNOWN_DIALOG)
-        elif response.status == NlpResultStatus.SUCCESS:
-            VHOrchestator.say_dialog_stub(
-                response.dialog_to_say if response.dialog_to_say else self.SUCCESS_DIALOG)
-        elif response.status == NlpResultStatus.FAILURE:
-            VHOrchestator.say_dialog_stub(
-                response.dialog_to_say if response.dialog_to_say else self.FAILURE_DIALOG)
-        elif response.status == NlpResultStatus.NOT_FOUND:
-            VHOrchestator.say_dialog_stub(
-                response.dialog_to_say if response.dialog_to_say else self.NOT_FOUND_DIALOG)
-        elif response.status == NlpResultStatus.NO_RESPONSE:
-            VHOrchestator.say_dialog_stub(
-                response.dialog_to_say if response.dialog_to_say else self.NO_RESPONSE_DIALOG)
-        elif response.status == NlpResultStatus.UNKNOWN_ENTITY:
-            VHOrchestator.say_dialog_stub(
-                response.dialog_to_say if response.dialog_to_say else self.UNKNOWN_ENTITY_DIALOG)
-        elif response.status == NlpResultStatus.UNKNOWN_ACTION:
-            VHOrchestator.say_dialog_stub(
-                response.dialog_to_say if response.dialog_to_say else self.UNKNOWN_ACTION_DIALOG)
-        elif response.status == NlpResultStatus.NEED_MORE_INFO:
-            VHOrchestator.say_dialog_stub(
-                response.dialog_to_say if response.dialog_to_say else self.NEED_MORE_INFO_DIALOG)
-        else:
-            VHOrchestator.say_dialog_stub(
-                response.dialog_to_say if response.dialog_to_say else self.DEFAULT_DIALOG)
+    def _send_response(self, response: NlpResult):
+        """
+        Sends the dialog of the result to the user.
+
+        Args:
+            response (NLP_result): The result returned by process_request.
+        """
+        VHOrchestator.say_dialog_stub(response.dialog_to_say)
 
     @staticmethod
     def say_dialog_stub(dialog: str):
@@ -142,57 +222,214 @@ class VHOrchestator:
         """
         print(f"Dialog stub: {dialog} ")
 
-    def _run_request(self, utterance: str) -> None:
+    def process_request(self, utterance: str, verbose: bool = False) -> NlpResult:
         """
-        Processes the provided request,
-        finds the appropriate handler for it and handles the utterance.
+        Processes the provided request, finds the appropriate handler for it and handles
+        the utterance. The dialog is returned, not said.
 
         Args:
             utterance (str): The utterance to be processed.
+            verbose (bool): If True, print the NER result. Defaults to False.
 
-        Raises:
-            NERProcessingError: If the NER processing fails.
-            SkillNotFoundError: If the skill was not found.
-
+        Returns:
+            NLP_result: The result with the dialog to say.
         """
-        try:
-            # 10. Perform NER analysis
+        # 5. Replay the plan of a repeated command
+        cached_result = self.execute_cached_plan(utterance)
+        if cached_result is not None:
+            return cached_result
+        plan_generation = self.plan_cache.generation
+
+        # 10. Perform NER analysis
+        with METRICS.timer("ner"):
             ner_raw_result: VhProcessedText = self.ner.process_text(utterance)
-            if not ner_raw_result.named_entities:
-                raise NERProcessingError("NER processing failed")
+        return self.handle_processed_text(utterance, ner_raw_result, verbose, plan_generation)
 
-            text_process_result: NerResult = NerResult(
-                utterance, ner_raw_result)
-            print(f"ner_result: {text_process_result}")
+    def execute_cached_plan(self, utterance: str) -> Optional[NlpResult]:
+        """
+        Replays the cached plan of an utterance, the service calls it resolved to last time,
+        without the NER, the skill lookup and the entity search.
 
-            # 20. Find best skill to handle utterance
-            skill_to_call: Optional[NlpSkill] = self._find_skill(
-                utterance, text_process_result)
-            if not skill_to_call:
-                raise SkillNotFoundError("Skill was not found")
+        Args:
+            utterance (str): The utterance to be processed.
 
-            # 30. Call best skill to handle utterance
+        Returns:
+            Optional[NLP_result]: The result with the dialog to say, None if the utterance has
+            no cached plan.
+        """
+        plan: Optional[NlpPlan] = self.plan_cache.get(utterance)
+        if plan is None:
+            return None
+        with METRICS.timer("plan_replay"):
+            return self._resolve_dialog(plan.skill.execute_plan(self, plan.steps))
+
+    async def execute_cached_plan_async(self, utterance: str) -> Optional[NlpResult]:
+        """
+        Coroutine, replays the cached plan of an utterance like execute_cached_plan and
+        awaits its service calls. Called by the server.
+
+        Args:
+            utterance (str): The utterance to be processed.
+
+        Returns:
+            Optional[NLP_result]: The result with the dialog to say, None if the utterance has
+            no cached plan.
+        """
+        plan: Optional[NlpPlan] = self.plan_cache.get(utterance)
+        if plan is None:
+            return None
+        with METRICS.timer("plan_replay"):
+            return self._resolve_dialog(await plan.skill.execute_plan_async(self, plan.steps))
+
+    def handle_processed_text(
+        self,
+        utterance: str,
+        ner_raw_result: VhProcessedText,
+        verbose: bool = False,
+        plan_generation: Optional[int] = None,
+    ) -> NlpResult:
+        """
+        Handles an utterance already processed by the NER, see process_request. Called by
+        the server, which runs the NER separately.
+
+        Args:
+            utterance (str): The utterance.
+            ner_raw_result (VhProcessedText): The NER result of the utterance.
+            verbose (bool): If True, print the NER result. Defaults to False.
+            plan_generation (Optional[int]): The plan cache generation read before the NER.
+                If given, the plan of a successful command is cached. Defaults to None.
+
+        Returns:
+            NLP_result: The result with the dialog to say. UNKNOWN if the NER found nothing,
+            UNKNOWN_ACTION if no skill handles the utterance.
+        """
+        try:
+            text_process_result, skill_to_call = self._route(utterance, ner_raw_result, verbose)
+        except (NERProcessingError, SkillNotFoundError) as exception:
+            return self._unhandled(exception, verbose)
+
+        # 30. Call best skill to handle utterance
+        with METRICS.timer("skill"):
             action_to_perform: NlpResult = skill_to_call.handle_utterance(
                 self, text_process_result, utterance
             )
+        return self._finish(utterance, skill_to_call, action_to_perform, plan_generation)
+
+    async def handle_processed_text_async(
+        self,
+        utterance: str,
+        ner_raw_result: VhProcessedText,
+        plan_generation: Optional[int] = None,
+    ) -> NlpResult:
+        """
+        Coroutine, handles an utterance already processed by the NER like
+        handle_processed_text. The skill awaits Home Assistant, so the event loop of the
+        server handles other requests meanwhile.
 
-            # 50. Speak dialog
-            self._send_response(action_to_perform)
+        Args:
+            utterance (str): The utterance.
+            ner_raw_result (VhProcessedText): The NER result of the utterance.
+            plan_generation (Optional[int]): The plan cache generation read before the NER,
+                see handle_processed_text. Defaults to None.
 
+        Returns:
+            NLP_result: The result with the dialog to say, see handle_processed_text.
+        """
+        try:
+            text_process_result, skill_to_call = self._route(utterance, ner_raw_result, False)
         except (NERProcessingError, SkillNotFoundError) as exception:
+            return self._unhandled(exception, False)
+
+        # 30. Call best skill to handle utterance
+        with METRICS.timer("skill"):
+            action_to_perform: NlpResult = await skill_to_call.handle_utterance_async(
+                self, text_process_result, utterance
+            )
+        return self._finish(utterance, skill_to_call, action_to_perform, plan_generation)
+
+    def _route(
+        self, utterance: str, ner_raw_result: VhProcessedText, verbose: bool
+    ) -> Tuple[NerResult, NlpSkill]:
+        """
+        Builds the NER result of an utterance and finds the skill to handle it.
+
+        Raises:
+            NERProcessingError: If the NER found nothing.
+            SkillNotFoundError: If no skill handles the utterance.
+        """
+        if not ner_raw_result.named_entities:
+            raise NERProcessingError("NER processing failed")
+
+        text_process_result: NerResult = NerResult(
+            utterance, ner_raw_result)
+        if verbose:
+            print(f"ner_result: {text_process_result}")
+
+        # 20. Find best skill to handle utterance
+        with METRICS.timer("skill_lookup"):
+            skill_to_call: Optional[NlpSkill] = self._find_skill(
+                utterance, text_process_result)
+        if not skill_to_call:
+            raise SkillNotFoundError("Skill was not found")
+        return text_process_result, skill_to_call
+
+    def _unhandled(self, exception: Exception, verbose: bool) -> NlpResult:
+        """Returns the result of an utterance that no skill handled, see _route."""
+        if verbose:
             print(exception)
+        if isinstance(exception, NERProcessingError):
+            return self._resolve_dialog(NlpResult(NlpResultStatus.UNKNOWN, self.UNKNOWN_DIALOG))
+        return self._resolve_dialog(
+            NlpResult(NlpResultStatus.UNKNOWN_ACTION, self.UNKNOWN_ACTION_DIALOG))
+
+    def _finish(
+        self,
+        utterance: str,
+        skill_to_call: NlpSkill,
+        action_to_perform: NlpResult,
+        plan_generation: Optional[int],
+    ) -> NlpResult:
+        """Caches the plan of a successful command and chooses the dialog."""
+        if plan_generation is not None and action_to_perform.plan is not None:
+            self.plan_cache.put(
+                utterance, NlpPlan(skill_to_call, action_to_perform.plan), plan_generation)
+
+        # 40. Choose dialog
+        return self._resolve_dialog(action_to_perform)
+
+    def _run_request(self, utterance: str) -> None:
+        """
+        Processes the provided request and says its dialog.
+
+        Args:
+            utterance (str): The utterance to be processed.
+        """
+        with METRICS.timer("request"):
+            action_to_perform: NlpResult = self.process_request(utterance, verbose=True)
+
+            # 50. Speak dialog
+            with METRICS.timer("response"):
+                self._send_response(action_to_perform)
 
     def test_mode(self) -> None:
         """
         Enters a test mode where the user can manually enter utterances or predefined commands for processing.
         """
+        print(f"NER startup: {self.ner.startup_report().format()}")
         while True:
             user_input: str = input(
-                "Enter an utterance or type 'quit' to exit: ")
+                "Enter an utterance, 'metrics' or 'quit' to exit: ")
 
             if user_input.lower() == "quit":
                 break
 
+            if user_input.lower() == "metrics":
+                for stage, stats in METRICS.snapshot().items():
+                    print(f"{stage:<16} {stats.format()}")
+                plan_stats = self.plan_cache.stats()
+                print(f"plan cache: {plan_stats.size} plans, hit rate {plan_stats.hit_rate:.1%}")
+                continue
+
             # Check if the user input matches any predefined inputs and set user_input to the corresponding sentence
             predefined_inputs = {
                 "1": "turn on lights in office",
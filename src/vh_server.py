@@ -0,0 +1,188 @@
+'''
+Module to serve the orchestrator to voice satellites over HTTP, websocket and a Unix socket
+'''
+import asyncio
+import json
+import time
+from typing import Any, Optional
+from aiohttp import web, WSMsgType
+from vh_ner_async import VhNerBatcher
+from vh_orchestrator import VHOrchestator
+from nlp.nlp_metrics import METRICS
+
+HOST = "0.0.0.0"
+PORT = 8765
+UNIX_SOCKET_PATH: Optional[str] = None  # e.g. "/run/vh/vh.sock", served next to the TCP port
+MAX_IN_FLIGHT = 256  # Requests processed at once, later requests wait for a slot
+
+
+class VhServer:
+    """
+    An asyncio server for the orchestrator that handles utterances from many satellites
+    concurrently and returns structured results instead of saying them.
+
+    The NER of concurrent requests is grouped into micro-batches by a VhNerBatcher, which
+    runs the pipelines in its worker thread. Skills run on the event loop: their service
+    calls and state reads are awaited (see NlpSkill.handle_utterance_async) and share the
+    keep-alive pool of the orchestrator's HasAsyncClient, so a request waiting for Home
+    Assistant does not hold a thread or block the other requests. A command with a plan in
+    the orchestrator's plan cache is replayed without the NER. At most max_in_flight
+    requests are processed at once.
+
+    Endpoints:
+        POST /api/utterance: {"utterance": "..."} -> result.
+        GET /api/websocket: every text message is an utterance, or {"id": ..., "utterance": ...};
+            the results are sent back as they complete, with the id of their request.
+        GET /metrics: stage latencies and the plan cache hit ratio in the Prometheus text format.
+
+    A result is {"utterance": str, "status": NlpResultStatus value, "dialog": str,
+    "elapsed_ms": float}.
+
+    Methods:
+        process(utterance: str) -> dict:
+            Coroutine, handles one utterance and returns its result.
+
+        create_app() -> web.Application:
+            Creates the aiohttp application with the endpoints.
+    """
+
+    def __init__(
+        self,
+        orchestrator: VHOrchestator,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        max_batch_size: int = 32,
+        max_batch_delay: float = 0.005,
+    ) -> None:
+        """
+        Initializes a new instance of the VhServer class.
+
+        Args:
+            orchestrator (VHOrchestator): The orchestrator handling the utterances.
+            max_in_flight (int): Number of requests processed at once. Defaults to MAX_IN_FLIGHT.
+            max_batch_size (int): Maximum NER batch size, see VhNerBatcher. Defaults to 32.
+            max_batch_delay (float): Maximum NER batching delay in seconds, see VhNerBatcher.
+                Defaults to 5 ms.
+        """
+        self.orchestrator: VHOrchestator = orchestrator
+        self.ner_batcher: VhNerBatcher = VhNerBatcher(
+            orchestrator.ner, max_batch_size, max_batch_delay)
+        self._max_in_flight: int = max_in_flight
+        self._in_flight: Optional[asyncio.Semaphore] = None
+
+    async def process(self, utterance: str) -> dict[str, Any]:
+        """
+        Handles one utterance: the cached plan if there is one, otherwise NER in the batcher,
+        then the skill.
+
+        Args:
+            utterance (str): The utterance.
+
+        Returns:
+            dict[str, Any]: The result, see the class documentation.
+        """
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self._max_in_flight)
+        start = time.perf_counter()
+        async with self._in_flight:
+            with METRICS.timer("request"):
+                # 5. Replay the plan of a repeated command
+                result = await self.orchestrator.execute_cached_plan_async(utterance)
+                if result is None:
+                    plan_generation = self.orchestrator.plan_cache.generation
+                    # 10. Perform NER analysis
+                    with METRICS.timer("ner"):
+                        ner_raw_result = await self.ner_batcher.process_text(utterance)
+                    # 20-40. Find the skill, handle the utterance and choose the dialog
+                    result = await self.orchestrator.handle_processed_text_async(
+                        utterance, ner_raw_result, plan_generation)
+        return {
+            "utterance": utterance,
+            "status": result.status.value,
+            "dialog": result.dialog_to_say,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    async def _handle_utterance(self, request: web.Request) -> web.Response:
+        """Handles POST /api/utterance."""
+        try:
+            utterance = (await request.json())["utterance"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            return web.json_response({"error": "Expected {\"utterance\": \"...\"}"}, status=400)
+        if not isinstance(utterance, str) or not utterance.strip():
+            return web.json_response({"error": "The utterance must be a non-empty string"}, status=400)
+        try:
+            return web.json_response(await self.process(utterance))
+        except Exception as exception:  # pylint: disable=W0718
+            return web.json_response({"error": str(exception)}, status=500)
+
+    async def _handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        """Handles GET /api/websocket, the utterances of one connection run concurrently."""
+        websocket = web.WebSocketResponse(heartbeat=30)
+        await websocket.prepare(request)
+        running: set[asyncio.Task] = set()
+
+        async def reply(request_id: Any, utterance: str) -> None:
+            try:
+                message = await self.process(utterance)
+            except Exception as exception:  # pylint: disable=W0718
+                message = {"error": str(exception)}
+            message["id"] = request_id
+            if not websocket.closed:
+                await websocket.send_json(message)
+
+        async for message in websocket:
+            if message.type != WSMsgType.TEXT:
+                continue
+            request_id, utterance = None, message.data
+            if message.data.startswith("{"):
+                try:
+                    payload = json.loads(message.data)
+                    request_id, utterance = payload.get("id"), payload["utterance"]
+                except (json.JSONDecodeError, KeyError, AttributeError):
+                    await websocket.send_json(
+                        {"error": "Expected {\"id\": ..., \"utterance\": \"...\"}"})
+                    continue
+            task = asyncio.ensure_future(reply(request_id, utterance))
+            running.add(task)
+            task.add_done_callback(running.discard)
+
+        for task in running:
+            task.cancel()
+        return websocket
+
+    @staticmethod
+    async def _handle_metrics(_: web.Request) -> web.Response:
+        """Handles GET /metrics."""
+        return web.Response(
+            text=METRICS.to_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def _on_cleanup(self, _: web.Application) -> None:
+        """Finishes the queued NER requests and stops the NER worker thread."""
+        await self.ner_batcher.close()
+
+    def create_app(self) -> web.Application:
+        """
+        Creates the aiohttp application with the endpoints.
+
+        Returns:
+            web.Application: The application, run it with web.run_app or an AppRunner.
+        """
+        app = web.Application()
+        app.router.add_post("/api/utterance", self._handle_utterance)
+        app.router.add_get("/api/websocket", self._handle_websocket)
+        app.router.add_get("/metrics", self._handle_metrics)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+
+def main():
+    '''
+    Main function to start the orchestrator and serve it until interrupted
+    '''
+    # The server exposes /metrics itself, the orchestrator starts no endpoint of its own
+    server = VhServer(VHOrchestator(metrics_port=None))
+    web.run_app(server.create_app(), host=HOST, port=PORT, path=UNIX_SOCKET_PATH)
+
+
+if __name__ == "__main__":
+    main()